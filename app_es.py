@@ -9,7 +9,7 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, date, timedelta
+from datetime import datetime, timedelta
 import datetime as dt
 import sys
 from pathlib import Path
@@ -220,9 +220,15 @@ def render_dashboard():
     """Renderiza el dashboard principal"""
     st.header("🏠 Dashboard Principal")
     
-    # Obtener estadísticas
+    # Obtener estadísticas (último snapshot calculado en segundo plano)
     db = get_hybrid_manager()
-    stats = db.get_dashboard_stats()
+    snapshot = db.get_dashboard_snapshot()
+    dashboard_data = snapshot['data']
+    stats = dashboard_data.get('stats', {})
+    inventory_alerts = dashboard_data.get('inventory_alerts', {})
+    
+    if snapshot['age_seconds'] is not None:
+        st.caption(f"🔄 Datos actualizados hace {snapshot['age_seconds']:.0f} s")
     
     # KPIs principales
     col1, col2, col3, col4 = st.columns(4)
@@ -264,7 +270,7 @@ def render_dashboard():
         st.subheader("⚠️ Alertas Stock")
         
         # Productos con stock bajo
-        low_stock_products = db.get_products_low_stock()
+        low_stock_products = inventory_alerts.get('low_stock', [])
         if low_stock_products:
             for product in low_stock_products[:5]:  # Mostrar solo los primeros 5
                 st.markdown(f"""
@@ -281,7 +287,7 @@ def render_dashboard():
         st.subheader("📅 Vencimientos Próximos")
         
         # Productos próximos a vencer
-        expiring_products = db.get_products_expiring_soon()
+        expiring_products = inventory_alerts.get('expiring_soon', [])
         if expiring_products:
             for product in expiring_products[:5]:  # Mostrar solo los primeros 5
                 st.markdown(f"""
@@ -302,10 +308,8 @@ def render_dashboard():
     with col1:
         st.subheader("📈 Ventas Últimos 7 Días")
         
-        # Obtener ventas de los últimos 7 días
-        end_date = date.today()
-        start_date = end_date - timedelta(days=7)
-        sales_data = db.get_sales_by_period(start_date, end_date)
+        # Ventas de los últimos 7 días
+        sales_data = dashboard_data.get('sales_last_7_days', [])
         
         if sales_data:
             df_sales = pd.DataFrame(sales_data)
@@ -322,8 +326,8 @@ def render_dashboard():
     with col2:
         st.subheader("🏆 Productos Más Vendidos")
         
-        # Obtener productos más vendidos
-        top_products = db.get_top_products(limit=5)
+        # Productos más vendidos
+        top_products = dashboard_data.get('top_products', [])
         
         if top_products:
             df_products = pd.DataFrame(top_products)
@@ -734,8 +738,10 @@ def render_inventario():
     with tab4:
         st.subheader("⚠️ Alertas y Notificaciones")
         
+        inventory_alerts = db.get_inventory_alerts()
+        
         # Productos con stock bajo
-        low_stock = db.get_products_low_stock()
+        low_stock = inventory_alerts.get('low_stock', [])
         if low_stock:
             st.warning(f"⚠️ {len(low_stock)} productos con stock bajo")
             for product in low_stock:
@@ -744,7 +750,7 @@ def render_inventario():
             st.success("✅ Todo el stock es suficiente")
         
         # Productos próximos a vencer
-        expiring = db.get_products_expiring_soon()
+        expiring = inventory_alerts.get('expiring_soon', [])
         if expiring:
             st.warning(f"⏰ {len(expiring)} productos próximos a vencer")
             for product in expiring:
@@ -2942,15 +2948,16 @@ def render_analytics():
         try:
             # Ottieni dati finanziari
             current_date = datetime.now().date()
-            monthly_data = db.get_monthly_transactions(current_date.year, current_date.month)
+            month_start = current_date.replace(day=1)
+            next_month_start = (month_start + timedelta(days=32)).replace(day=1)
             
-            income_data = monthly_data.get('income', [])
-            expense_data = monthly_data.get('expenses', [])
+            # Totali giornalieri dai rollup (daily_reports), senza scaricare le transazioni
+            daily_rollups = db.get_daily_rollups(month_start.isoformat(), next_month_start.isoformat())
             
-            if income_data or expense_data:
+            if daily_rollups:
                 # Calcola metriche finanziarie
-                total_income = sum([float(t.get('amount', 0)) for t in income_data])
-                total_expenses = sum([float(t.get('amount', 0)) for t in expense_data])
+                total_income = sum([r['total_income'] for r in daily_rollups])
+                total_expenses = sum([r['total_expenses'] for r in daily_rollups])
                 net_profit = total_income - total_expenses
                 profit_margin = (net_profit / total_income * 100) if total_income > 0 else 0
                 
@@ -2969,7 +2976,7 @@ def render_analytics():
                             delta=f"{profit_margin:.1f}%", delta_color=profit_color)
                 
                 with col4:
-                    total_transactions = len(income_data) + len(expense_data)
+                    total_transactions = sum([r['transactions_count'] for r in daily_rollups])
                     st.metric("📊 Total Transacciones", f"{total_transactions}")
                 
                 # Grafici finanziari
@@ -2993,7 +3000,11 @@ def render_analytics():
                     st.plotly_chart(fig_financial, width='stretch')
                 
                 with col2:
-                    # Grafico categorie di spesa
+                    # Grafico categorie di spesa (le transazioni si scaricano solo su richiesta)
+                    expense_data = []
+                    if total_expenses > 0 and st.checkbox("🔍 Ver gastos por categoría", key="analytics_expense_categories"):
+                        expense_data = db.get_monthly_transactions(current_date.year, current_date.month).get('expenses', [])
+                    
                     if expense_data:
                         expense_categories = {}
                         for expense in expense_data:
@@ -3007,38 +3018,21 @@ def render_analytics():
                             title="Gastos por Categoría"
                         )
                         st.plotly_chart(fig_expenses, width='stretch')
-                    else:
+                    elif total_expenses <= 0:
                         st.info("📊 Nessun dato di spesa disponibile")
                 
                 # Analisi trend
                 st.subheader("📈 Análisis de Tendencia")
                 
-                if len(income_data) > 1 or len(expense_data) > 1:
-                    # Crea grafico trend giornaliero
-                    daily_data = {}
-                    
-                    for income in income_data:
-                        date = income.get('date', '')[:10]
-                        amount = float(income.get('amount', 0))
-                        if date not in daily_data:
-                            daily_data[date] = {'income': 0, 'expenses': 0}
-                        daily_data[date]['income'] += amount
-                    
-                    for expense in expense_data:
-                        date = expense.get('date', '')[:10]
-                        amount = float(expense.get('amount', 0))
-                        if date not in daily_data:
-                            daily_data[date] = {'income': 0, 'expenses': 0}
-                        daily_data[date]['expenses'] += amount
-                    
-                    # Crea DataFrame per trend
+                if len(daily_rollups) > 1:
+                    # Crea DataFrame per trend giornaliero dai rollup
                     trend_data = []
-                    for date, data in sorted(daily_data.items()):
+                    for rollup in sorted(daily_rollups, key=lambda r: r['date']):
                         trend_data.append({
-                            'fecha': date,
-                            'ingresos': data['income'],
-                            'gastos': data['expenses'],
-                            'beneficio': data['income'] - data['expenses']
+                            'fecha': rollup['date'],
+                            'ingresos': rollup['total_income'],
+                            'gastos': rollup['total_expenses'],
+                            'beneficio': rollup['total_income'] - rollup['total_expenses']
                         })
                     
                     df_trend = pd.DataFrame(trend_data)
@@ -3238,6 +3232,88 @@ def render_analytics():
         except Exception as e:
             st.error(f"❌ Errore caricando analytics clienti: {e}")
 
+def render_transactions_browser(db, kind: str, start_date: str, end_date: str, categories: list, key: str):
+    """Tabella transazioni paginata lato server (keyset su data/importo + id) con prefetch della pagina successiva"""
+    col1, col2, col3, col4, col5 = st.columns([2, 2, 1, 1, 1])
+    
+    with col1:
+        category = st.selectbox("Categoria", ["Tutte"] + categories, key=f"{key}_category")
+    with col2:
+        search = st.text_input("🔍 Cerca descrizione", key=f"{key}_search").strip()
+    with col3:
+        sort_label = st.selectbox("Ordina per", ["Data", "Importo"], key=f"{key}_sort")
+    with col4:
+        descending = st.checkbox("Decrescente", key=f"{key}_descending")
+    with col5:
+        page_size = st.selectbox("Righe", [25, 50, 100], index=1, key=f"{key}_page_size")
+    
+    page_args = {
+        'kind': kind,
+        'start_date': start_date,
+        'end_date': end_date,
+        'category': None if category == "Tutte" else category,
+        'search': search or None,
+        'sort': 'amount' if sort_label == "Importo" else 'date',
+        'descending': descending,
+        'limit': page_size
+    }
+    
+    # Cursori delle pagine visitate: si riparte dalla prima se cambiano filtri o ordinamento
+    if st.session_state.get(f"{key}_args") != page_args:
+        st.session_state[f"{key}_args"] = page_args
+        st.session_state[f"{key}_cursors"] = [None]
+    cursors = st.session_state[f"{key}_cursors"]
+    
+    page = db.get_transactions_page(**page_args, cursor=cursors[-1])
+    if page['next_cursor']:
+        db.prefetch_transactions_page(**page_args, cursor=page['next_cursor'])
+    
+    if not page['rows']:
+        st.info("📊 Nessuna transazione trovata per questo periodo")
+        return
+    
+    rows = []
+    for transaction in page['rows']:
+        row = {
+            'Data': str(transaction.get('date', 'N/A'))[:10],
+            'Importo': f"${float(transaction.get('amount', 0)):,.2f}",
+            'Categoria': transaction.get('category', 'N/A'),
+            'Descrizione': transaction.get('description') or '',
+        }
+        if kind == 'expenses':
+            row['Fornitore'] = transaction.get('supplier') or ''
+        row['Metodo Pago'] = transaction.get('payment_method', 'N/A')
+        row['Totale Progressivo'] = f"${float(transaction.get('running_total', 0)):,.2f}"
+        rows.append(row)
+    
+    st.dataframe(pd.DataFrame(rows), width='stretch', hide_index=True)
+    
+    first_row = (len(cursors) - 1) * page_size + 1
+    col1, col2, col3 = st.columns([1, 2, 1])
+    
+    with col1:
+        if len(cursors) > 1 and st.button("⬅️ Precedente", key=f"{key}_prev"):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        st.caption(f"Pagina {len(cursors)} · righe {first_row}-{first_row + len(page['rows']) - 1} di {page['total_count']}")
+    with col3:
+        if page['next_cursor'] and st.button("Successiva ➡️", key=f"{key}_next"):
+            cursors.append(page['next_cursor'])
+            st.rerun()
+
+def render_category_summary(title: str, category_totals: list):
+    """Riepilogo per categoria (totale e numero di transazioni) calcolato dal database"""
+    st.subheader(title)
+    for data in category_totals:
+        col1, col2, col3 = st.columns([2, 1, 1])
+        with col1:
+            st.write(f"**{data['category'] or 'N/A'}**")
+        with col2:
+            st.write(f"${float(data['total']):,.2f}")
+        with col3:
+            st.write(f"{int(data['count'])} transazioni")
+
 def render_balance():
     """Renderiza la sección balance y contabilidad giornaliera"""
     require_permission("balance")
@@ -3407,9 +3483,19 @@ def render_balance():
         with col2:
             st.info(f"📊 Panel para el **{dashboard_date.strftime('%d/%m/%Y')}**")
         
-        # Ottieni dati giornalieri
-        daily_entries = db.get_daily_entries(dashboard_date.isoformat())
-        daily_report = db.get_daily_report(dashboard_date.isoformat())
+        # Ottieni dati giornalieri (le due letture in parallelo con un solo batch)
+        daily_data = db.run_async_batch(
+            {
+                'entries': ('get_daily_entries', dashboard_date.isoformat()),
+                'report': ('get_daily_report', dashboard_date.isoformat())
+            },
+            defaults={
+                'entries': {'date': dashboard_date.isoformat(), 'income': [], 'expenses': [], 'total_income': 0, 'total_expenses': 0},
+                'report': {}
+            }
+        )
+        daily_entries = daily_data['entries']
+        daily_report = daily_data['report']
         
         # Metriche principali
         col1, col2, col3, col4 = st.columns(4)
@@ -3778,135 +3864,58 @@ def render_balance():
             # Sezione dettaglio transazioni del periodo
             st.subheader("📋 Riepilogo Transazioni del Periodo")
             
-            # Ottieni tutte le transazioni del mese
-            try:
-                # Usa il database manager per ottenere le transazioni mensili
-                if hasattr(db, 'get_monthly_transactions'):
-                    monthly_data_transactions = db.get_monthly_transactions(selected_year, selected_month)
-                    monthly_income = monthly_data_transactions.get('income', [])
-                    monthly_expenses = monthly_data_transactions.get('expenses', [])
-                else:
-                    # Fallback: ottieni tutte le transazioni e filtra manualmente
-                    all_income = db.select('daily_income') if hasattr(db, 'select') else []
-                    all_expenses = db.select('daily_expenses') if hasattr(db, 'select') else []
-                    
-                    # Filtra per il mese selezionato
-                    monthly_income = []
-                    monthly_expenses = []
-                    
-                    for income in all_income:
-                        income_date = income.get('date', '')
-                        if income_date.startswith(f"{selected_year}-{selected_month:02d}-"):
-                            monthly_income.append(income)
-                    
-                    for expense in all_expenses:
-                        expense_date = expense.get('date', '')
-                        if expense_date.startswith(f"{selected_year}-{selected_month:02d}-"):
-                            monthly_expenses.append(expense)
-            except Exception as e:
-                logger.error(f"❌ Errore ottenendo transazioni mensili: {e}")
-                monthly_income = []
-                monthly_expenses = []
+            # Le transazioni grezze si scaricano solo se si apre il dettaglio
+            show_transactions = st.checkbox("🔍 Mostra dettaglio transazioni", key="monthly_show_transactions")
             
-            if monthly_income or monthly_expenses:
-                # Tab per entrate e uscite
+            if not show_transactions:
+                st.caption(f"📊 {monthly_data['total_transactions']} transazioni nel periodo")
+            else:
+                # Totali per categoria aggregati dal database (entrate e uscite in parallelo)
+                category_totals = db.fetch_many(
+                    {
+                        'income': (db.get_category_totals, 'income', start_date, end_date),
+                        'expenses': (db.get_category_totals, 'expenses', start_date, end_date)
+                    },
+                    defaults={'income': [], 'expenses': []}
+                )
+                income_count = sum(int(data['count']) for data in category_totals['income'])
+                expense_count = sum(int(data['count']) for data in category_totals['expenses'])
+                
+                # Tabelle paginate dal database: filtri, ordinamento e totale progressivo lato server
                 trans_tab1, trans_tab2 = st.tabs(["💰 Entrate del Periodo", "💸 Uscite del Periodo"])
                 
                 with trans_tab1:
-                    if monthly_income:
-                        st.write(f"**📊 Totale Entrate: {len(monthly_income)} transazioni**")
-                        
-                        # Tabella entrate
-                        income_data = []
-                        for income in monthly_income:
-                            income_data.append({
-                                'Data': income.get('date', 'N/A')[:10],
-                                'Importo': f"${float(income.get('amount', 0)):,.2f}",
-                                'Categoria': income.get('category', 'N/A'),
-                                'Descrizione': income.get('description', 'N/A'),
-                                'Metodo Pago': income.get('payment_method', 'N/A')
-                            })
-                        
-                        df_income = pd.DataFrame(income_data)
-                        st.dataframe(df_income, width='stretch', hide_index=True)
-                        
-                        # Riepilogo per categoria
-                        st.subheader("📊 Riepilogo per Categoria - Entrate")
-                        category_summary = {}
-                        for income in monthly_income:
-                            cat = income.get('category', 'N/A')
-                            amount = float(income.get('amount', 0))
-                            if cat not in category_summary:
-                                category_summary[cat] = {'total': 0, 'count': 0}
-                            category_summary[cat]['total'] += amount
-                            category_summary[cat]['count'] += 1
-                        
-                        for cat, data in sorted(category_summary.items(), key=lambda x: x[1]['total'], reverse=True):
-                            col1, col2, col3 = st.columns([2, 1, 1])
-                            with col1:
-                                st.write(f"**{cat}**")
-                            with col2:
-                                st.write(f"${data['total']:,.2f}")
-                            with col3:
-                                st.write(f"{data['count']} transazioni")
-                    else:
-                        st.info("📊 Nessuna entrata registrata per questo periodo")
+                    st.write(f"**📊 Totale Entrate: {income_count} transazioni**")
+                    render_transactions_browser(
+                        db, 'income', start_date, end_date,
+                        [category['name'] for category in income_categories],
+                        key="monthly_income_browser"
+                    )
+                    if category_totals['income']:
+                        render_category_summary("📊 Riepilogo per Categoria - Entrate", category_totals['income'])
                 
                 with trans_tab2:
-                    if monthly_expenses:
-                        st.write(f"**📊 Totale Uscite: {len(monthly_expenses)} transazioni**")
-                        
-                        # Tabella uscite
-                        expense_data = []
-                        for expense in monthly_expenses:
-                            expense_data.append({
-                                'Data': expense.get('date', 'N/A')[:10],
-                                'Importo': f"${float(expense.get('amount', 0)):,.2f}",
-                                'Categoria': expense.get('category', 'N/A'),
-                                'Descrizione': expense.get('description', 'N/A'),
-                                'Fornitore': expense.get('supplier', 'N/A'),
-                                'Metodo Pago': expense.get('payment_method', 'N/A')
-                            })
-                        
-                        df_expense = pd.DataFrame(expense_data)
-                        st.dataframe(df_expense, width='stretch', hide_index=True)
-                        
-                        # Riepilogo per categoria
-                        st.subheader("📊 Riepilogo per Categoria - Uscite")
-                        category_summary = {}
-                        for expense in monthly_expenses:
-                            cat = expense.get('category', 'N/A')
-                            amount = float(expense.get('amount', 0))
-                            if cat not in category_summary:
-                                category_summary[cat] = {'total': 0, 'count': 0}
-                            category_summary[cat]['total'] += amount
-                            category_summary[cat]['count'] += 1
-                        
-                        for cat, data in sorted(category_summary.items(), key=lambda x: x[1]['total'], reverse=True):
-                            col1, col2, col3 = st.columns([2, 1, 1])
-                            with col1:
-                                st.write(f"**{cat}**")
-                            with col2:
-                                st.write(f"${data['total']:,.2f}")
-                            with col3:
-                                st.write(f"{data['count']} transazioni")
-                    else:
-                        st.info("📊 Nessuna uscita registrata per questo periodo")
+                    st.write(f"**📊 Totale Uscite: {expense_count} transazioni**")
+                    render_transactions_browser(
+                        db, 'expenses', start_date, end_date,
+                        [category['name'] for category in expense_categories],
+                        key="monthly_expense_browser"
+                    )
+                    if category_totals['expenses']:
+                        render_category_summary("📊 Riepilogo per Categoria - Uscite", category_totals['expenses'])
                 
                 # Riepilogo generale
                 st.subheader("📈 Riepilogo Generale del Periodo")
                 col1, col2, col3, col4 = st.columns(4)
                 
                 with col1:
-                    total_income_count = len(monthly_income)
-                    st.metric("💰 Transazioni Entrate", total_income_count)
+                    st.metric("💰 Transazioni Entrate", income_count)
                 
                 with col2:
-                    total_expense_count = len(monthly_expenses)
-                    st.metric("💸 Transazioni Uscite", total_expense_count)
+                    st.metric("💸 Transazioni Uscite", expense_count)
                 
                 with col3:
-                    total_transactions = total_income_count + total_expense_count
+                    total_transactions = income_count + expense_count
                     st.metric("📊 Totale Transazioni", total_transactions)
                 
                 with col4:
@@ -3915,9 +3924,6 @@ def render_balance():
                         st.metric("💵 Transazione Media", f"${avg_transaction:,.2f}")
                     else:
                         st.metric("💵 Transazione Media", "$0.00")
-            else:
-                st.info("📊 Nessuna transazione registrata per questo periodo")
-                st.write("💡 Inserisci entrate e uscite giornaliere per vedere il dettaglio delle transazioni")
             
             # Confronto con mese precedente
             st.subheader("📈 Confronto Mese Precedente")
@@ -3992,40 +3998,16 @@ def render_balance():
         # Ottieni dati annuali
         try:
             # Raccoglie dati di tutti i mesi dell'anno
-            annual_data = []
-            monthly_totals = {'income': [], 'expenses': [], 'profit': []}
+            # Totali mensili dai rollup giornalieri (daily_reports)
+            annual_data = db.get_annual_monthly_totals(selected_year)
+            for month_data in annual_data:
+                month_data['month_name'] = datetime(selected_year, month_data['month'], 1).strftime('%B')
             
-            for month in range(1, 13):
-                try:
-                    monthly_data = db.get_monthly_transactions(selected_year, month)
-                    
-                    monthly_income = monthly_data.get('income', [])
-                    monthly_expenses = monthly_data.get('expenses', [])
-                    
-                    # Calcola totali mensili
-                    total_income = sum([float(t.get('amount', 0)) for t in monthly_income])
-                    total_expenses = sum([float(t.get('amount', 0)) for t in monthly_expenses])
-                    total_profit = total_income - total_expenses
-                    
-                    monthly_totals['income'].append(total_income)
-                    monthly_totals['expenses'].append(total_expenses)
-                    monthly_totals['profit'].append(total_profit)
-                    
-                    # Aggiungi dati mensili
-                    annual_data.append({
-                        'month': month,
-                        'month_name': datetime(selected_year, month, 1).strftime('%B'),
-                        'income': total_income,
-                        'expenses': total_expenses,
-                        'profit': total_profit,
-                        'transactions': len(monthly_income) + len(monthly_expenses)
-                    })
-                    
-                except Exception as e:
-                    logger.error(f"❌ Errore ottenendo dati per {month}/{selected_year}: {e}")
-                    monthly_totals['income'].append(0)
-                    monthly_totals['expenses'].append(0)
-                    monthly_totals['profit'].append(0)
+            monthly_totals = {
+                'income': [d['income'] for d in annual_data],
+                'expenses': [d['expenses'] for d in annual_data],
+                'profit': [d['profit'] for d in annual_data]
+            }
             
             # Calcola totali annuali
             annual_income = sum(monthly_totals['income'])
@@ -4509,6 +4491,7 @@ def render_configuracion():
                         # Guardar archivo temporalmente
                         import tempfile
                         import os
+                        from components.supabase_excel_migrator import SupabaseExcelMigrator
                         
                         with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp_file:
                             tmp_file.write(uploaded_file.getvalue())
@@ -4516,8 +4499,24 @@ def render_configuracion():
                         
                         # Procesar el archivo
                         with st.spinner("🔄 Procesando archivo personalizado..."):
-                            migrator = SupabaseExcelMigrator()
+                            progress_bar = st.progress(0.0, text="📊 Leyendo archivo...")
+                            stage_labels = {
+                                'sales': "💰 Ventas",
+                                'purchases': "🛒 Compras",
+                                'expenses': "💸 Gastos",
+                                'suppliers': "🚚 Proveedores"
+                            }
+                            
+                            def update_progress(stage, done, total):
+                                progress_bar.progress(
+                                    done / total if total else 1.0,
+                                    text=f"{stage_labels.get(stage, stage)}: {done:,}/{total:,} registros"
+                                )
+                            
+                            # Fogli in serie: l'elaborazione in parallelo resta opzionale fuori dall'app
+                            migrator = SupabaseExcelMigrator(progress_callback=update_progress, workers=1)
                             results = migrator.migrate_excel_to_supabase(tmp_file_path)
+                            progress_bar.empty()
                             
                             if results:
                                 st.success("✅ **Archivo personalizado procesado con éxito!**")
@@ -4536,6 +4535,9 @@ def render_configuracion():
                                 with col4:
                                     st.metric("Fornitori", results.get('suppliers', {}).get('migrated_count', 0))
                                 
+                                if results.get('suppliers', {}).get('status') == 'skipped':
+                                    st.warning(f"⚠️ Proveedores no actualizados: {results['suppliers']['error']}")
+                                
                                 # Crea analisi dei dati
                                 carniceria_analysis = {
                                     'overview': {
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Benchmark degli analizzatori Excel sulla tabella colonnare condivisa: ExcelReader, ExcelProcessor
+e CarniceriaAnalyzer caricati sullo stesso libro sintetico, ognuno con la propria lettura
+(tabella svuotata prima di ogni analizzatore) contro una sola lettura condivisa; in più i vecchi
+cicli iterrows degli analizzatori (_extract_daily_sales, _extract_supplier_payments, _find_daily_sales,
+_find_suppliers) contro la scansione colonnare dei fogli che li ha sostituiti
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# Aggiungi il percorso della directory corrente al path di Python
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from benchmark_excel_parser import SHEETS, build_sheet
+from components.carniceria_analyzer import CarniceriaAnalyzer
+from components.excel_processor import ExcelProcessor
+from components.excel_reader import ExcelReader
+from components.excel_sheet_parser import extract_sheet_records, sheet_transactions_frame
+from components.transactions_table import clear_transactions_tables
+
+
+def legacy_extract_daily_sales(data: pd.DataFrame):
+    """Il vecchio CarniceriaAnalyzer._extract_daily_sales"""
+    daily_sales = []
+    for index, row in data.iterrows():
+        if pd.notna(row.iloc[0]) and len(row) > 9:
+            nombre_value = str(row.iloc[9]) if pd.notna(row.iloc[9]) else ""
+            if 'TOTAL DIA' in nombre_value:
+                daily_sales.append({
+                    'date': row.iloc[1] if len(row) > 1 else None,
+                    'amount': row.iloc[2] if len(row) > 2 else 0,
+                    'type': 'daily_total'
+                })
+    return daily_sales
+
+
+def legacy_extract_supplier_payments(data: pd.DataFrame):
+    """Il vecchio CarniceriaAnalyzer._extract_supplier_payments"""
+    supplier_payments = []
+    for index, row in data.iterrows():
+        if pd.notna(row.iloc[0]) and len(row) > 9:
+            nombre_value = str(row.iloc[9]) if pd.notna(row.iloc[9]) else ""
+            if 'TOTAL DIA' not in nombre_value and nombre_value.strip() != "":
+                supplier_payments.append({
+                    'supplier_name': nombre_value,
+                    'amount': row.iloc[2] if len(row) > 2 and pd.notna(row.iloc[2]) else 0,
+                    'date': row.iloc[1] if len(row) > 1 and pd.notna(row.iloc[1]) else None,
+                    'invoice_number': row.iloc[0] if len(row) > 0 and pd.notna(row.iloc[0]) else None
+                })
+    return supplier_payments
+
+
+def _legacy_valid_values(row):
+    numeric_values = []
+    for cell in row:
+        if pd.notna(cell):
+            try:
+                numeric_values.append(float(cell))
+            except (TypeError, ValueError):
+                pass
+    return [v for v in numeric_values if 0 <= v <= 1000000]
+
+
+def legacy_find_daily_sales(data: pd.DataFrame):
+    """Il vecchio ExcelReader._find_daily_sales"""
+    daily_sales = []
+    for index, row in data.iterrows():
+        row_str = ' '.join([str(cell) for cell in row if pd.notna(cell)])
+        if 'TOTAL DIA' in row_str:
+            valid_values = _legacy_valid_values(row)
+            if valid_values:
+                daily_sales.append({'date': row.iloc[1] if len(row) > 1 else None,
+                                    'amount': max(valid_values), 'type': 'daily_total'})
+    return daily_sales
+
+
+def legacy_find_suppliers(data: pd.DataFrame):
+    """Il vecchio ExcelReader._find_suppliers"""
+    suppliers = []
+    for index, row in data.iterrows():
+        row_str = ' '.join([str(cell) for cell in row if pd.notna(cell)])
+        if 'TOTAL DIA' not in row_str and len(row_str.strip()) > 0:
+            valid_values = _legacy_valid_values(row)
+            if valid_values:
+                supplier_name = None
+                for cell in row:
+                    if pd.notna(cell) and not str(cell).replace('.', '').replace(',', '').isdigit():
+                        supplier_name = str(cell).strip()
+                if supplier_name and supplier_name != 'nan' and supplier_name != 'TOTAL DIA':
+                    suppliers.append({'name': supplier_name, 'amount': max(valid_values),
+                                      'date': row.iloc[1] if len(row) > 1 else None,
+                                      'invoice': row.iloc[0] if len(row) > 0 else None})
+    return suppliers
+
+
+def row_scan_times(frames, repeats: int):
+    """Migliori tempi dei quattro vecchi cicli iterrows e della tabella colonnare sugli stessi fogli"""
+    legacy_scans = (legacy_extract_daily_sales, legacy_extract_supplier_payments, legacy_find_daily_sales, legacy_find_suppliers)
+    
+    def timed(scan):
+        best = float('inf')
+        for _ in range(repeats):
+            started = time.perf_counter()
+            rows = scan()
+            best = min(best, time.perf_counter() - started)
+        return best, rows
+    
+    legacy_time, legacy_rows = timed(
+        lambda: sum(len(extract(df)) for df in frames.values() for extract in legacy_scans)
+    )
+    table_time, table_rows = timed(
+        lambda: sum(len(sheet_transactions_frame(df, sheet_name)) for sheet_name, df in frames.items())
+    )
+    return legacy_time, legacy_rows, table_time, table_rows
+
+
+def load_all(path: Path, shared: bool):
+    """Carica i tre analizzatori; senza tabella condivisa ognuno rilegge il libro"""
+    analyzers = [ExcelReader(), ExcelProcessor(), CarniceriaAnalyzer()]
+    loaders = [analyzers[0].load_excel, analyzers[1].load_excel_data, analyzers[2].load_carniceria_data]
+    clear_transactions_tables()
+    for load in loaders:
+        if not shared:
+            clear_transactions_tables()
+        if not load(str(path), workers=1):
+            raise RuntimeError(f"Caricamento fallito: {load.__qualname__}")
+    return analyzers
+
+
+def analyses(analyzers):
+    """Le analisi complete dei tre analizzatori"""
+    reader, processor, analyzer = analyzers
+    return reader.get_comprehensive_analysis(), processor.get_monthly_summary(), analyzer.get_comprehensive_analysis()
+
+
+def run_benchmark(rows_per_day: int, repeats: int):
+    """Scrive il libro sintetico e confronta tre letture separate con la tabella condivisa"""
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / 'benchmark_carniceria.xlsx'
+        print(f"🏗️ Generando libro sintetico: {len(SHEETS)} fogli x {rows_per_day * 28:,} movimenti...")
+        with pd.ExcelWriter(path) as writer:
+            for sheet_name, first_day in SHEETS.items():
+                build_sheet(first_day, rows_per_day, rng).to_excel(writer, sheet_name=sheet_name, header=False, index=False)
+        frames = pd.read_excel(path, sheet_name=None, header=None)
+        
+        def timed(shared):
+            best = float('inf')
+            for _ in range(repeats):
+                started = time.perf_counter()
+                result = analyses(load_all(path, shared))
+                best = min(best, time.perf_counter() - started)
+            return best, result
+        
+        separate_time, _ = timed(shared=False)
+        shared_time, (reader_analysis, processor_summary, analyzer_analysis) = timed(shared=True)
+    
+    legacy_time, legacy_rows, table_time, table_rows = row_scan_times(frames, repeats)
+    
+    # Controllo: le tre analisi e il parser dei migratori vedono gli stessi movimenti
+    expected = sum(len(extract_sheet_records(df, sheet_name)[0]) for sheet_name, df in frames.items())
+    totals = {
+        'ExcelReader': (reader_analysis['overview']['total_sales'], reader_analysis['overview']['total_transactions']),
+        'ExcelProcessor': (processor_summary['total_sales'],
+                           sum(month['transactions'] for month in processor_summary['monthly_breakdown'].values())),
+        'CarniceriaAnalyzer': (analyzer_analysis['overview']['total_sales'], analyzer_analysis['overview']['total_transactions'])
+    }
+    consistent = len(set(totals.values())) == 1 and all(count == expected for _, count in totals.values())
+    
+    print(f"   🐢 Cicli iterrows (4 scansioni):  {legacy_time:.3f}s, {legacy_rows:,} righe estratte")
+    print(f"   ⚡ Scansione colonnare dei fogli: {table_time:.3f}s, {table_rows:,} righe "
+          f"({legacy_time / table_time:.1f}x)")
+    print(f"   🐢 Tre letture separate: {separate_time:.3f}s")
+    print(f"   ⚡ Tabella condivisa:    {shared_time:.3f}s ({separate_time / shared_time:.1f}x)")
+    for name, (sales, transactions) in totals.items():
+        print(f"   📊 {name}: vendite {sales:,.2f}, movimenti {transactions:,}")
+    print(f"   {'✅' if consistent else '❌'} Analisi coerenti ({expected:,} movimenti attesi): {consistent}")
+    return consistent
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark degli analizzatori Excel sulla tabella condivisa")
+    parser.add_argument('--rows-per-day', type=int, default=40, help="Movimenti per giorno in ogni foglio")
+    parser.add_argument('--repeats', type=int, default=3, help="Ripetizioni (si tiene la migliore)")
+    args = parser.parse_args()
+    
+    sys.exit(0 if run_benchmark(args.rows_per_day, args.repeats) else 1)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark del parser dei fogli Excel: ciclo riga per riga (df.iloc + extract_transaction)
+contro l'estrazione vettoriale di components/excel_sheet_parser.py su un libro sintetico di 8 fogli
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+# Aggiungi il percorso della directory corrente al path di Python
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from components.excel_sheet_parser import extract_sheet_records
+from excel_migration import ExcelMigrator
+
+SHEETS = {
+    'Noviembre 24': datetime(2024, 11, 1),
+    'Deciembre 24': datetime(2024, 12, 1),
+    'Enero 25': datetime(2025, 1, 1),
+    'Febrero 25': datetime(2025, 2, 1),
+    'Marzo 25': datetime(2025, 3, 1),
+    'Abril 25': datetime(2025, 4, 1),
+    'Mayo 25': datetime(2025, 5, 1),
+    'Junio 25': datetime(2025, 6, 1)
+}
+
+HEADER = ['MOVIMIENTO', 'Nº', 'FECHA', 'BASE', 'IGIC', 'COBRO', 'BASE', 'IGIC', 'PAGOS', 'NOMBRE',
+          'BENEFICIO', 'NOMINA', 'SEG. SOCIAL', 'RETENCION', 'VACACIONES', 'LIQUIDACION', 'GASTOS',
+          'BENEFICIO TOTAL', 'BENEFICIO NETO', 'FONDO', 'STOCK']
+
+
+def build_sheet(first_day: datetime, rows_per_day: int, rng: random.Random) -> pd.DataFrame:
+    """Foglio mensile con intestazione, movimenti di vendita/acquisto/spesa e righe TOTAL DEL DIA"""
+    rows = [[f"CARNICERIA EL TABLERO - {first_day:%B %Y}"] + [None] * 20, HEADER]
+    movement = 0
+
+    for day in range(28):
+        date = first_day + timedelta(days=day)
+        day_sales = 0.0
+        for _ in range(rows_per_day):
+            movement += 1
+            row = [movement, movement, date] + [None] * 18
+            kind = rng.random()
+            if kind < 0.55:
+                base = round(rng.uniform(5, 300), 2)
+                row[3], row[4], row[5] = base, round(base * 0.07, 2), round(base * 1.07, 2)
+                row[9] = f"Venta {rng.randint(1, 40)}"
+                day_sales += base
+            elif kind < 0.85:
+                base = round(rng.uniform(50, 2000), 2)
+                row[6], row[7], row[8] = base, round(base * 0.07, 2), round(base * 1.07, 2)
+                row[9] = f"Proveedor {rng.randint(1, 12)}"
+            else:
+                row[rng.randint(11, 16)] = round(rng.uniform(20, 1500), 2)
+                row[9] = rng.choice(['Nomina', 'Luz', 'Agua', 'Alquiler', ''])
+            rows.append(row)
+        total = [None, None, date, round(day_sales, 2), None, round(day_sales * 1.07, 2)] + [None] * 15
+        total[9] = 'TOTAL DEL DIA'
+        rows.append(total)
+        rows.append([None] * 21)
+
+    return pd.DataFrame(rows)
+
+
+def legacy_process_sheet(migrator: ExcelMigrator, df: pd.DataFrame, sheet_name: str):
+    """Il vecchio ciclo di process_sheet_data, riga per riga"""
+    transactions, daily_totals = [], []
+    for i in range(len(df)):
+        row = df.iloc[i]
+        if pd.notna(row.iloc[0]) and isinstance(row.iloc[0], (int, float)):
+            transaction = migrator.extract_transaction(row, {}, sheet_name)
+            if transaction:
+                transactions.append(transaction)
+        if pd.notna(row.iloc[9]) and 'TOTAL DEL DIA' in str(row.iloc[9]):
+            daily_total = migrator.extract_daily_total(row, {}, sheet_name)
+            if daily_total:
+                daily_totals.append(daily_total)
+    return transactions, daily_totals
+
+
+def run_benchmark(rows_per_day: int, repeats: int):
+    """Scrive il libro sintetico, lo rilegge come farebbe il migratore e confronta i due parser"""
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / 'benchmark_carniceria.xlsx'
+        print(f"🏗️ Generando libro sintetico: {len(SHEETS)} fogli x {rows_per_day * 28:,} movimenti...")
+        with pd.ExcelWriter(path) as writer:
+            for sheet_name, first_day in SHEETS.items():
+                build_sheet(first_day, rows_per_day, rng).to_excel(writer, sheet_name=sheet_name, header=False, index=False)
+        frames = pd.read_excel(path, sheet_name=None, header=None)
+
+    migrator = ExcelMigrator(str(path))
+    total_rows = sum(len(df) for df in frames.values())
+    print(f"📊 Righe totali: {total_rows:,}")
+
+    def timed(parse):
+        best = float('inf')
+        for _ in range(repeats):
+            started = time.perf_counter()
+            result = {sheet_name: parse(df, sheet_name) for sheet_name, df in frames.items()}
+            best = min(best, time.perf_counter() - started)
+        return best, result
+
+    legacy_time, legacy = timed(lambda df, sheet_name: legacy_process_sheet(migrator, df, sheet_name))
+    vector_time, vectorized = timed(
+        lambda df, sheet_name: extract_sheet_records(df, migrator.months_mapping.get(sheet_name, sheet_name), include_id=True)
+    )
+
+    identical = legacy == vectorized
+    transactions = sum(len(result[0]) for result in vectorized.values())
+    print(f"   🐢 Riga per riga: {legacy_time:.3f}s")
+    print(f"   ⚡ Vettoriale:    {vector_time:.3f}s ({legacy_time / vector_time:.1f}x)")
+    print(f"   🧾 Transazioni estratte: {transactions:,}")
+    print(f"   {'✅' if identical else '❌'} Risultati identici: {identical}")
+    return identical
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del parser dei fogli Excel")
+    parser.add_argument('--rows-per-day', type=int, default=40, help="Movimenti per giorno in ogni foglio")
+    parser.add_argument('--repeats', type=int, default=3, help="Ripetizioni (si tiene la migliore)")
+    args = parser.parse_args()
+
+    sys.exit(0 if run_benchmark(args.rows_per_day, args.repeats) else 1)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Benchmark del salvataggio dei dati Excel in SQLite (SimpleDatabaseManager.save_excel_data):
+vecchio ciclo riga per riga (INSERT OR REPLACE con due sotto-select per ogni pagamento) contro
+executemany e totali dei fornitori ricalcolati con un solo INSERT ... SELECT ... GROUP BY,
+su 50.000 pagamenti a fornitori sintetici
+"""
+
+import argparse
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Aggiungi il percorso della directory corrente al path di Python
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from database.database_manager_simple import SimpleDatabaseManager
+
+
+def build_excel_data(payments: int, months: int, suppliers: int, rng: random.Random):
+    """Dati Excel sintetici nel formato di save_excel_data: pagamenti, vendite giornaliere e riepilogo"""
+    month_names = [f"{2024 + index // 12}-{index % 12 + 1:02d}" for index in range(months)]
+    excel_data = {'daily_sales': [], 'suppliers': [], 'monthly_breakdown': {}}
+    for month in month_names:
+        for day in range(1, 29):
+            excel_data['daily_sales'].append({'month': month, 'date': f"{month}-{day:02d}",
+                                              'amount': round(rng.uniform(300, 2500), 2)})
+        excel_data['monthly_breakdown'][month] = {'sales': rng.uniform(1e4, 5e4), 'expenses': rng.uniform(1e4, 4e4),
+                                                  'profit': 0, 'transactions': payments // months}
+    for index in range(payments):
+        month = month_names[index % months]
+        excel_data['suppliers'].append({
+            'month': month,
+            'date': f"{month}-{rng.randint(1, 28):02d}",
+            'amount': round(rng.uniform(20, 1500), 2),
+            'name': f"Proveedor {rng.randint(1, suppliers)}",
+            'invoice': index
+        })
+    return excel_data
+
+
+def legacy_save_excel_data(db_path: str, excel_data):
+    """Il vecchio save_excel_data: cancella tutto e riscrive riga per riga"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM excel_data")
+    cursor.execute("DELETE FROM monthly_summary")
+    cursor.execute("DELETE FROM suppliers")
+    for sale in excel_data.get('daily_sales', []):
+        cursor.execute("""
+            INSERT INTO excel_data (month, date, sales_amount, transaction_type)
+            VALUES (?, ?, ?, 'daily_sale')
+        """, (str(sale.get('month', '')), str(sale.get('date', '')), float(sale.get('amount', 0))))
+    for supplier in excel_data.get('suppliers', []):
+        cursor.execute("""
+            INSERT INTO excel_data (month, date, expense_amount, supplier_name, invoice_number, transaction_type)
+            VALUES (?, ?, ?, ?, ?, 'supplier_payment')
+        """, (str(supplier.get('month', '')), str(supplier.get('date', '')), float(supplier.get('amount', 0)),
+              str(supplier.get('name', '')), str(supplier.get('invoice', ''))))
+        cursor.execute("""
+            INSERT OR REPLACE INTO suppliers (name, total_amount, transactions_count)
+            VALUES (?, COALESCE((SELECT total_amount FROM suppliers WHERE name = ?), 0) + ?,
+                    COALESCE((SELECT transactions_count FROM suppliers WHERE name = ?), 0) + 1)
+        """, (str(supplier.get('name', '')), str(supplier.get('name', '')), float(supplier.get('amount', 0)),
+              str(supplier.get('name', ''))))
+    for month, data in excel_data.get('monthly_breakdown', {}).items():
+        cursor.execute("""
+            INSERT OR REPLACE INTO monthly_summary (month, total_sales, total_expenses, total_profit, transactions_count)
+            VALUES (?, ?, ?, ?, ?)
+        """, (str(month), float(data.get('sales', 0)), float(data.get('expenses', 0)),
+              float(data.get('profit', 0)), int(data.get('transactions', 0))))
+    conn.commit()
+    conn.close()
+
+
+def supplier_totals(db_path: str):
+    """Totali dei fornitori salvati (arrotondati al centesimo)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return sorted(conn.execute("SELECT name, ROUND(total_amount, 2), transactions_count FROM suppliers").fetchall())
+    finally:
+        conn.close()
+
+
+def rollup_times(db_path: str, excel_data):
+    """Solo i totali dei fornitori sulle righe già salvate: upsert per pagamento contro un GROUP BY"""
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            conn.execute("DELETE FROM suppliers")
+            started = time.perf_counter()
+            for supplier in excel_data['suppliers']:
+                conn.execute("""
+                    INSERT OR REPLACE INTO suppliers (name, total_amount, transactions_count)
+                    VALUES (?, COALESCE((SELECT total_amount FROM suppliers WHERE name = ?), 0) + ?,
+                            COALESCE((SELECT transactions_count FROM suppliers WHERE name = ?), 0) + 1)
+                """, (supplier['name'], supplier['name'], float(supplier['amount']), supplier['name']))
+            per_payment_time = time.perf_counter() - started
+            per_payment = sorted(conn.execute("SELECT name, ROUND(total_amount, 2), transactions_count FROM suppliers"))
+        
+        with conn:
+            conn.execute("DELETE FROM suppliers")
+            started = time.perf_counter()
+            conn.execute("""
+                INSERT INTO suppliers (name, total_amount, transactions_count)
+                SELECT supplier_name, SUM(expense_amount), COUNT(*)
+                FROM excel_data
+                WHERE transaction_type = 'supplier_payment'
+                GROUP BY supplier_name
+            """)
+            group_by_time = time.perf_counter() - started
+            group_by = sorted(conn.execute("SELECT name, ROUND(total_amount, 2), transactions_count FROM suppliers"))
+    finally:
+        conn.close()
+    return per_payment_time, group_by_time, per_payment == group_by
+
+
+def run_benchmark(payments: int, months: int, suppliers: int):
+    """Salva gli stessi dati con il vecchio ciclo e con save_excel_data e confronta i fornitori"""
+    excel_data = build_excel_data(payments, months, suppliers, random.Random(42))
+    print(f"🏗️ Dati sintetici: {payments:,} pagamenti a {suppliers} fornitori in {months} mesi")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        legacy_path = str(Path(tmp_dir) / 'legacy.db')
+        SimpleDatabaseManager(legacy_path)
+        started = time.perf_counter()
+        legacy_save_excel_data(legacy_path, excel_data)
+        legacy_time = time.perf_counter() - started
+        
+        set_based_path = str(Path(tmp_dir) / 'set_based.db')
+        manager = SimpleDatabaseManager(set_based_path)
+        started = time.perf_counter()
+        saved = manager.save_excel_data(excel_data)
+        set_based_time = time.perf_counter() - started
+        
+        # Ricaricamento con un solo mese modificato (import incrementale)
+        changed_month = excel_data['suppliers'][-1]['month']
+        excel_data['suppliers'][-1]['amount'] += 1
+        legacy_save_excel_data(legacy_path, excel_data)
+        started = time.perf_counter()
+        saved = manager.save_excel_data(excel_data) and saved
+        reimport_time = time.perf_counter() - started
+        
+        identical = saved and supplier_totals(legacy_path) == supplier_totals(set_based_path)
+        per_payment_time, group_by_time, same_rollup = rollup_times(set_based_path, excel_data)
+        identical = identical and same_rollup
+    
+    print(f"   🐢 Riga per riga: {legacy_time:.3f}s")
+    print(f"   ⚡ save_excel_data (executemany, GROUP BY e impronte dei mesi): {set_based_time:.3f}s "
+          f"({legacy_time / set_based_time:.1f}x)")
+    print(f"   🚚 Solo totali fornitori: {per_payment_time:.3f}s riga per riga, {group_by_time:.3f}s con GROUP BY "
+          f"({per_payment_time / group_by_time:.1f}x)")
+    print(f"   🔁 Ricaricamento con solo {changed_month} modificato: {reimport_time:.3f}s")
+    print(f"   {'✅' if identical else '❌'} Totali dei fornitori identici: {identical}")
+    return identical
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del salvataggio dei dati Excel in SQLite")
+    parser.add_argument('--payments', type=int, default=50000, help="Pagamenti a fornitori da salvare")
+    parser.add_argument('--months', type=int, default=12, help="Mesi (fogli) su cui distribuire i pagamenti")
+    parser.add_argument('--suppliers', type=int, default=200, help="Fornitori distinti")
+    args = parser.parse_args()
+    
+    sys.exit(0 if run_benchmark(args.payments, args.months, args.suppliers) else 1)
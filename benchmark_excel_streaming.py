@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark della lettura Excel in streaming: picco di memoria (tracemalloc) della tabella delle
+transazioni costruita con i fogli interi (openpyxl read-only) e a blocchi di righe
+(iter_workbook_chunks) sullo stesso libro sintetico, con controllo che le tabelle coincidano
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+# Aggiungi il percorso della directory corrente al path di Python
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from benchmark_excel_parser import SHEETS, build_sheet
+from components.transactions_table import build_transactions_table
+
+
+def measure(build):
+    """Esegue build e restituisce (risultato, secondi, picco di memoria in MB)"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = build()
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+
+def run_benchmark(rows_per_day: int, chunk_rows: int):
+    """Scrive il libro sintetico e confronta la lettura a fogli interi con quella a blocchi"""
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / 'benchmark_carniceria.xlsx'
+        print(f"🏗️ Generando libro sintetico: {len(SHEETS)} fogli x {rows_per_day * 28:,} movimenti...")
+        with pd.ExcelWriter(path) as writer:
+            for sheet_name, first_day in SHEETS.items():
+                build_sheet(first_day, rows_per_day, rng).to_excel(writer, sheet_name=sheet_name, header=False, index=False)
+        
+        full_table, full_time, full_peak = measure(lambda: build_transactions_table(path, read_only=True, workers=1))
+        stream_table, stream_time, stream_peak = measure(lambda: build_transactions_table(path, chunk_rows=chunk_rows))
+    
+    identical = full_table.equals(stream_table)
+    print(f"   🐢 Fogli interi:          {full_time:.3f}s, picco {full_peak:.1f} MB")
+    print(f"   ⚡ Blocchi di {chunk_rows:,} righe: {stream_time:.3f}s, picco {stream_peak:.1f} MB "
+          f"({full_peak / stream_peak:.1f}x meno memoria)")
+    print(f"   {'✅' if identical else '❌'} Tabelle identiche ({len(full_table):,} righe): {identical}")
+    return identical
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark della lettura Excel in streaming a blocchi di righe")
+    parser.add_argument('--rows-per-day', type=int, default=100, help="Movimenti per giorno in ogni foglio")
+    parser.add_argument('--chunk-rows', type=int, default=500, help="Righe per blocco nella lettura in streaming")
+    args = parser.parse_args()
+    
+    sys.exit(0 if run_benchmark(args.rows_per_day, args.chunk_rows) else 1)
@@ -76,15 +76,21 @@ class AccountingUI:
                 year_start = date.today().replace(month=1, day=1)
                 selected_date = st.date_input("Data inizio anno", value=year_start)
         
-        # Recupera statistiche
+        # Recupera statistiche (e dati dei grafici) in parallelo
         if period == "Oggi":
-            stats = self._get_daily_stats(selected_date)
+            fetches = {'stats': (self._get_daily_stats, selected_date)}
         elif period == "Settimana":
-            stats = self._get_weekly_stats(selected_date)
+            fetches = {'stats': (self._get_weekly_stats, selected_date)}
         elif period == "Mese":
-            stats = self._get_monthly_stats(selected_date.year, selected_date.month)
+            fetches = {'stats': (self._get_monthly_stats, selected_date.year, selected_date.month)}
         else:  # Anno
-            stats = self._get_yearly_stats(selected_date.year)
+            fetches = {'stats': (self._get_yearly_stats, selected_date.year)}
+        
+        if period == "Settimana" or period == "Mese":
+            fetches['chart_reports'] = (self._get_period_reports, period, selected_date)
+        
+        results = self.db.fetch_many(fetches, defaults={'stats': {}, 'chart_reports': []})
+        stats = results['stats']
         
         # Mostra metriche
         if stats:
@@ -121,7 +127,7 @@ class AccountingUI:
         
         # Grafici
         if period == "Settimana" or period == "Mese":
-            self._render_period_charts(period, selected_date)
+            self._render_period_charts(period, results['chart_reports'])
     
     def _render_income_management(self):
         """Renderizza la gestione entrate"""
@@ -177,7 +183,7 @@ class AccountingUI:
                 
                 with col5:
                     if st.button("🗑️", key=f"delete_income_{income['id']}", help="Elimina entrata"):
-                        if self.db.supabase_manager.delete_daily_entry('income', str(income['id'])):
+                        if self.db.delete_daily_entry('income', str(income['id'])):
                             st.success("✅ Entrata eliminata")
                             st.rerun()
                         else:
@@ -245,7 +251,7 @@ class AccountingUI:
                 
                 with col6:
                     if st.button("🗑️", key=f"delete_expense_{expense['id']}", help="Elimina uscita"):
-                        if self.db.supabase_manager.delete_daily_entry('expense', str(expense['id'])):
+                        if self.db.delete_daily_entry('expense', str(expense['id'])):
                             st.success("✅ Uscita eliminata")
                             st.rerun()
                         else:
@@ -314,15 +320,10 @@ class AccountingUI:
     def _add_income(self, date_val, amount, category, description, payment_method) -> tuple:
         """Aggiunge una nuova entrata"""
         try:
-            income_data = {
-                'date': date_val.isoformat(),
-                'amount': float(amount),
-                'category': category,
-                'description': description,
-                'payment_method': payment_method
-            }
-            
-            result = self.db.supabase_manager.insert('daily_income', income_data)
+            # Scrittura tramite il manager ibrido: invalida cache dei report e snapshot della dashboard
+            result = self.db.add_daily_income(
+                float(amount), category, description, payment_method, date_val.isoformat()
+            )
             
             if result:
                 return True, f"✅ Entrata di ${amount:,.2f} aggiunta con successo!"
@@ -335,16 +336,10 @@ class AccountingUI:
     def _add_expense(self, date_val, amount, category, description, supplier, payment_method) -> tuple:
         """Aggiunge una nuova uscita"""
         try:
-            expense_data = {
-                'date': date_val.isoformat(),
-                'amount': float(amount),
-                'category': category,
-                'description': description,
-                'supplier': supplier,
-                'payment_method': payment_method
-            }
-            
-            result = self.db.supabase_manager.insert('daily_expenses', expense_data)
+            # Scrittura tramite il manager ibrido: invalida cache dei report e snapshot della dashboard
+            result = self.db.add_daily_expense(
+                float(amount), category, description, supplier, payment_method, date_val.isoformat()
+            )
             
             if result:
                 return True, f"✅ Uscita di ${amount:,.2f} aggiunta con successo!"
@@ -442,6 +437,16 @@ class AccountingUI:
     def _get_monthly_stats(self, year, month) -> Dict:
         """Recupera statistiche mensili"""
         try:
+            # Rollup mensile già calcolato (una riga)
+            monthly_reports = self.db.get_monthly_reports(year, month)
+            if monthly_reports:
+                report = monthly_reports[0]
+                return {
+                    'total_income': float(report['total_income']),
+                    'total_expenses': float(report['total_expenses']),
+                    'total_transactions': int(report['transactions_count'])
+                }
+            
             start_date = f"{year}-{month:02d}-01"
             if month == 12:
                 end_date = f"{year + 1}-01-01"
@@ -472,6 +477,15 @@ class AccountingUI:
     def _get_yearly_stats(self, year) -> Dict:
         """Recupera statistiche annuali"""
         try:
+            # Rollup annuale già calcolato (una riga)
+            yearly_report = self.db.get_yearly_report(year)
+            if yearly_report:
+                return {
+                    'total_income': float(yearly_report['total_income']),
+                    'total_expenses': float(yearly_report['total_expenses']),
+                    'total_transactions': int(yearly_report['transactions_count'])
+                }
+            
             start_date = f"{year}-01-01"
             end_date = f"{year + 1}-01-01"
             
@@ -496,31 +510,34 @@ class AccountingUI:
         except:
             return {}
     
-    def _render_period_charts(self, period, selected_date):
+    def _get_period_reports(self, period, selected_date) -> List[Dict]:
+        """Recupera i report giornalieri per i grafici del periodo"""
+        if period == "Settimana":
+            end_date = selected_date + timedelta(days=7)
+            return self.db.supabase_manager.select(
+                'daily_reports',
+                filters={'date__gte': selected_date.isoformat(), 'date__lte': end_date.isoformat()},
+                order_by='date'
+            )
+        
+        # Mese
+        start_date = selected_date.replace(day=1)
+        if start_date.month == 12:
+            end_date = start_date.replace(year=start_date.year + 1, month=1)
+        else:
+            end_date = start_date.replace(month=start_date.month + 1)
+        
+        return self.db.supabase_manager.select(
+            'daily_reports',
+            filters={'date__gte': start_date.isoformat(), 'date__lt': end_date.isoformat()},
+            order_by='date'
+        )
+    
+    def _render_period_charts(self, period, reports):
         """Renderizza grafici per il periodo"""
         st.subheader("📊 Grafici Periodo")
         
         try:
-            if period == "Settimana":
-                end_date = selected_date + timedelta(days=7)
-                reports = self.db.supabase_manager.select(
-                    'daily_reports',
-                    filters={'date__gte': selected_date.isoformat(), 'date__lte': end_date.isoformat()},
-                    order_by='date'
-                )
-            else:  # Mese
-                start_date = selected_date.replace(day=1)
-                if start_date.month == 12:
-                    end_date = start_date.replace(year=start_date.year + 1, month=1)
-                else:
-                    end_date = start_date.replace(month=start_date.month + 1)
-                
-                reports = self.db.supabase_manager.select(
-                    'daily_reports',
-                    filters={'date__gte': start_date.isoformat(), 'date__lt': end_date.isoformat()},
-                    order_by='date'
-                )
-            
             if reports:
                 df = pd.DataFrame(reports)
                 df['date'] = pd.to_datetime(df['date'])
@@ -9,12 +9,18 @@ Creado por Ezio Camporeale
 import pandas as pd
 import numpy as np
 from datetime import datetime, date, timedelta
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, Optional, Tuple, Any
 import logging
 import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
 
+from components.excel_sheet_parser import DAILY_TOTAL_KIND
+from components.transactions_table import (
+    calculate_trends, date_range, determine_trend, get_transactions_table, sheet_summary, split_by_sheet,
+    supplier_totals, to_records
+)
+
 # Configurar logging
 logger = logging.getLogger(__name__)
 
@@ -27,23 +33,29 @@ class CarniceriaAnalyzer:
         self.monthly_data = {}
         self.daily_data = {}
         self.suppliers_data = {}
+        self.transactions = None
         
-    def load_carniceria_data(self, file_path: str) -> bool:
+    def load_carniceria_data(self, file_path: str, read_only: bool = False, workers: Optional[int] = None,
+                             chunk_rows: Optional[int] = None) -> bool:
         """
         Carga los datos específicos del Excel de la carnicería
         
         Args:
             file_path: Ruta del archivo Excel
+            read_only: Lectura en streaming con openpyxl (archivos grandes)
+            workers: Procesos para leer y procesar las hojas (None = automático, 1 = en serie)
+            chunk_rows: Filas por bloque para leer en streaming con memoria acotada (None = hojas completas)
             
         Returns:
             bool: True si se cargó correctamente
         """
         try:
-            # Cargar el Excel con todas las hojas
-            self.raw_data = pd.read_excel(file_path, sheet_name=None)
+            # Tabla de transacciones compartida: una sola lectura por archivo (hojas en paralelo)
+            self.transactions = get_transactions_table(file_path, read_only=read_only, workers=workers, chunk_rows=chunk_rows)
+            self.raw_data = split_by_sheet(self.transactions)
             
-            # Procesar cada hoja según su estructura
-            self._process_carniceria_sheets()
+            for sheet_name, totals in sheet_summary(self.transactions).iterrows():
+                self.monthly_data[sheet_name] = self._process_monthly_sheet(sheet_name, self.raw_data[sheet_name], totals)
             
             logger.info(f"✅ Datos de carnicería cargados: {len(self.raw_data)} hojas")
             return True
@@ -52,42 +64,47 @@ class CarniceriaAnalyzer:
             logger.error(f"❌ Error cargando datos de carnicería: {e}")
             return False
     
-    def _process_carniceria_sheets(self):
-        """Procesa las hojas específicas del Excel de carnicería"""
+    def _process_monthly_sheet(self, sheet_name: str, rows: pd.DataFrame, totals: pd.Series) -> Dict:
+        """Procesa una hoja mensual a partir de sus filas de la tabla y de sus totales"""
         try:
-            for sheet_name, sheet_data in self.raw_data.items():
-                logger.info(f"📊 Procesando hoja de carnicería: {sheet_name}")
-                
-                # Procesar según el tipo de hoja
-                if 'noviembre' in sheet_name.lower() or 'diciembre' in sheet_name.lower():
-                    processed = self._process_monthly_sheet(sheet_name, sheet_data)
-                elif 'resumen' in sheet_name.lower() or 'total' in sheet_name.lower():
-                    processed = self._process_summary_sheet(sheet_name, sheet_data)
-                else:
-                    processed = self._process_general_sheet(sheet_name, sheet_data)
-                
-                if processed:
-                    self.monthly_data[sheet_name] = processed
-                    
-        except Exception as e:
-            logger.error(f"❌ Error procesando hojas de carnicería: {e}")
-    
-    def _process_monthly_sheet(self, sheet_name: str, data: pd.DataFrame) -> Dict:
-        """Procesa una hoja mensual específica"""
-        try:
-            # Limpiar datos
-            cleaned_data = self._clean_carniceria_data(data)
+            daily_sales = to_records(rows[rows['kind'] == DAILY_TOTAL_KIND], {'date': 'date', 'total': 'amount'})
+            for daily_sale in daily_sales:
+                daily_sale['type'] = 'daily_total'
+            
+            purchases = rows[(rows['kind'] == 'compra') & rows['supplier'].notna()]
+            supplier_payments = to_records(
+                purchases, {'supplier': 'supplier_name', 'total': 'amount', 'date': 'date', 'invoice': 'invoice_number'}
+            )
+            
+            sales = float(totals['sales'])
+            expenses = float(totals['expenses'])
+            profit = sales - expenses
             
-            # Extraer información específica
             monthly_info = {
                 'month': sheet_name,
-                'total_sales': self._extract_total_sales(cleaned_data),
-                'daily_sales': self._extract_daily_sales(cleaned_data),
-                'supplier_payments': self._extract_supplier_payments(cleaned_data),
-                'expenses': self._extract_expenses(cleaned_data),
-                'profit_analysis': self._calculate_profit_analysis(cleaned_data),
-                'transactions_count': len(cleaned_data),
-                'date_range': self._get_monthly_date_range(cleaned_data)
+                'total_sales': {
+                    'total_amount': sales,
+                    'base_amount': float(totals['sales_base']),
+                    'igic_amount': float(totals['sales_igic']),
+                    'net_amount': float(totals['sales_base']),
+                    'transaction_count': int(totals['transactions'])
+                },
+                'daily_sales': daily_sales,
+                'supplier_payments': supplier_payments,
+                'expenses': {
+                    'total_expenses': expenses,
+                    'supplier_payments': float(totals['purchases']),
+                    'operational_expenses': float(totals['operating_expenses']),
+                    'other_expenses': float(totals['payroll'])
+                },
+                'profit_analysis': {
+                    'gross_profit': profit,
+                    'profit_margin': (profit / sales) * 100 if sales > 0 else 0,
+                    'expense_ratio': (expenses / sales) * 100 if sales > 0 else 0,
+                    'net_profit': profit
+                },
+                'transactions_count': int(totals['transactions']),
+                'date_range': date_range(totals['start'], totals['end'])
             }
             
             return monthly_info
@@ -96,245 +113,6 @@ class CarniceriaAnalyzer:
             logger.error(f"❌ Error procesando hoja mensual {sheet_name}: {e}")
             return {}
     
-    def _clean_carniceria_data(self, data: pd.DataFrame) -> pd.DataFrame:
-        """Limpia los datos específicos de la carnicería"""
-        try:
-            # Remover filas completamente vacías
-            cleaned = data.dropna(how='all')
-            
-            # Remover columnas completamente vacías
-            cleaned = cleaned.dropna(axis=1, how='all')
-            
-            # Convertir tipos de datos específicos
-            cleaned = self._convert_carniceria_types(cleaned)
-            
-            return cleaned
-            
-        except Exception as e:
-            logger.error(f"❌ Error limpiando datos de carnicería: {e}")
-            return data
-    
-    def _convert_carniceria_types(self, data: pd.DataFrame) -> pd.DataFrame:
-        """Convierte tipos de datos específicos de la carnicería"""
-        try:
-            # Identificar columnas de fechas
-            date_columns = []
-            for col in data.columns:
-                if any(keyword in col.lower() for keyword in ['fecha', 'date', 'venta']):
-                    date_columns.append(col)
-            
-            # Convertir fechas
-            for col in date_columns:
-                try:
-                    data[col] = pd.to_datetime(data[col], errors='coerce')
-                except:
-                    pass
-            
-            # Identificar columnas monetarias
-            money_columns = []
-            for col in data.columns:
-                if any(keyword in col.lower() for keyword in ['base', 'igic', 'cobro', 'pago', 'total', 'beneficio']):
-                    money_columns.append(col)
-            
-            # Convertir a numérico
-            for col in money_columns:
-                try:
-                    data[col] = pd.to_numeric(data[col], errors='coerce')
-                except:
-                    pass
-            
-            return data
-            
-        except Exception as e:
-            logger.error(f"❌ Error convirtiendo tipos de carnicería: {e}")
-            return data
-    
-    def _extract_total_sales(self, data: pd.DataFrame) -> Dict:
-        """Extrae el total de ventas de los datos"""
-        try:
-            sales_info = {
-                'total_amount': 0,
-                'base_amount': 0,
-                'igic_amount': 0,
-                'net_amount': 0,
-                'transaction_count': 0
-            }
-            
-            # Buscar columnas de ventas
-            sales_columns = []
-            for col in data.columns:
-                if any(keyword in col.lower() for keyword in ['base', 'igic', 'cobro', 'total']):
-                    sales_columns.append(col)
-            
-            if sales_columns:
-                # Calcular totales
-                for col in sales_columns:
-                    try:
-                        values = pd.to_numeric(data[col], errors='coerce')
-                        sales_info['total_amount'] += values.sum()
-                        
-                        if 'base' in col.lower():
-                            sales_info['base_amount'] += values.sum()
-                        elif 'igic' in col.lower():
-                            sales_info['igic_amount'] += values.sum()
-                        elif 'total' in col.lower():
-                            sales_info['net_amount'] += values.sum()
-                            
-                    except:
-                        pass
-                
-                # Contar transacciones
-                sales_info['transaction_count'] = len(data)
-            
-            return sales_info
-            
-        except Exception as e:
-            logger.error(f"❌ Error extrayendo total de ventas: {e}")
-            return {}
-    
-    def _extract_daily_sales(self, data: pd.DataFrame) -> List[Dict]:
-        """Extrae las ventas diarias"""
-        try:
-            daily_sales = []
-            
-            # Buscar filas con ventas diarias
-            for index, row in data.iterrows():
-                try:
-                    # Verificar si es una venta diaria - buscar en la columna Nombre
-                    if pd.notna(row.iloc[0]) and len(row) > 9:
-                        nombre_value = str(row.iloc[9]) if pd.notna(row.iloc[9]) else ""
-                        
-                        if 'TOTAL DIA' in nombre_value:
-                            daily_sale = {
-                                'date': row.iloc[1] if len(row) > 1 else None,
-                                'amount': row.iloc[2] if len(row) > 2 else 0,
-                                'type': 'daily_total'
-                            }
-                            daily_sales.append(daily_sale)
-                            
-                except Exception as row_error:
-                    continue
-            
-            return daily_sales
-            
-        except Exception as e:
-            logger.error(f"❌ Error extrayendo ventas diarias: {e}")
-            return []
-    
-    def _extract_supplier_payments(self, data: pd.DataFrame) -> List[Dict]:
-        """Extrae los pagos a proveedores"""
-        try:
-            supplier_payments = []
-            
-            # Buscar filas con pagos a proveedores
-            for index, row in data.iterrows():
-                try:
-                    # Verificar si es un pago a proveedor - buscar en la columna Nombre
-                    if pd.notna(row.iloc[0]) and len(row) > 9:
-                        nombre_value = str(row.iloc[9]) if pd.notna(row.iloc[9]) else ""
-                        
-                        # Si no es "TOTAL DIA" y tiene un nombre de proveedor
-                        if 'TOTAL DIA' not in nombre_value and nombre_value.strip() != "":
-                            supplier_payment = {
-                                'supplier_name': nombre_value,
-                                'amount': row.iloc[2] if len(row) > 2 and pd.notna(row.iloc[2]) else 0,
-                                'date': row.iloc[1] if len(row) > 1 and pd.notna(row.iloc[1]) else None,
-                                'invoice_number': row.iloc[0] if len(row) > 0 and pd.notna(row.iloc[0]) else None
-                            }
-                            supplier_payments.append(supplier_payment)
-                            
-                except Exception as row_error:
-                    continue
-            
-            return supplier_payments
-            
-        except Exception as e:
-            logger.error(f"❌ Error extrayendo pagos a proveedores: {e}")
-            return []
-    
-    def _extract_expenses(self, data: pd.DataFrame) -> Dict:
-        """Extrae los gastos"""
-        try:
-            expenses_info = {
-                'total_expenses': 0,
-                'supplier_payments': 0,
-                'operational_expenses': 0,
-                'other_expenses': 0
-            }
-            
-            # Calcular gastos totales
-            supplier_payments = self._extract_supplier_payments(data)
-            for payment in supplier_payments:
-                expenses_info['supplier_payments'] += payment['amount']
-            
-            expenses_info['total_expenses'] = expenses_info['supplier_payments']
-            
-            return expenses_info
-            
-        except Exception as e:
-            logger.error(f"❌ Error extrayendo gastos: {e}")
-            return {}
-    
-    def _calculate_profit_analysis(self, data: pd.DataFrame) -> Dict:
-        """Calcula el análisis de ganancias"""
-        try:
-            sales_info = self._extract_total_sales(data)
-            expenses_info = self._extract_expenses(data)
-            
-            profit_analysis = {
-                'gross_profit': sales_info['total_amount'] - expenses_info['total_expenses'],
-                'profit_margin': 0,
-                'expense_ratio': 0,
-                'net_profit': 0
-            }
-            
-            # Calcular márgenes
-            if sales_info['total_amount'] > 0:
-                profit_analysis['profit_margin'] = (profit_analysis['gross_profit'] / sales_info['total_amount']) * 100
-                profit_analysis['expense_ratio'] = (expenses_info['total_expenses'] / sales_info['total_amount']) * 100
-            
-            profit_analysis['net_profit'] = profit_analysis['gross_profit']
-            
-            return profit_analysis
-            
-        except Exception as e:
-            logger.error(f"❌ Error calculando análisis de ganancias: {e}")
-            return {}
-    
-    def _get_monthly_date_range(self, data: pd.DataFrame) -> Dict:
-        """Obtiene el rango de fechas del mes"""
-        try:
-            date_columns = []
-            for col in data.columns:
-                if 'fecha' in col.lower() or 'date' in col.lower():
-                    date_columns.append(col)
-            
-            if not date_columns:
-                return {'start': None, 'end': None, 'days': 0}
-            
-            # Encontrar fechas válidas
-            valid_dates = []
-            for col in date_columns:
-                dates = pd.to_datetime(data[col], errors='coerce')
-                valid_dates.extend(dates.dropna().tolist())
-            
-            if not valid_dates:
-                return {'start': None, 'end': None, 'days': 0}
-            
-            start_date = min(valid_dates)
-            end_date = max(valid_dates)
-            days = (end_date - start_date).days
-            
-            return {
-                'start': start_date.strftime('%Y-%m-%d'),
-                'end': end_date.strftime('%Y-%m-%d'),
-                'days': days
-            }
-            
-        except Exception as e:
-            logger.error(f"❌ Error obteniendo rango de fechas mensual: {e}")
-            return {'start': None, 'end': None, 'days': 0}
-    
     def get_comprehensive_analysis(self) -> Dict:
         """Obtiene un análisis completo de todos los datos"""
         try:
@@ -404,65 +182,7 @@ class CarniceriaAnalyzer:
     
     def _calculate_trends(self) -> Dict:
         """Calcula las tendencias de los datos"""
-        try:
-            trends = {
-                'sales_trend': 'stable',
-                'expense_trend': 'stable',
-                'profit_trend': 'stable',
-                'growth_rate': 0
-            }
-            
-            if len(self.monthly_data) < 2:
-                return trends
-            
-            # Obtener datos para análisis de tendencias
-            monthly_breakdown = self._get_monthly_breakdown()
-            
-            sales_values = []
-            expense_values = []
-            profit_values = []
-            
-            for month_data in monthly_breakdown.values():
-                sales_values.append(month_data['sales'])
-                expense_values.append(month_data['expenses'])
-                profit_values.append(month_data['profit'])
-            
-            # Calcular tendencias
-            if len(sales_values) > 1:
-                trends['sales_trend'] = self._determine_trend(sales_values)
-                trends['expense_trend'] = self._determine_trend(expense_values)
-                trends['profit_trend'] = self._determine_trend(profit_values)
-                
-                # Calcular tasa de crecimiento
-                if sales_values[0] > 0:
-                    trends['growth_rate'] = ((sales_values[-1] - sales_values[0]) / sales_values[0]) * 100
-            
-            return trends
-            
-        except Exception as e:
-            logger.error(f"❌ Error calculando tendencias: {e}")
-            return {}
-    
-    def _determine_trend(self, values: List[float]) -> str:
-        """Determina la tendencia de una serie de valores"""
-        try:
-            if len(values) < 2:
-                return 'stable'
-            
-            # Calcular pendiente
-            x = np.arange(len(values))
-            slope = np.polyfit(x, values, 1)[0]
-            
-            if slope > 0.1:
-                return 'increasing'
-            elif slope < -0.1:
-                return 'decreasing'
-            else:
-                return 'stable'
-                
-        except Exception as e:
-            logger.error(f"❌ Error determinando tendencia: {e}")
-            return 'stable'
+        return calculate_trends(self._get_monthly_breakdown())
     
     def _analyze_suppliers(self) -> Dict:
         """Analiza los proveedores"""
@@ -474,33 +194,19 @@ class CarniceriaAnalyzer:
                 'average_payment': 0
             }
             
-            supplier_totals = {}
-            total_payments = 0
+            if self.transactions is None:
+                return suppliers_analysis
             
-            # Analizar pagos por proveedor
-            for month_data in self.monthly_data.values():
-                supplier_payments = month_data.get('supplier_payments', [])
-                
-                for payment in supplier_payments:
-                    supplier_name = payment.get('supplier_name', 'Desconocido')
-                    amount = payment.get('amount', 0)
-                    
-                    if supplier_name not in supplier_totals:
-                        supplier_totals[supplier_name] = 0
-                    
-                    supplier_totals[supplier_name] += amount
-                    total_payments += amount
-            
-            # Crear ranking de proveedores
-            suppliers_analysis['total_suppliers'] = len(supplier_totals)
-            suppliers_analysis['total_payments'] = total_payments
-            
-            if len(supplier_totals) > 0:
-                suppliers_analysis['average_payment'] = total_payments / len(supplier_totals)
+            # Pagos por proveedor con un group-by sobre la tabla
+            supplier_totals_series = supplier_totals(self.transactions)
+            suppliers_analysis['total_suppliers'] = len(supplier_totals_series)
+            suppliers_analysis['total_payments'] = float(supplier_totals_series.sum())
+            
+            if len(supplier_totals_series) > 0:
+                suppliers_analysis['average_payment'] = suppliers_analysis['total_payments'] / len(supplier_totals_series)
                 
                 # Top 5 proveedores
-                sorted_suppliers = sorted(supplier_totals.items(), key=lambda x: x[1], reverse=True)
-                suppliers_analysis['top_suppliers'] = sorted_suppliers[:5]
+                suppliers_analysis['top_suppliers'] = [(name, float(amount)) for name, amount in supplier_totals_series.head(5).items()]
             
             return suppliers_analysis
             
@@ -684,7 +390,7 @@ if __name__ == "__main__":
     
     # Test de tendencias
     test_values = [1000, 1200, 1100, 1300, 1400]
-    trend = analyzer._determine_trend(test_values)
+    trend = determine_trend(test_values)
     print(f"📈 Tendencia test: {trend}")
     
     print("✅ Test completado")
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Parser vettoriale dei fogli mensili "Gestion Carniceria El Tablero"
+Estrae transazioni e totali giornalieri con maschere per colonna al posto dei cicli df.iloc[i]
+Usato da SupabaseExcelMigrator, da excel_migration.ExcelMigrator e dalla tabella delle transazioni
+(sheet_transactions_frame) su cui lavorano gli analizzatori
+Creato da Ezio Camporeale
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Da incrementare a ogni modifica dell'estrazione: invalida la cache dei libri già analizzati
+PARSER_VERSION = 1
+
+# Colonne del foglio (vedi ExcelMigrator.process_sheet_data)
+ID_COLUMN = 0
+DATE_COLUMN = 2
+NAME_COLUMN = 9
+SHEET_WIDTH = 17
+DAILY_TOTAL_MARKER = 'TOTAL DEL DIA'
+
+# Colonna importo -> tipo, nell'ordine di priorità del foglio; venta e compra hanno anche IGIC e totale
+AMOUNT_COLUMNS = (
+    (3, 'venta'),
+    (6, 'compra'),
+    (11, 'nomina'),
+    (12, 'seguridad_social'),
+    (13, 'retencion'),
+    (14, 'vacaciones'),
+    (15, 'liquidacion'),
+    (16, 'gasto')
+)
+TAX_COLUMNS = {3: (4, 5), 6: (7, 8)}
+
+# Tabella colonnare delle transazioni (sheet_transactions_frame / components.transactions_table)
+DAILY_TOTAL_KIND = 'total_dia'
+TRANSACTION_TABLE_DTYPES = {
+    'sheet': 'object',
+    'date': 'datetime64[ns]',
+    'kind': 'object',
+    'base': 'float64',
+    'igic': 'float64',
+    'total': 'float64',
+    'supplier': 'object',
+    'invoice': 'float64'
+}
+
+
+def _to_float(value) -> float:
+    """float() del valore; NaN se la conversione fallisce (come l'eccezione del parser riga per riga)"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def numeric_column(column: pd.Series) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Restituisce (valori float, maschera notna, maschera conversione fallita) di una colonna"""
+    present = column.notna().to_numpy()
+    if pd.api.types.is_numeric_dtype(column.dtype) and not pd.api.types.is_bool_dtype(column.dtype):
+        values = column.to_numpy(dtype=float, na_value=np.nan)
+    else:
+        values = np.full(len(column), np.nan)
+        values[present] = [_to_float(value) for value in column.to_numpy(dtype=object)[present]]
+    return values, present, present & np.isnan(values)
+
+
+def parse_date_column(column: pd.Series) -> np.ndarray:
+    """Date 'YYYY-MM-DD' (o None) per colonna, con le stesse regole di parse_date"""
+    result = np.full(len(column), None, dtype=object)
+
+    if pd.api.types.is_datetime64_any_dtype(column.dtype):
+        present = column.notna().to_numpy()
+        result[present] = column[present].dt.strftime('%Y-%m-%d').to_numpy()
+        return result
+
+    values = column.to_numpy(dtype=object)
+    is_datetime = np.fromiter((isinstance(value, datetime) for value in values), dtype=bool, count=len(values))
+    is_string = np.fromiter((isinstance(value, str) for value in values), dtype=bool, count=len(values))
+    is_datetime = is_datetime & column.notna().to_numpy()
+
+    if is_datetime.any():
+        try:
+            result[is_datetime] = pd.to_datetime(pd.Series(values[is_datetime])).dt.strftime('%Y-%m-%d').to_numpy()
+        except (TypeError, ValueError):
+            # Fusi orari misti: conversione valore per valore
+            result[is_datetime] = [value.strftime('%Y-%m-%d') for value in values[is_datetime]]
+
+    if is_string.any():
+        # Ogni stringa distinta viene interpretata una sola volta
+        parsed = {}
+        for text in set(values[is_string]):
+            try:
+                parsed[text] = pd.to_datetime(text).strftime('%Y-%m-%d')
+            except Exception:
+                parsed[text] = None
+        result[is_string] = [parsed[text] for text in values[is_string]]
+
+    return result
+
+
+def _transaction_rows(column: pd.Series) -> np.ndarray:
+    """Righe di transazione: colonna 0 valorizzata con un numero"""
+    present = column.notna().to_numpy()
+    if pd.api.types.is_bool_dtype(column.dtype):
+        return np.zeros(len(column), dtype=bool)
+    if pd.api.types.is_numeric_dtype(column.dtype):
+        return present
+    values = column.to_numpy(dtype=object)
+    return present & np.fromiter((isinstance(value, (int, float)) for value in values), dtype=bool, count=len(values))
+
+
+def _parse_sheet(df: pd.DataFrame) -> Dict[str, Any]:
+    """Colonne calcolate del foglio (una voce per riga): tipo, importo, IGIC, totale, date, nomi e maschere"""
+    if df.shape[1] <= NAME_COLUMN:
+        raise IndexError(f"Il foglio ha solo {df.shape[1]} colonne")
+
+    df = df.reindex(columns=range(max(SHEET_WIDTH, df.shape[1])))
+    numeric = {column: numeric_column(df[column]) for column in range(3, SHEET_WIDTH) if column not in (9, 10)}
+    names = df[NAME_COLUMN]
+    names_present = names.notna().to_numpy()
+
+    # Transazioni: la prima colonna importo valorizzata decide tipo e importo
+    conditions = [numeric[column][1] for column, _ in AMOUNT_COLUMNS]
+    tipo = np.select(conditions, [label for _, label in AMOUNT_COLUMNS], default='gasto')
+    amount = np.select(conditions, [numeric[column][0] for column, _ in AMOUNT_COLUMNS], default=0.0)
+
+    invalid = []
+    for column, _ in AMOUNT_COLUMNS:
+        bad = numeric[column][2].copy()
+        for tax_column in TAX_COLUMNS.get(column, ()):
+            bad |= numeric[tax_column][2]
+        invalid.append(bad)
+    failed = np.select(conditions, invalid, default=False)
+
+    # IGIC e totale solo per vendite e acquisti (totale mancante = importo)
+    source = np.select(conditions, [column for column, _ in AMOUNT_COLUMNS], default=-1)
+    has_tax = np.isin(source, list(TAX_COLUMNS))
+    igic = np.zeros(len(df))
+    igic_present = np.zeros(len(df), dtype=bool)
+    total = amount.copy()
+    for column, (tax_column, total_column) in TAX_COLUMNS.items():
+        rows = source == column
+        tax_values, tax_present, _ = numeric[tax_column]
+        total_values, total_present, _ = numeric[total_column]
+        igic = np.where(rows & tax_present, tax_values, igic)
+        igic_present |= rows & tax_present
+        total = np.where(rows & total_present, total_values, total)
+
+    # Totali giornalieri: righe "TOTAL DEL DIA" nella colonna del nome operazione
+    is_total = names_present & names.astype(str).str.contains(DAILY_TOTAL_MARKER, regex=False).to_numpy(dtype=bool)
+    is_total = is_total & ~(numeric[3][2] | numeric[5][2])
+    
+    return {
+        'ids': numeric_column(df[ID_COLUMN])[0],
+        'is_transaction': _transaction_rows(df[ID_COLUMN]) & ~failed & (amount > 0),
+        'dates': parse_date_column(df[DATE_COLUMN]),
+        'tipo': tipo,
+        'amount': amount,
+        'has_tax': has_tax,
+        'igic': igic,
+        'igic_present': igic_present,
+        'total': total,
+        'names': names.astype(str).to_numpy(dtype=object),
+        'names_present': names_present,
+        'is_total': is_total,
+        'ventas': numeric[3][:2],
+        'cobros': numeric[5][:2]
+    }
+
+
+def extract_sheet_records(df: pd.DataFrame, month: str, include_id: bool = False) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Estrae (transazioni, totali giornalieri) da un foglio letto con header=None.
+    
+    Stesso risultato del vecchio ciclo con extract_transaction / extract_daily_total:
+    l'importo e il tipo vengono scelti con numpy.select sulle colonne 3-16 e le righe
+    con valori non convertibili o importo <= 0 vengono scartate.
+    """
+    if len(df) == 0:
+        return [], []
+    
+    parsed = _parse_sheet(df)
+    ids, dates, names = parsed['ids'], parsed['dates'], parsed['names']
+    is_transaction = parsed['is_transaction']
+    if include_id:
+        is_transaction = is_transaction & np.isfinite(ids)
+    
+    transactions = []
+    for index in np.flatnonzero(is_transaction):
+        transaction = {'id': int(ids[index])} if include_id else {}
+        transaction.update({
+            'fecha': dates[index],
+            'tipo': str(parsed['tipo'][index]),
+            'importo': float(parsed['amount'][index]),
+            'descripcion': names[index] if parsed['names_present'][index] else '',
+            'month': month
+        })
+        if parsed['has_tax'][index]:
+            transaction['igic'] = float(parsed['igic'][index]) if parsed['igic_present'][index] else 0
+            transaction['total'] = float(parsed['total'][index])
+        transactions.append(transaction)
+
+    (ventas, ventas_present), (cobros, cobros_present) = parsed['ventas'], parsed['cobros']
+    daily_totals = [
+        {
+            'fecha': dates[index],
+            'ventas': float(ventas[index]) if ventas_present[index] else 0,
+            'cobros': float(cobros[index]) if cobros_present[index] else 0,
+            'month': month
+        }
+        for index in np.flatnonzero(parsed['is_total'])
+    ]
+
+    return transactions, daily_totals
+
+
+def sheet_transactions_frame(df: pd.DataFrame, sheet: str) -> pd.DataFrame:
+    """Transazioni e totali giornalieri del foglio come tabella colonnare (vedi TRANSACTION_TABLE_COLUMNS).
+    
+    Stesse righe di extract_sheet_records: base = importo, igic e total come nel dizionario della
+    transazione (0 e importo per i tipi senza imposte), supplier = nome per gli acquisti; i totali
+    giornalieri hanno kind 'total_dia', base = ventas e total = cobros.
+    """
+    if len(df) == 0:
+        return empty_transactions_frame()
+    
+    parsed = _parse_sheet(df)
+    transactions = np.flatnonzero(parsed['is_transaction'])
+    daily_totals = np.flatnonzero(parsed['is_total'])
+    rows = np.concatenate([transactions, daily_totals])
+    is_daily = np.concatenate([np.zeros(len(transactions), dtype=bool), np.ones(len(daily_totals), dtype=bool)])
+    
+    (ventas, ventas_present), (cobros, cobros_present) = parsed['ventas'], parsed['cobros']
+    tipo = parsed['tipo'][rows].astype(object)
+    is_purchase = ~is_daily & (tipo == 'compra') & parsed['names_present'][rows]
+    frame = pd.DataFrame({
+        'sheet': sheet,
+        'date': pd.to_datetime(pd.Series(parsed['dates'][rows], dtype=object), format='%Y-%m-%d', errors='coerce'),
+        'kind': np.where(is_daily, DAILY_TOTAL_KIND, tipo),
+        'base': np.where(is_daily, np.where(ventas_present[rows], ventas[rows], 0.0), parsed['amount'][rows]),
+        'igic': np.where(is_daily | ~parsed['igic_present'][rows], 0.0, parsed['igic'][rows]),
+        'total': np.where(is_daily, np.where(cobros_present[rows], cobros[rows], 0.0), parsed['total'][rows]),
+        'supplier': np.where(is_purchase, parsed['names'][rows], None),
+        'invoice': np.where(is_daily, np.nan, parsed['ids'][rows])
+    })
+    # Ordine del foglio, con ogni totale giornaliero dopo i suoi movimenti
+    return frame.iloc[np.argsort(rows, kind='stable')].reset_index(drop=True).astype(TRANSACTION_TABLE_DTYPES)
+
+
+def empty_transactions_frame() -> pd.DataFrame:
+    """Tabella delle transazioni senza righe, con le colonne e i tipi canonici"""
+    return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in TRANSACTION_TABLE_DTYPES.items()})
@@ -1,26 +1,62 @@
 #!/usr/bin/env python3
 """
 Migratore Excel per Supabase
-Migra i dati dal file Excel "Gestion Carniceria El Tablero.xlsx" direttamente in Supabase
+Migra i dati dal file Excel "Gestion Carniceria El Tablero.xlsx" direttamente in Supabase,
+leggendo il libro intero oppure in streaming a blocchi di righe (chunk_rows)
 """
 
 import pandas as pd
 import json
+import hashlib
+from collections import Counter
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable
 import logging
 from database.supabase_manager import SupabaseManager
 from database.hybrid_database_manager import get_hybrid_manager
+from database.bulk_insert import DEFAULT_CHUNK_SIZE
+from components.excel_sheet_parser import extract_sheet_records
+from components.workbook_loader import iter_workbook_chunks, map_workbook_sheets
+from components.workbook_cache import get_workbook_cache
 
 # Configurazione logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Categorie contabili (daily_accounting_schema.sql) per i tipi di spesa del foglio
+EXPENSE_CATEGORIES = {
+    'nomina': 'Sueldos',
+    'seguridad_social': 'Sueldos',
+    'retencion': 'Sueldos',
+    'vacaciones': 'Sueldos',
+    'liquidacion': 'Sueldos',
+    'gasto': 'Gastos Operativos'
+}
+
+def _expense_category(transaction: Dict[str, Any]) -> str:
+    """Categoria contabile di una spesa del foglio"""
+    return EXPENSE_CATEGORIES[transaction['tipo']]
+
+# Fasi delle transazioni: fase -> (tipo di riga, tipi del foglio, categoria o funzione della transazione)
+TRANSACTION_STAGES = {
+    'sales': ('income', ['venta'], 'Ventas Varios'),
+    'purchases': ('purchases', ['compra'], 'Compra Carnes'),
+    'expenses': ('expenses', list(EXPENSE_CATEGORIES), _expense_category)
+}
+
 class SupabaseExcelMigrator:
     """Classe per migrare dati Excel direttamente in Supabase"""
     
-    def __init__(self):
+    def __init__(self, progress_callback: Callable[[str, int, int], None] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, read_only: bool = False, workers: Optional[int] = None,
+                 use_cache: bool = True, chunk_rows: Optional[int] = None):
         self.db = get_hybrid_manager()
+        self.progress_callback = progress_callback  # (fase, righe scritte, righe totali)
+        self.chunk_size = chunk_size
+        self.read_only = read_only  # lettura in streaming con openpyxl per file grandi
+        self.workers = workers  # processi per i fogli: None = automatico, 1 = seriale
+        self.use_cache = use_cache  # riusa i risultati di un file già analizzato (components/workbook_cache.py)
+        self.chunk_rows = chunk_rows  # righe per blocco: migrazione in streaming con memoria limitata
         self.months_mapping = {
             'Noviembre 24': '2024-11',
             'Deciembre 24': '2024-12', 
@@ -32,8 +68,18 @@ class SupabaseExcelMigrator:
             'Junio 25': '2025-06'
         }
         
+    def __getstate__(self):
+        """Nei processi worker serve solo il parsing: manager del database e callback restano qui"""
+        state = self.__dict__.copy()
+        state['db'] = None
+        state['progress_callback'] = None
+        return state
+    
     def migrate_excel_to_supabase(self, excel_path: str) -> Dict[str, Any]:
-        """Migra tutti i dati dal file Excel a Supabase"""
+        """Migra tutti i dati dal file Excel a Supabase (a blocchi di righe se chunk_rows è impostato)"""
+        if self.chunk_rows:
+            return self.stream_excel_to_supabase(excel_path)
+        
         try:
             logger.info(f"🚀 Iniziando migrazione Excel -> Supabase: {excel_path}")
             
@@ -60,24 +106,122 @@ class SupabaseExcelMigrator:
             logger.error(f"❌ Errore durante la migrazione: {e}")
             return {}
     
+    def stream_excel_to_supabase(self, excel_path: str) -> Dict[str, Any]:
+        """Migra il file a blocchi di chunk_rows righe: ogni blocco letto viene estratto e scritto subito.
+        
+        In memoria restano il blocco corrente, al più chunk_size righe in attesa per fase e i totali
+        per fornitore, cliente e mese, non il libro intero; la cache dei libri analizzati non viene
+        usata. Stessi risultati di migrate_excel_to_supabase, con l'avanzamento (fase, righe scritte,
+        righe scritte) perché il totale non è noto in anticipo.
+        """
+        try:
+            logger.info(f"🚀 Migrazione Excel -> Supabase a blocchi di {self.chunk_rows} righe: {excel_path}")
+            
+            streams = {stage: {'pending': [], 'sample': [], 'stats': None} for stage in TRANSACTION_STAGES}
+            suppliers, customers, sheets = {}, {}, {}
+            failed_sheets = set()
+            current_sheet, occurrences = None, Counter()
+            
+            for sheet_name, chunk in iter_workbook_chunks(excel_path, self.chunk_rows):
+                month = self.months_mapping.get(sheet_name, sheet_name)
+                if sheet_name != current_sheet:
+                    # import_key contiene il foglio: le occorrenze si contano foglio per foglio
+                    current_sheet, occurrences = sheet_name, Counter()
+                try:
+                    transactions, daily_totals = extract_sheet_records(chunk, month)
+                except Exception as e:
+                    logger.error(f"❌ Errore processando foglio {sheet_name} (righe da {chunk.index[0]}): {e}")
+                    failed_sheets.add(sheet_name)
+                    continue
+                
+                for stage, stream in streams.items():
+                    kind, tipos, category = TRANSACTION_STAGES[stage]
+                    stream['pending'].extend(
+                        self._transaction_rows(sheet_name, month, transactions, kind, tipos, category, occurrences)
+                    )
+                    if len(stream['pending']) >= self.chunk_size:
+                        self._flush_stream(stage, stream)
+                
+                self._add_supplier_totals(suppliers, transactions)
+                self._add_customer_totals(customers, transactions)
+                sheet = sheets.setdefault(sheet_name, {'month': month, 'summary': {}})
+                for field, value in self.calculate_monthly_summary(transactions, daily_totals).items():
+                    sheet['summary'][field] = sheet['summary'].get(field, 0) + value
+            
+            if not sheets:
+                raise Exception("Nessun dato trovato nel file Excel")
+            
+            migration_results = {}
+            for stage, stream in streams.items():
+                self._flush_stream(stage, stream)
+                stats = stream['stats'] or self._merge_stats(None, [])
+                migration_results[stage] = self._result(stats, stream['sample'])
+            migration_results['suppliers'] = self._migrate_supplier_totals(suppliers, sorted(failed_sheets))
+            migration_results['customers'] = self._customers_result(customers)
+            migration_results['financial_records'] = self.migrate_financial_records(sheets)
+            
+            logger.info("✅ Migrazione in streaming completata con successo!")
+            return migration_results
+            
+        except Exception as e:
+            logger.error(f"❌ Errore durante la migrazione in streaming: {e}")
+            return {}
+    
+    def _flush_stream(self, stage: str, stream: Dict[str, Any]):
+        """Scrive le righe in attesa di una fase e ne somma le statistiche"""
+        rows, stream['pending'] = stream['pending'], []
+        if not rows:
+            return
+        
+        kind = TRANSACTION_STAGES[stage][0]
+        write = self.db.add_daily_incomes_bulk if kind == 'income' else self.db.add_daily_expenses_bulk
+        stream['stats'] = self._merge_stats(stream['stats'], rows, write(rows, chunk_size=self.chunk_size))
+        stream['sample'].extend(rows[:5 - len(stream['sample'])])
+        if self.progress_callback:
+            written = stream['stats']['total']
+            self.progress_callback(stage, written, written)
+    
+    def _merge_stats(self, total: Optional[Dict[str, Any]], rows: List[Dict[str, Any]],
+                     stats: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Somma le statistiche di un inserimento massivo a quelle già accumulate per la fase"""
+        total = dict(total or {'total': 0, 'inserted': 0, 'skipped': 0, 'failed': 0, 'chunks': 0,
+                               'retries': 0, 'elapsed_seconds': 0})
+        stats = stats or {}
+        total['total'] += stats.get('total', len(rows))
+        for field in ('inserted', 'skipped', 'failed', 'chunks', 'retries', 'elapsed_seconds'):
+            total[field] += stats.get(field, 0)
+        elapsed = total['elapsed_seconds']
+        total['rows_per_second'] = round(total['total'] / elapsed, 1) if elapsed > 0 else float(total['total'])
+        return total
+    
     def read_excel_data(self, excel_path: str) -> Dict[str, Any]:
         """Legge tutti i dati dal file Excel"""
         try:
             logger.info(f"📊 Leggendo file Excel: {excel_path}")
             
-            # Leggi tutti i fogli
-            xl_file = pd.ExcelFile(excel_path)
+            # Stesso file già analizzato (hash del contenuto): niente parsing
+            cache = get_workbook_cache() if self.use_cache else None
+            # La modalità di lettura fa parte della variante: le due letture non condividono l'entry
+            mode = 'read_only' if self.read_only else 'full'
+            cache_key = cache.make_key(excel_path, f"migrator-{mode}") if cache else None
+            cached = cache.get(cache_key) if cache else None
+            if cached is not None:
+                logger.info("⚡ Libro Excel già analizzato: dati letti dalla cache")
+                return {sheet_name: self._with_summary(data) for sheet_name, data in cached.items()}
+            
+            # Leggi e processa i fogli (su più processi se ce ne sono abbastanza), risultati in ordine
+            sheets = map_workbook_sheets(
+                excel_path, self._process_sheet, header=None, read_only=self.read_only, workers=self.workers
+            )
             all_data = {}
             
-            for sheet_name in xl_file.sheet_names:
-                logger.info(f"📋 Processando foglio: {sheet_name}")
-                
-                # Leggi il foglio
-                df = pd.read_excel(excel_path, sheet_name=sheet_name, header=None)
-                
-                # Processa i dati del foglio
-                processed_data = self.process_sheet_data(df, sheet_name)
+            for sheet_name, processed_data in sheets:
+                logger.info(f"📋 Foglio processato: {sheet_name}")
                 all_data[sheet_name] = processed_data
+            
+            # Un foglio fallito ({}) non va in cache: il prossimo caricamento lo rielabora
+            if cache and all_data and all(all_data.values()):
+                cache.put(cache_key, all_data)
                 
             return all_data
             
@@ -85,27 +229,26 @@ class SupabaseExcelMigrator:
             logger.error(f"❌ Errore leggendo Excel: {e}")
             return {}
     
+    def _with_summary(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Ricostruisce il risultato di process_sheet_data da un foglio in cache"""
+        if not data:
+            return {}
+        return {
+            'month': data['month'],
+            'transactions': data['transactions'],
+            'daily_totals': data['daily_totals'],
+            'summary': self.calculate_monthly_summary(data['transactions'], data['daily_totals'])
+        }
+    
+    def _process_sheet(self, sheet_name: str, df: pd.DataFrame) -> Dict[str, Any]:
+        """Task per foglio di map_workbook_sheets (eseguibile in un processo worker)"""
+        return self.process_sheet_data(df, sheet_name)
+    
     def process_sheet_data(self, df: pd.DataFrame, sheet_name: str) -> Dict[str, Any]:
         """Processa i dati di un singolo foglio"""
         try:
-            # Estrai i dati delle transazioni
-            transactions = []
-            daily_totals = []
-            
-            for i in range(len(df)):
-                row = df.iloc[i]
-                
-                # Cerca righe con dati di transazione
-                if pd.notna(row.iloc[0]) and isinstance(row.iloc[0], (int, float)):
-                    transaction = self.extract_transaction(row, sheet_name)
-                    if transaction:
-                        transactions.append(transaction)
-                
-                # Cerca totali giornalieri
-                if pd.notna(row.iloc[9]) and 'TOTAL DEL DIA' in str(row.iloc[9]):
-                    daily_total = self.extract_daily_total(row, sheet_name)
-                    if daily_total:
-                        daily_totals.append(daily_total)
+            # Estrai transazioni e totali giornalieri con maschere per colonna
+            transactions, daily_totals = extract_sheet_records(df, self.months_mapping.get(sheet_name, sheet_name))
             
             return {
                 'month': self.months_mapping.get(sheet_name, sheet_name),
@@ -118,81 +261,6 @@ class SupabaseExcelMigrator:
             logger.error(f"❌ Errore processando foglio {sheet_name}: {e}")
             return {}
     
-    def extract_transaction(self, row: pd.Series, sheet_name: str) -> Optional[Dict[str, Any]]:
-        """Estrae una singola transazione"""
-        try:
-            transaction = {
-                'fecha': self.parse_date(row.iloc[2]) if pd.notna(row.iloc[2]) else None,
-                'tipo': 'venta' if pd.notna(row.iloc[3]) else 'compra' if pd.notna(row.iloc[6]) else 'gasto',
-                'importo': 0,
-                'descripcion': str(row.iloc[9]) if pd.notna(row.iloc[9]) else '',
-                'month': self.months_mapping.get(sheet_name, sheet_name)
-            }
-            
-            # Determina importo e tipo
-            if pd.notna(row.iloc[3]):  # Venta
-                transaction['importo'] = float(row.iloc[3])
-                transaction['igic'] = float(row.iloc[4]) if pd.notna(row.iloc[4]) else 0
-                transaction['total'] = float(row.iloc[5]) if pd.notna(row.iloc[5]) else transaction['importo']
-            elif pd.notna(row.iloc[6]):  # Compra
-                transaction['importo'] = float(row.iloc[6])
-                transaction['igic'] = float(row.iloc[7]) if pd.notna(row.iloc[7]) else 0
-                transaction['total'] = float(row.iloc[8]) if pd.notna(row.iloc[8]) else transaction['importo']
-            elif pd.notna(row.iloc[11]):  # Gasto
-                transaction['importo'] = float(row.iloc[11])
-                transaction['tipo'] = 'nomina'
-            elif pd.notna(row.iloc[12]):  # Seguridad Social
-                transaction['importo'] = float(row.iloc[12])
-                transaction['tipo'] = 'seguridad_social'
-            elif pd.notna(row.iloc[13]):  # Retencion
-                transaction['importo'] = float(row.iloc[13])
-                transaction['tipo'] = 'retencion'
-            elif pd.notna(row.iloc[14]):  # Vacaciones
-                transaction['importo'] = float(row.iloc[14])
-                transaction['tipo'] = 'vacaciones'
-            elif pd.notna(row.iloc[15]):  # Liquidacion
-                transaction['importo'] = float(row.iloc[15])
-                transaction['tipo'] = 'liquidacion'
-            elif pd.notna(row.iloc[16]):  # Gastos
-                transaction['importo'] = float(row.iloc[16])
-                transaction['tipo'] = 'gasto'
-            
-            return transaction if transaction['importo'] > 0 else None
-            
-        except Exception as e:
-            logger.error(f"❌ Errore estraendo transazione: {e}")
-            return None
-    
-    def extract_daily_total(self, row: pd.Series, sheet_name: str) -> Optional[Dict[str, Any]]:
-        """Estrae un totale giornaliero"""
-        try:
-            return {
-                'fecha': self.parse_date(row.iloc[2]) if pd.notna(row.iloc[2]) else None,
-                'ventas': float(row.iloc[3]) if pd.notna(row.iloc[3]) else 0,
-                'cobros': float(row.iloc[5]) if pd.notna(row.iloc[5]) else 0,
-                'month': self.months_mapping.get(sheet_name, sheet_name)
-            }
-        except Exception as e:
-            logger.error(f"❌ Errore estraendo totale giornaliero: {e}")
-            return None
-    
-    def parse_date(self, date_value) -> Optional[str]:
-        """Converte una data in formato stringa"""
-        try:
-            if pd.isna(date_value):
-                return None
-            
-            if isinstance(date_value, datetime):
-                return date_value.strftime('%Y-%m-%d')
-            elif isinstance(date_value, str):
-                return pd.to_datetime(date_value).strftime('%Y-%m-%d')
-            else:
-                return None
-                
-        except Exception as e:
-            logger.error(f"❌ Errore parsando data {date_value}: {e}")
-            return None
-    
     def calculate_monthly_summary(self, transactions: List[Dict], daily_totals: List[Dict]) -> Dict[str, Any]:
         """Calcola il riepilogo mensile"""
         try:
@@ -221,142 +289,173 @@ class SupabaseExcelMigrator:
             logger.error(f"❌ Errore calcolando riepilogo: {e}")
             return {}
     
+    def _stage_progress(self, stage: str) -> Optional[Callable[[int, int], None]]:
+        """Adatta il progress_callback del migratore (stage, fatte, totali) alle API di inserimento massivo"""
+        if not self.progress_callback:
+            return None
+        return lambda done, total: self.progress_callback(stage, done, total)
+    
+    def _collect_rows(self, excel_data: Dict[str, Any], kind: str, tipos: List[str], category) -> List[Dict[str, Any]]:
+        """Trasforma le transazioni dei tipi indicati in righe per daily_income / daily_expenses"""
+        rows = []
+        for sheet_name, data in excel_data.items():
+            rows.extend(self._transaction_rows(
+                sheet_name, data.get('month', ''), data.get('transactions', []), kind, tipos, category, Counter()
+            ))
+        return rows
+    
+    def _transaction_rows(self, sheet_name: str, month: str, transactions: List[Dict], kind: str,
+                          tipos: List[str], category, occurrences: Counter) -> List[Dict[str, Any]]:
+        """Righe per daily_income / daily_expenses delle transazioni di un foglio (o di un suo blocco).
+        
+        import_key è l'hash della chiave naturale (foglio, data, importo, descrizione) più il numero
+        di occorrenza, così reimportare lo stesso file non duplica nulla ma due righe identiche
+        nello stesso giorno restano due righe. occurrences conta le chiavi del foglio e va
+        condiviso tra i blocchi dello stesso foglio.
+        """
+        rows = []
+        
+        for transaction in transactions:
+            if transaction['tipo'] not in tipos:
+                continue
+            
+            # Le righe senza data vanno al primo giorno del mese del foglio (se noto)
+            date = transaction['fecha'] or (f"{month}-01" if len(month) == 7 and month[4] == '-' else None)
+            if not date:
+                continue
+            
+            amount = round(float(transaction.get('total', transaction['importo'])), 2)
+            description = transaction['descripcion']
+            natural_key = (kind, sheet_name, date, f"{amount:.2f}", description)
+            occurrences[natural_key] += 1
+            digest = hashlib.sha256('|'.join(natural_key + (str(occurrences[natural_key]),)).encode('utf-8'))
+            
+            row = {
+                'date': date,
+                'amount': amount,
+                'category': category(transaction) if callable(category) else category,
+                'description': description or f'Excel {transaction["tipo"]}',
+                'payment_method': 'Efectivo' if kind == 'income' else 'Transferencia',
+                'import_key': f"excel:{digest.hexdigest()[:40]}"
+            }
+            if kind != 'income':
+                row['supplier'] = description if transaction['tipo'] == 'compra' else ''
+            rows.append(row)
+        
+        return rows
+    
+    def _result(self, stats: Dict[str, Any], rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Risultato di una fase di migrazione a partire dalle statistiche dell'inserimento massivo"""
+        return {
+            'migrated_count': stats['inserted'] + stats.get('updated', 0) + stats['skipped'],
+            'inserted': stats['inserted'],
+            'updated': stats.get('updated', 0),
+            'already_present': stats['skipped'],
+            'failed': stats['failed'],
+            'rows_per_second': stats['rows_per_second'],
+            'status': 'success' if stats['failed'] == 0 else 'partial',
+            'data': rows[:5]  # Prime 5 per esempio
+        }
+    
     def migrate_sales(self, excel_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Migra i dati delle vendite in Supabase"""
+        """Migra le vendite in daily_income con upsert a blocchi"""
         try:
             logger.info("💰 Migrando vendite...")
             
-            sales_data = []
-            for sheet_name, data in excel_data.items():
-                for transaction in data.get('transactions', []):
-                    if transaction['tipo'] == 'venta':
-                        sale_record = {
-                            'fecha': transaction['fecha'],
-                            'cliente': transaction['descripcion'] or 'Cliente General',
-                            'producto': 'Productos Varios',
-                            'cantidad': 1,
-                            'precio_unitario': transaction['importo'],
-                            'total': transaction.get('total', transaction['importo']),
-                            'igic': transaction.get('igic', 0),
-                            'metodo_pago': 'Efectivo',
-                            'vendedor': 'Sistema',
-                            'estado': 'Completada',
-                            'created_at': datetime.now().isoformat()
-                        }
-                        sales_data.append(sale_record)
-            
-            # Inserisci in Supabase (simulato per ora)
-            logger.info(f"✅ Migrate {len(sales_data)} vendite")
+            sales_data = self._collect_rows(excel_data, *TRANSACTION_STAGES['sales'])
+            stats = self.db.add_daily_incomes_bulk(
+                sales_data, chunk_size=self.chunk_size, progress_callback=self._stage_progress('sales')
+            )
             
-            return {
-                'migrated_count': len(sales_data),
-                'status': 'success',
-                'data': sales_data[:5]  # Prime 5 per esempio
-            }
+            logger.info(f"✅ Migrate {len(sales_data)} vendite ({stats['inserted']} nuove)")
+            return self._result(stats, sales_data)
             
         except Exception as e:
             logger.error(f"❌ Errore migrando vendite: {e}")
             return {'status': 'error', 'error': str(e)}
     
     def migrate_purchases(self, excel_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Migra i dati degli acquisti in Supabase"""
+        """Migra gli acquisti in daily_expenses (con fornitore) con upsert a blocchi"""
         try:
             logger.info("🛒 Migrando acquisti...")
             
-            purchases_data = []
-            for sheet_name, data in excel_data.items():
-                for transaction in data.get('transactions', []):
-                    if transaction['tipo'] == 'compra':
-                        purchase_record = {
-                            'fecha': transaction['fecha'],
-                            'proveedor': transaction['descripcion'] or 'Proveedor General',
-                            'producto': 'Productos Varios',
-                            'cantidad': 1,
-                            'precio_unitario': transaction['importo'],
-                            'total': transaction.get('total', transaction['importo']),
-                            'igic': transaction.get('igic', 0),
-                            'metodo_pago': 'Transferencia',
-                            'estado': 'Pagado',
-                            'created_at': datetime.now().isoformat()
-                        }
-                        purchases_data.append(purchase_record)
-            
-            logger.info(f"✅ Migrate {len(purchases_data)} acquisti")
+            purchases_data = self._collect_rows(excel_data, *TRANSACTION_STAGES['purchases'])
+            stats = self.db.add_daily_expenses_bulk(
+                purchases_data, chunk_size=self.chunk_size, progress_callback=self._stage_progress('purchases')
+            )
             
-            return {
-                'migrated_count': len(purchases_data),
-                'status': 'success',
-                'data': purchases_data[:5]  # Prime 5 per esempio
-            }
+            logger.info(f"✅ Migrate {len(purchases_data)} acquisti ({stats['inserted']} nuovi)")
+            return self._result(stats, purchases_data)
             
         except Exception as e:
             logger.error(f"❌ Errore migrando acquisti: {e}")
             return {'status': 'error', 'error': str(e)}
     
     def migrate_expenses(self, excel_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Migra i dati delle spese in Supabase"""
+        """Migra le spese (nomine, contributi, gastos...) in daily_expenses con upsert a blocchi"""
         try:
             logger.info("💸 Migrando spese...")
             
-            expenses_data = []
-            for sheet_name, data in excel_data.items():
-                for transaction in data.get('transactions', []):
-                    if transaction['tipo'] in ['nomina', 'seguridad_social', 'retencion', 'vacaciones', 'liquidacion', 'gasto']:
-                        expense_record = {
-                            'fecha': transaction['fecha'],
-                            'categoria': transaction['tipo'],
-                            'descripcion': transaction['descripcion'] or f'Gasto {transaction["tipo"]}',
-                            'importo': transaction['importo'],
-                            'metodo_pago': 'Transferencia',
-                            'estado': 'Pagado',
-                            'created_at': datetime.now().isoformat()
-                        }
-                        expenses_data.append(expense_record)
-            
-            logger.info(f"✅ Migrate {len(expenses_data)} spese")
+            expenses_data = self._collect_rows(excel_data, *TRANSACTION_STAGES['expenses'])
+            stats = self.db.add_daily_expenses_bulk(
+                expenses_data, chunk_size=self.chunk_size, progress_callback=self._stage_progress('expenses')
+            )
             
-            return {
-                'migrated_count': len(expenses_data),
-                'status': 'success',
-                'data': expenses_data[:5]  # Prime 5 per esempio
-            }
+            logger.info(f"✅ Migrate {len(expenses_data)} spese ({stats['inserted']} nuove)")
+            return self._result(stats, expenses_data)
             
         except Exception as e:
             logger.error(f"❌ Errore migrando spese: {e}")
             return {'status': 'error', 'error': str(e)}
     
     def migrate_suppliers(self, excel_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Migra i dati dei fornitori in Supabase"""
+        """Migra i fornitori (totali degli acquisti per nome) con upsert a blocchi"""
         try:
-            logger.info("🚚 Migrando fornitori...")
-            
             suppliers = {}
             for sheet_name, data in excel_data.items():
-                for transaction in data.get('transactions', []):
-                    if transaction['tipo'] == 'compra' and transaction['descripcion']:
-                        supplier_name = transaction['descripcion']
-                        if supplier_name not in suppliers:
-                            suppliers[supplier_name] = {
-                                'name': supplier_name,
-                                'contact_email': f"{supplier_name.lower().replace(' ', '')}@email.com",
-                                'phone': '+34 123 456 789',
-                                'address': 'Dirección no especificada',
-                                'total_amount': 0,
-                                'transactions_count': 0,
-                                'is_active': True,
-                                'created_at': datetime.now().isoformat()
-                            }
-                        suppliers[supplier_name]['total_amount'] += transaction['importo']
-                        suppliers[supplier_name]['transactions_count'] += 1
+                self._add_supplier_totals(suppliers, data.get('transactions', []))
+        except Exception as e:
+            logger.error(f"❌ Errore migrando fornitori: {e}")
+            return {'status': 'error', 'error': str(e)}
+        
+        # Un foglio fallito è un dizionario vuoto
+        failed_sheets = [sheet_name for sheet_name, data in excel_data.items() if not data]
+        return self._migrate_supplier_totals(suppliers, failed_sheets)
+    
+    def _add_supplier_totals(self, suppliers: Dict[str, Dict], transactions: List[Dict]):
+        """Somma gli acquisti delle transazioni nei totali per fornitore ({nome: riga})"""
+        for transaction in transactions:
+            if transaction['tipo'] == 'compra' and transaction['descripcion']:
+                supplier_name = transaction['descripcion']
+                if supplier_name not in suppliers:
+                    suppliers[supplier_name] = {
+                        'name': supplier_name,
+                        'total_amount': 0,
+                        'transactions_count': 0
+                    }
+                suppliers[supplier_name]['total_amount'] += transaction['importo']
+                suppliers[supplier_name]['transactions_count'] += 1
+    
+    def _migrate_supplier_totals(self, suppliers: Dict[str, Dict], failed_sheets: List[str] = None) -> Dict[str, Any]:
+        """Scrive i totali per fornitore con upsert a blocchi.
+        
+        I totali sostituiscono quelli salvati, quindi devono coprire l'intero libro: se un foglio
+        non è stato letto i fornitori non vengono aggiornati (i totali parziali li ridurrebbero).
+        """
+        if failed_sheets:
+            logger.warning(f"⚠️ Fornitori non aggiornati: fogli non letti ({', '.join(failed_sheets)})")
+            return {'status': 'skipped', 'error': f"Fogli non letti: {', '.join(failed_sheets)}"}
+        
+        try:
+            logger.info("🚚 Migrando fornitori...")
             
             suppliers_data = list(suppliers.values())
-            logger.info(f"✅ Migrate {len(suppliers_data)} fornitori")
+            stats = self.db.upsert_suppliers_bulk(
+                suppliers_data, chunk_size=self.chunk_size, progress_callback=self._stage_progress('suppliers')
+            )
             
-            return {
-                'migrated_count': len(suppliers_data),
-                'status': 'success',
-                'data': suppliers_data[:5]  # Prime 5 per esempio
-            }
+            logger.info(f"✅ Migrate {len(suppliers_data)} fornitori ({stats['inserted']} nuovi, {stats.get('updated', 0)} aggiornati)")
+            return self._result(stats, suppliers_data)
             
         except Exception as e:
             logger.error(f"❌ Errore migrando fornitori: {e}")
@@ -365,27 +464,39 @@ class SupabaseExcelMigrator:
     def migrate_customers(self, excel_data: Dict[str, Any]) -> Dict[str, Any]:
         """Migra i dati dei clienti in Supabase"""
         try:
-            logger.info("👥 Migrando clienti...")
-            
             customers = {}
             for sheet_name, data in excel_data.items():
-                for transaction in data.get('transactions', []):
-                    if transaction['tipo'] == 'venta' and transaction['descripcion']:
-                        customer_name = transaction['descripcion']
-                        if customer_name not in customers:
-                            customers[customer_name] = {
-                                'name': customer_name,
-                                'email': f"{customer_name.lower().replace(' ', '')}@email.com",
-                                'phone': '+34 123 456 789',
-                                'address': 'Dirección no especificada',
-                                'total_purchases': 0,
-                                'total_orders': 0,
-                                'last_purchase': transaction['fecha'],
-                                'is_active': True,
-                                'created_at': datetime.now().isoformat()
-                            }
-                        customers[customer_name]['total_purchases'] += transaction['importo']
-                        customers[customer_name]['total_orders'] += 1
+                self._add_customer_totals(customers, data.get('transactions', []))
+        except Exception as e:
+            logger.error(f"❌ Errore migrando clienti: {e}")
+            return {'status': 'error', 'error': str(e)}
+        
+        return self._customers_result(customers)
+    
+    def _add_customer_totals(self, customers: Dict[str, Dict], transactions: List[Dict]):
+        """Somma le vendite delle transazioni nei totali per cliente ({nome: riga})"""
+        for transaction in transactions:
+            if transaction['tipo'] == 'venta' and transaction['descripcion']:
+                customer_name = transaction['descripcion']
+                if customer_name not in customers:
+                    customers[customer_name] = {
+                        'name': customer_name,
+                        'email': f"{customer_name.lower().replace(' ', '')}@email.com",
+                        'phone': '+34 123 456 789',
+                        'address': 'Dirección no especificada',
+                        'total_purchases': 0,
+                        'total_orders': 0,
+                        'last_purchase': transaction['fecha'],
+                        'is_active': True,
+                        'created_at': datetime.now().isoformat()
+                    }
+                customers[customer_name]['total_purchases'] += transaction['importo']
+                customers[customer_name]['total_orders'] += 1
+    
+    def _customers_result(self, customers: Dict[str, Dict]) -> Dict[str, Any]:
+        """Risultato della migrazione dei clienti a partire dai totali per cliente"""
+        try:
+            logger.info("👥 Migrando clienti...")
             
             customers_data = list(customers.values())
             logger.info(f"✅ Migrate {len(customers_data)} clienti")
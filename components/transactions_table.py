@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Tabella colonnare unica delle transazioni del libro Excel
+Una riga per movimento o totale giornaliero con sheet, date, kind, base, igic, total, supplier
+e invoice; costruita una volta per libro (memorizzata per hash del contenuto) e condivisa da
+ExcelReader, ExcelProcessor e CarniceriaAnalyzer, che ne ricavano le analisi con group-by
+Creato da Ezio Camporeale
+"""
+
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import logging
+import threading
+
+import numpy as np
+import pandas as pd
+
+from components.excel_sheet_parser import (
+    AMOUNT_COLUMNS, DAILY_TOTAL_KIND, empty_transactions_frame, sheet_transactions_frame
+)
+from components.workbook_cache import file_sha256
+from components.workbook_loader import iter_workbook_chunks, map_workbook_sheets
+
+logger = logging.getLogger(__name__)
+
+# Tabelle tenute in memoria (una per libro caricato di recente)
+TABLE_CACHE_SIZE = 4
+
+PAYROLL_KINDS = ('nomina', 'seguridad_social', 'retencion', 'vacaciones', 'liquidacion')
+MOVEMENT_KINDS = tuple(label for _, label in AMOUNT_COLUMNS)
+
+_tables = OrderedDict()
+_tables_lock = threading.Lock()
+
+
+def _sheet_table_task(sheet_name: str, sheet_data: pd.DataFrame) -> pd.DataFrame:
+    """Task per foglio per map_workbook_sheets: i fogli senza la struttura mensile restano vuoti"""
+    try:
+        return sheet_transactions_frame(sheet_data, sheet_name)
+    except IndexError as e:
+        logger.info(f"ℹ️ Foglio {sheet_name} senza movimenti: {e}")
+        return empty_transactions_frame()
+
+
+def build_transactions_table(source, read_only: bool = False, workers: Optional[int] = None,
+                             chunk_rows: Optional[int] = None) -> pd.DataFrame:
+    """Legge tutti i fogli (header=None, in parallelo se sono abbastanza) e li unisce in un'unica tabella.
+    
+    Con chunk_rows i fogli vengono letti in streaming a blocchi di righe (iter_workbook_chunks, in
+    serie e con i valori di read_only=True): in memoria restano un solo blocco e la tabella.
+    """
+    if chunk_rows:
+        frames = [_sheet_table_task(sheet_name, chunk) for sheet_name, chunk in iter_workbook_chunks(source, chunk_rows)]
+    else:
+        frames = [frame for _, frame in map_workbook_sheets(source, _sheet_table_task, header=None,
+                                                             read_only=read_only, workers=workers)]
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return empty_transactions_frame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def get_transactions_table(source, read_only: bool = False, workers: Optional[int] = None,
+                           chunk_rows: Optional[int] = None) -> pd.DataFrame:
+    """Tabella delle transazioni del libro, costruita una sola volta per contenuto del file.
+    
+    La tabella restituita è condivisa tra i chiamanti e non va modificata. Quella costruita a
+    blocchi (chunk_rows) ha gli stessi valori della lettura read_only e la sostituisce.
+    """
+    key = (file_sha256(source), read_only or bool(chunk_rows))
+    with _tables_lock:
+        if key in _tables:
+            _tables.move_to_end(key)
+            return _tables[key]
+    
+    table = build_transactions_table(source, read_only=read_only, workers=workers, chunk_rows=chunk_rows)
+    with _tables_lock:
+        _tables[key] = table
+        _tables.move_to_end(key)
+        while len(_tables) > TABLE_CACHE_SIZE:
+            _tables.popitem(last=False)
+    logger.info(f"✅ Tabella transazioni: {len(table)} righe da {table['sheet'].nunique()} fogli")
+    return table
+
+
+def clear_transactions_tables():
+    """Svuota le tabelle in memoria"""
+    with _tables_lock:
+        _tables.clear()
+
+
+def split_by_sheet(table: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """{foglio: righe del foglio} nell'ordine del libro"""
+    return {sheet: rows for sheet, rows in table.groupby('sheet', sort=False)}
+
+
+def sheet_summary(table: pd.DataFrame) -> pd.DataFrame:
+    """Totali per foglio (nell'ordine del libro), tutti da group-by sulla tabella.
+    
+    Colonne: sales (totale vendite con IGIC), sales_base, sales_igic, purchases (acquisti),
+    payroll (stipendi e contributi), operating_expenses (gastos), expenses, profit,
+    transactions, daily_sales (somma dei totali giornalieri), start, end.
+    """
+    sheets = pd.Index(table['sheet'].unique(), name='sheet')
+    movements = table[table['kind'] != DAILY_TOTAL_KIND]
+    by_kind = (movements.groupby(['sheet', 'kind'], sort=False)['total'].sum()
+               .unstack('kind', fill_value=0.0)
+               .reindex(index=sheets, columns=list(MOVEMENT_KINDS), fill_value=0.0))
+    sales = (movements[movements['kind'] == 'venta'].groupby('sheet', sort=False)[['base', 'igic']].sum()
+             .reindex(sheets, fill_value=0.0))
+    daily = table[table['kind'] == DAILY_TOTAL_KIND].groupby('sheet', sort=False)['total'].sum()
+    dates = table.groupby('sheet', sort=False)['date'].agg(['min', 'max']).reindex(sheets)
+    
+    summary = pd.DataFrame(index=sheets)
+    summary['sales'] = by_kind['venta']
+    summary['sales_base'] = sales['base']
+    summary['sales_igic'] = sales['igic']
+    summary['purchases'] = by_kind['compra']
+    summary['payroll'] = by_kind[list(PAYROLL_KINDS)].sum(axis=1)
+    summary['operating_expenses'] = by_kind['gasto']
+    summary['expenses'] = summary['purchases'] + summary['payroll'] + summary['operating_expenses']
+    summary['profit'] = summary['sales'] - summary['expenses']
+    summary['transactions'] = movements.groupby('sheet', sort=False).size().reindex(sheets, fill_value=0)
+    summary['daily_sales'] = daily.reindex(sheets, fill_value=0.0)
+    summary['start'] = dates['min']
+    summary['end'] = dates['max']
+    return summary
+
+
+def expense_categories(table: pd.DataFrame) -> pd.DataFrame:
+    """Spese per foglio e tipo (acquisti, stipendi, gastos), una colonna per tipo presente"""
+    expenses = table[~table['kind'].isin(['venta', DAILY_TOTAL_KIND])]
+    return expenses.groupby(['sheet', 'kind'], sort=False)['total'].sum().unstack('kind', fill_value=0.0)
+
+
+def supplier_totals(table: pd.DataFrame) -> pd.Series:
+    """Totale degli acquisti per fornitore, dal maggiore"""
+    purchases = table[(table['kind'] == 'compra') & table['supplier'].notna()]
+    return purchases.groupby('supplier')['total'].sum().sort_values(ascending=False, kind='stable')
+
+
+def to_records(rows: pd.DataFrame, columns: Dict[str, str]) -> List[Dict]:
+    """Righe come dizionari {nome: valore} (columns: colonna della tabella -> nome), NaN/NaT come None"""
+    selected = rows[list(columns)].rename(columns=columns).astype(object)
+    return selected.where(selected.notna(), None).to_dict('records')
+
+
+def date_range(start, end) -> Dict:
+    """{'start', 'end', 'days'} da due Timestamp (NaT se il foglio non ha date)"""
+    if pd.isna(start) or pd.isna(end):
+        return {'start': None, 'end': None, 'days': 0}
+    return {'start': start.strftime('%Y-%m-%d'), 'end': end.strftime('%Y-%m-%d'), 'days': (end - start).days}
+
+
+def determine_trend(values: List[float]) -> str:
+    """Tendenza di una serie di valori dalla pendenza della retta di regressione"""
+    try:
+        if len(values) < 2:
+            return 'stable'
+        
+        slope = np.polyfit(np.arange(len(values)), values, 1)[0]
+        if slope > 0.1:
+            return 'increasing'
+        elif slope < -0.1:
+            return 'decreasing'
+        else:
+            return 'stable'
+    
+    except Exception as e:
+        logger.error(f"❌ Errore determinando la tendenza: {e}")
+        return 'stable'
+
+
+def calculate_trends(monthly_breakdown: Dict[str, Dict]) -> Dict:
+    """Tendenze di vendite, spese e utile e crescita tra primo e ultimo mese ({mese: {'sales', 'expenses', 'profit'}})"""
+    try:
+        trends = {
+            'sales_trend': 'stable',
+            'expense_trend': 'stable',
+            'profit_trend': 'stable',
+            'growth_rate': 0
+        }
+        
+        if len(monthly_breakdown) < 2:
+            return trends
+        
+        sales_values = [month['sales'] for month in monthly_breakdown.values()]
+        trends['sales_trend'] = determine_trend(sales_values)
+        trends['expense_trend'] = determine_trend([month['expenses'] for month in monthly_breakdown.values()])
+        trends['profit_trend'] = determine_trend([month['profit'] for month in monthly_breakdown.values()])
+        
+        if sales_values[0] > 0:
+            trends['growth_rate'] = ((sales_values[-1] - sales_values[0]) / sales_values[0]) * 100
+        
+        return trends
+    
+    except Exception as e:
+        logger.error(f"❌ Errore calcolando le tendenze: {e}")
+        return {}
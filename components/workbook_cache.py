@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Cache su disco dei libri Excel già analizzati
+Chiave: SHA-256 del contenuto del file + versione del parser; valori: transazioni e totali
+giornalieri estratti, salvati in Parquet (o pickle senza pyarrow) con eviction LRU per dimensione
+Creato da Ezio Camporeale
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+
+import pandas as pd
+
+from components.excel_sheet_parser import PARSER_VERSION
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+try:
+    from config_es import EXCEL_CACHE_DIR, EXCEL_CACHE_MAX_BYTES
+except ImportError:
+    EXCEL_CACHE_DIR = Path(__file__).parent.parent / "data" / "excel_cache"
+    EXCEL_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+HASH_BLOCK_SIZE = 1024 * 1024
+TAX_TIPOS = ('venta', 'compra')
+TRANSACTION_FIELDS = ('fecha', 'tipo', 'importo', 'descripcion', 'month')
+DAILY_TOTAL_FIELDS = ('fecha', 'ventas', 'cobros', 'month')
+
+
+def file_sha256(source) -> str:
+    """SHA-256 del contenuto: percorso, bytes o file-like (letto a blocchi)"""
+    digest = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray)):
+        digest.update(source)
+    elif hasattr(source, 'read'):
+        source.seek(0)
+        for block in iter(lambda: source.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+        source.seek(0)
+    else:
+        with open(source, 'rb') as handle:
+            for block in iter(lambda: handle.read(HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def _null_if_default(value):
+    """Lo 0 intero messo dal parser per un valore assente diventa null (ripristinato alla lettura)"""
+    return None if type(value) is int and value == 0 else value
+
+
+def _default_if_null(value):
+    return 0 if value is None or pd.isna(value) else value
+
+
+class WorkbookCache:
+    """Cache dei risultati del parser per libro Excel (transazioni e totali giornalieri per foglio)"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = EXCEL_CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir or EXCEL_CACHE_DIR)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def make_key(self, source, variant: str = 'default') -> str:
+        """Chiave dell'entry: hash del file, versione del parser e variante dell'estrazione"""
+        return f"{file_sha256(source)}-v{PARSER_VERSION}-{variant}"
+
+    def get(self, key: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """{foglio: {'month', 'transactions', 'daily_totals'}} (o {} per i fogli falliti), None se assente"""
+        entry = self.cache_dir / key
+        try:
+            with open(entry / 'sheets.json', encoding='utf-8') as handle:
+                manifest = json.load(handle)
+            transactions = self._read_table(entry / manifest['files']['transactions'], manifest['format'])
+            daily_totals = self._read_table(entry / manifest['files']['daily_totals'], manifest['format'])
+        except FileNotFoundError:
+            self._misses += 1
+            return None
+        except Exception as e:
+            logger.warning(f"⚠️ Entry di cache Excel illeggibile, verrà ricreata: {e}")
+            shutil.rmtree(entry, ignore_errors=True)
+            self._misses += 1
+            return None
+
+        # Accesso registrato nella data di modifica della directory (ordine LRU)
+        os.utime(entry)
+        self._hits += 1
+
+        sheets = {sheet['name']: {'month': sheet['month'], 'transactions': [], 'daily_totals': []} if sheet['ok'] else {}
+                  for sheet in manifest['sheets']}
+        has_id = 'id' in transactions.columns
+        for record in transactions.to_dict('records'):
+            transaction = {'id': int(record['id'])} if has_id else {}
+            transaction.update({field: record[field] for field in TRANSACTION_FIELDS})
+            transaction['fecha'] = None if pd.isna(transaction['fecha']) else transaction['fecha']
+            if transaction['tipo'] in TAX_TIPOS:
+                transaction['igic'] = _default_if_null(record['igic'])
+                transaction['total'] = record['total']
+            sheets[record['sheet']]['transactions'].append(transaction)
+        for record in daily_totals.to_dict('records'):
+            daily_total = {field: record[field] for field in DAILY_TOTAL_FIELDS}
+            daily_total['fecha'] = None if pd.isna(daily_total['fecha']) else daily_total['fecha']
+            daily_total['ventas'] = _default_if_null(daily_total['ventas'])
+            daily_total['cobros'] = _default_if_null(daily_total['cobros'])
+            sheets[record['sheet']]['daily_totals'].append(daily_total)
+        return sheets
+
+    def put(self, key: str, sheets: Dict[str, Dict[str, Any]]) -> bool:
+        """Salva i risultati del parser (scrittura in una directory temporanea poi rename atomico)"""
+        storage_format = 'parquet' if PARQUET_AVAILABLE else 'pickle'
+        extension = 'parquet' if PARQUET_AVAILABLE else 'pkl'
+        temp_dir = self.cache_dir / f".tmp-{key}-{uuid.uuid4().hex}"
+        try:
+            transactions, daily_totals, manifest_sheets = [], [], []
+            for name, data in sheets.items():
+                manifest_sheets.append({'name': name, 'month': data.get('month'), 'ok': bool(data)})
+                for transaction in data.get('transactions', []):
+                    record = dict(transaction, sheet=name)
+                    record['igic'] = _null_if_default(record.get('igic'))
+                    transactions.append(record)
+                for daily_total in data.get('daily_totals', []):
+                    record = dict(daily_total, sheet=name)
+                    record['ventas'] = _null_if_default(record['ventas'])
+                    record['cobros'] = _null_if_default(record['cobros'])
+                    daily_totals.append(record)
+
+            temp_dir.mkdir(parents=True, exist_ok=True)
+            files = {'transactions': f"transactions.{extension}", 'daily_totals': f"daily_totals.{extension}"}
+            self._write_table(pd.DataFrame(transactions, columns=self._columns(transactions, TRANSACTION_FIELDS, ('igic', 'total'))),
+                              temp_dir / files['transactions'], storage_format)
+            self._write_table(pd.DataFrame(daily_totals, columns=['sheet', *DAILY_TOTAL_FIELDS]),
+                              temp_dir / files['daily_totals'], storage_format)
+            with open(temp_dir / 'sheets.json', 'w', encoding='utf-8') as handle:
+                json.dump({'format': storage_format, 'files': files, 'sheets': manifest_sheets,
+                           'created_at': time.time()}, handle, ensure_ascii=False)
+
+            with self._lock:
+                entry = self.cache_dir / key
+                if entry.exists():
+                    shutil.rmtree(temp_dir, ignore_errors=True)
+                else:
+                    os.replace(temp_dir, entry)
+                self._evict()
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Errore salvando la cache Excel {key}: {e}")
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            return False
+
+    def clear(self):
+        """Svuota la cache"""
+        with self._lock:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Entry, dimensione totale e hit/miss della cache"""
+        entries = self._entries()
+        total = self._hits + self._misses
+        return {
+            'entries': len(entries),
+            'total_bytes': sum(size for _, _, size in entries),
+            'max_bytes': self.max_bytes,
+            'hits': self._hits,
+            'misses': self._misses,
+            'hit_rate': round(self._hits / total, 3) if total else 0.0,
+            'format': 'parquet' if PARQUET_AVAILABLE else 'pickle'
+        }
+
+    @staticmethod
+    def _columns(records: List[Dict[str, Any]], fields, tax_fields) -> List[str]:
+        has_id = bool(records) and 'id' in records[0]
+        return ['sheet', *(['id'] if has_id else []), *fields, *tax_fields]
+
+    @staticmethod
+    def _write_table(frame: pd.DataFrame, path: Path, storage_format: str):
+        if storage_format == 'parquet':
+            frame.to_parquet(path, index=False)
+        else:
+            frame.to_pickle(path)
+
+    @staticmethod
+    def _read_table(path: Path, storage_format: str) -> pd.DataFrame:
+        if storage_format == 'parquet':
+            return pd.read_parquet(path)
+        return pd.read_pickle(path)
+
+    def _entries(self) -> List[tuple]:
+        """(directory, ultimo accesso, byte) per ogni entry completa"""
+        entries = []
+        if not self.cache_dir.exists():
+            return entries
+        for entry in self.cache_dir.iterdir():
+            if not entry.is_dir() or entry.name.startswith('.tmp-'):
+                continue
+            try:
+                size = sum(path.stat().st_size for path in entry.iterdir())
+                entries.append((entry, entry.stat().st_mtime, size))
+            except FileNotFoundError:
+                continue
+        return entries
+
+    def _evict(self):
+        """Rimuove le entry usate meno di recente finché la cache non rientra in max_bytes"""
+        entries = sorted(self._entries(), key=lambda item: item[1])
+        total = sum(size for _, _, size in entries)
+        for entry, _, size in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            logger.info(f"🧹 Cache Excel: rimossa {entry.name} ({size} byte)")
+
+
+_workbook_cache = None
+_workbook_cache_lock = threading.Lock()
+
+
+def get_workbook_cache() -> WorkbookCache:
+    """Istanza condivisa della cache dei libri Excel"""
+    global _workbook_cache
+    with _workbook_cache_lock:
+        if _workbook_cache is None:
+            _workbook_cache = WorkbookCache()
+        return _workbook_cache
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Caricatore unico dei libri Excel
+Apre il file una sola volta (zip e shared strings analizzati una volta) e legge tutti i fogli
+da quell'handle; modalità opzionale openpyxl read-only per i file grandi, lettura a blocchi
+di righe con memoria limitata ed elaborazione dei fogli in parallelo su un pool di processi
+Usato dalla tabella delle transazioni (components.transactions_table) e dai migratori Excel
+Creato da Ezio Camporeale
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import io
+import logging
+import multiprocessing
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Sotto questo numero di fogli l'avvio dei processi costa più del parsing
+PARALLEL_MIN_SHEETS = 4
+
+# I worker partono da un interprete nuovo: fork duplicherebbe i thread del processo padre
+# (server Streamlit, pool delle letture, refresher della dashboard)
+PROCESS_START_METHOD = 'spawn'
+
+# Righe per blocco nella lettura in streaming (iter_workbook_chunks)
+STREAM_CHUNK_ROWS = 5000
+
+try:
+    from openpyxl import load_workbook as _openpyxl_load_workbook
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+
+def _rows_to_frame(rows: List[tuple], header: Optional[int], min_width: int = 0) -> pd.DataFrame:
+    """Costruisce il DataFrame dalle tuple di valori, con le stesse regole di forma di pd.read_excel
+    (min_width: numero minimo di colonne, per i blocchi di iter_workbook_chunks)"""
+    # Celle vuote finali di ogni riga e righe vuote finali del foglio vengono scartate
+    trimmed = []
+    last_row_with_data = -1
+    for row in rows:
+        values = list(row)
+        while values and values[-1] is None:
+            values.pop()
+        if values:
+            last_row_with_data = len(trimmed)
+        trimmed.append(values)
+    trimmed = trimmed[:last_row_with_data + 1]
+
+    names = []
+    if header is not None:
+        if len(trimmed) <= header:
+            return pd.DataFrame()
+        seen = {}
+        for index, name in enumerate(trimmed[header]):
+            name = f"Unnamed: {index}" if name is None else name
+            if name in seen:
+                seen[name] += 1
+                name = f"{name}.{seen[name]}"
+            else:
+                seen[name] = 0
+            names.append(name)
+        trimmed = trimmed[header + 1:]
+
+    width = max([len(values) for values in trimmed] + [len(names), min_width])
+    if header is None:
+        names = list(range(width))
+    else:
+        names += [f"Unnamed: {index}" for index in range(len(names), width)]
+
+    # Tipi inferiti colonna per colonna (numeri, date, testi) e celle vuote come NaN, come pandas
+    padded = [values + [None] * (width - len(values)) for values in trimmed]
+    columns = {}
+    for name, values in zip(names, zip(*padded) if padded else [()] * width):
+        column = pd.Series(values, dtype=None if values else float)
+        if column.dtype == object:
+            column = column.where(column.notna(), np.nan).infer_objects()
+        columns[name] = column
+    return pd.DataFrame(columns, columns=names)
+
+
+def iter_workbook_sheets(source, header: Optional[int] = 0, read_only: bool = False,
+                         sheet_names: Optional[List[str]] = None) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """Produce (nome foglio, DataFrame) un foglio alla volta, aprendo il file una sola volta.
+
+    source può essere un percorso o un file-like (es. l'upload di Streamlit). Con read_only=True
+    i fogli vengono letti in streaming con openpyxl (iter_rows values_only), più veloce e con
+    meno memoria sui file grandi: i valori delle celle restano quelli del file, senza la
+    conversione dei testi tipo "NA" / "N/A" in NaN fatta da pandas.
+    """
+    if read_only and not OPENPYXL_AVAILABLE:
+        logger.warning("⚠️ openpyxl non installato: lettura con pandas")
+        read_only = False
+
+    if not read_only:
+        with pd.ExcelFile(source) as workbook:
+            for name in sheet_names or workbook.sheet_names:
+                yield name, workbook.parse(name, header=header)
+        return
+
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    workbook = _openpyxl_load_workbook(source, read_only=True, data_only=True, keep_links=False)
+    try:
+        for name in sheet_names or workbook.sheetnames:
+            worksheet = workbook[name]
+            worksheet.reset_dimensions()
+            yield name, _rows_to_frame(list(worksheet.iter_rows(values_only=True)), header)
+    finally:
+        workbook.close()
+
+
+def iter_workbook_chunks(source, chunk_rows: int = STREAM_CHUNK_ROWS,
+                         sheet_names: Optional[List[str]] = None) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """Produce (nome foglio, blocco) con al massimo chunk_rows righe per blocco, foglio dopo foglio.
+    
+    Le righe arrivano da openpyxl read-only (iter_rows values_only, header=None, stessi valori di
+    iter_workbook_sheets con read_only=True) e vengono consegnate a blocchi: in memoria c'è un
+    solo blocco alla volta, non il foglio intero. Ogni blocco ha almeno le colonne dichiarate dal
+    foglio, così un blocco con sole celle iniziali ha le stesse colonne del foglio; l'indice è la
+    riga nel foglio (da 0). I blocchi senza valori vengono saltati, ma un foglio vuoto produce un
+    blocco vuoto. Senza openpyxl ogni foglio viene letto intero con pandas e poi diviso.
+    """
+    if not OPENPYXL_AVAILABLE:
+        logger.warning("⚠️ openpyxl non installato: lettura con pandas del foglio intero")
+        for name, sheet_data in iter_workbook_sheets(source, header=None, sheet_names=sheet_names):
+            for start in range(0, max(len(sheet_data), 1), chunk_rows):
+                yield name, sheet_data.iloc[start:start + chunk_rows]
+        return
+    
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    workbook = _openpyxl_load_workbook(source, read_only=True, data_only=True, keep_links=False)
+    try:
+        for name in sheet_names or workbook.sheetnames:
+            worksheet = workbook[name]
+            # Larghezza dichiarata dal foglio; poi si leggono tutte le righe anche se la dimensione è errata
+            width = worksheet.max_column or 0
+            worksheet.reset_dimensions()
+            rows, start, produced = [], 0, False
+            for row in worksheet.iter_rows(values_only=True):
+                rows.append(row)
+                if len(rows) < chunk_rows:
+                    continue
+                chunk = _rows_to_frame(rows, None, width)
+                if len(chunk):
+                    chunk.index += start
+                    produced = True
+                    yield name, chunk
+                start += len(rows)
+                rows = []
+            chunk = _rows_to_frame(rows, None, width)
+            if len(chunk) or not produced:
+                chunk.index += start
+                yield name, chunk
+    finally:
+        workbook.close()
+
+
+def load_workbook_sheets(source, header: Optional[int] = 0, read_only: bool = False,
+                         sheet_names: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
+    """Tutti i fogli del libro come {nome: DataFrame} (vedi iter_workbook_sheets)"""
+    return dict(iter_workbook_sheets(source, header, read_only, sheet_names))
+
+
+def get_sheet_names(source) -> List[str]:
+    """Nomi dei fogli nell'ordine del libro (apre solo l'indice del file)"""
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    with pd.ExcelFile(source) as workbook:
+        return list(workbook.sheet_names)
+
+
+def resolve_workers(workers: Optional[int], sheet_count: int) -> int:
+    """Numero di processi da usare: None = automatico (core disponibili, solo con abbastanza fogli)"""
+    if workers is None:
+        workers = (os.cpu_count() or 1) if sheet_count >= PARALLEL_MIN_SHEETS else 1
+    return max(1, min(workers, sheet_count))
+
+
+def _sheet_task(source, sheet_name: str, header: Optional[int], read_only: bool,
+                task: Callable[[str, pd.DataFrame], Any]) -> Tuple[bool, Any]:
+    """Eseguito nel worker: legge un solo foglio e applica task; gli errori del task tornano come valore"""
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    _, sheet_data = next(iter_workbook_sheets(source, header, read_only, [sheet_name]))
+    try:
+        return True, task(sheet_name, sheet_data)
+    except Exception as e:
+        return False, e
+
+
+def map_workbook_sheets(source, task: Callable[[str, pd.DataFrame], Any], header: Optional[int] = 0,
+                        read_only: bool = False, workers: Optional[int] = None,
+                        sheet_names: Optional[List[str]] = None) -> Iterator[Tuple[str, Any]]:
+    """Applica task(nome, DataFrame) a ogni foglio e produce (nome, risultato) nell'ordine del libro.
+    
+    Con più di un worker ogni foglio viene letto ed elaborato in un processo separato (task deve
+    essere serializzabile con pickle, es. una funzione di modulo); un errore del task viene
+    rilanciato alla posizione del suo foglio, come nel ciclo seriale. Se il pool non è
+    disponibile (task non serializzabile, processi non avviabili o interrotti) si torna alla
+    lettura seriale con un'unica apertura del file. Il file viene aperto subito, quindi un
+    file non valido solleva l'errore qui e non durante l'iterazione.
+    """
+    names = list(sheet_names or get_sheet_names(source))
+    workers = resolve_workers(workers, len(names))
+    
+    if workers > 1:
+        try:
+            pickle.dumps(task)
+        except Exception as e:
+            logger.warning(f"⚠️ Task non serializzabile, elaborazione seriale dei fogli: {e}")
+            workers = 1
+    
+    if workers <= 1:
+        return _map_serial(source, task, header, read_only, names)
+    return _map_parallel(source, task, header, read_only, names, workers)
+
+
+def _map_serial(source, task, header, read_only, names) -> Iterator[Tuple[str, Any]]:
+    """Elaborazione in serie dei fogli indicati, con un'unica apertura del file"""
+    for sheet_name, sheet_data in iter_workbook_sheets(source, header, read_only, names):
+        yield sheet_name, task(sheet_name, sheet_data)
+
+
+def _map_parallel(source, task, header, read_only, names, workers) -> Iterator[Tuple[str, Any]]:
+    """Un foglio per processo; i risultati vengono restituiti nell'ordine del libro"""
+    # I file-like (upload di Streamlit) vengono passati ai processi come bytes
+    if hasattr(source, 'read'):
+        source.seek(0)
+        payload = source.read()
+    else:
+        payload = source
+    
+    pool_errors = (BrokenProcessPool, OSError, NotImplementedError, pickle.PicklingError)
+    executor = None
+    try:
+        try:
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(PROCESS_START_METHOD))
+            futures = [executor.submit(_sheet_task, payload, name, header, read_only, task) for name in names]
+        except pool_errors as e:
+            logger.warning(f"⚠️ Pool di processi non disponibile, elaborazione seriale dei fogli: {e}")
+            yield from _map_serial(source, task, header, read_only, names)
+            return
+        
+        logger.info(f"⚡ Elaborazione di {len(names)} fogli su {workers} processi")
+        for position, (name, future) in enumerate(zip(names, futures)):
+            try:
+                succeeded, result = future.result()
+            except pool_errors as e:
+                logger.warning(f"⚠️ Pool di processi interrotto, elaborazione seriale dei fogli restanti: {e}")
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = None
+                if hasattr(source, 'seek'):
+                    source.seek(0)
+                yield from _map_serial(source, task, header, read_only, names[position:])
+                return
+            if not succeeded:
+                raise result
+            yield name, result
+    finally:
+        if executor:
+            executor.shutdown(wait=True, cancel_futures=True)
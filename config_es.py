@@ -24,11 +24,15 @@ BACKUPS_DIR = BASE_DIR / "backups"
 STATIC_DIR = BASE_DIR / "static"
 UPLOADS_DIR = DATA_DIR / "uploads"
 EXPORTS_DIR = DATA_DIR / "exports"
+EXCEL_CACHE_DIR = DATA_DIR / "excel_cache"
 
 # Base de datos
 DATABASE_PATH = DATA_DIR / "carniceria.db"
 DATABASE_BACKUP_RETENTION_DAYS = 30
 
+# Caché de libros Excel ya analizados (por SHA-256 del archivo), límite total en disco
+EXCEL_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
 # ===== CONFIGURACIÓN STREAMLIT =====
 
 # Configuraciones Streamlit
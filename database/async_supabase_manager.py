@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Async Supabase Manager per Dashboard Gestión Carnicería
+Stessa interfaccia di SupabaseManager (select, insert, get_daily_entries, ...)
+su client HTTP asincrono (httpx) verso l'API REST PostgREST di Supabase
+Creato da Ezio Camporeale
+"""
+
+import asyncio
+import logging
+from typing import List, Dict, Optional, Any
+from datetime import datetime
+import sys
+from pathlib import Path
+
+# Aggiungi il percorso della directory corrente al path di Python
+current_dir = Path(__file__).parent.parent
+sys.path.append(str(current_dir))
+
+from config.supabase_config import SupabaseConfig
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    httpx = None
+    HTTPX_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Suffissi dei filtri supportati da select() (come in SupabaseManager)
+FILTER_OPERATORS = ('gte', 'lte', 'lt', 'gt', 'in')
+# Caratteri riservati di PostgREST: un valore di una lista in.(...) che li contiene va tra virgolette
+RESERVED_CHARACTERS = ',.:()"\\'
+
+
+class AsyncSupabaseManager:
+    """Gestore Supabase asincrono; da usare come ``async with AsyncSupabaseManager() as db:``
+
+    ``base_url`` e ``transport`` permettono di puntare a un server PostgREST locale
+    (o a uno stub httpx) al posto del progetto Supabase configurato.
+    """
+
+    def __init__(self, url: str = None, api_key: str = None, base_url: str = None,
+                 max_connections: int = 10, timeout: float = 30.0, transport=None):
+        self.config = SupabaseConfig()
+        self.url = url or self.config.SUPABASE_URL
+        self.api_key = api_key or self.config.SUPABASE_ANON_KEY
+        self.base_url = (base_url or f"{self.url}/rest/v1").rstrip('/')
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._transport = transport
+        self.client = None
+        self.requests_count = 0
+
+    def is_connected(self) -> bool:
+        """Verifica se il client HTTP è aperto"""
+        return self.client is not None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def connect(self):
+        """Apre il client HTTP (pool di connessioni condiviso dalle richieste concorrenti)"""
+        if not HTTPX_AVAILABLE:
+            raise ImportError("Libreria httpx non installata. Esegui: pip install httpx")
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={
+                    'apikey': self.api_key,
+                    'Authorization': f"Bearer {self.api_key}",
+                    'Content-Type': 'application/json'
+                },
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections),
+                transport=self._transport
+            )
+
+    async def close(self):
+        """Chiude il client HTTP"""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    # ==================== RICHIESTE POSTGREST ====================
+
+    @staticmethod
+    def _format_value(value: Any) -> str:
+        if isinstance(value, bool):
+            return 'true' if value else 'false'
+        if value is None:
+            return 'null'
+        return str(value)
+
+    @classmethod
+    def _format_list(cls, values: Any) -> str:
+        """Lista di valori per l'operatore in: (a,b,"c,d")"""
+        items = []
+        for value in values:
+            item = cls._format_value(value)
+            if any(char in item for char in RESERVED_CHARACTERS):
+                item = '"' + item.replace('\\', '\\\\').replace('"', '\\"') + '"'
+            items.append(item)
+        return f"({','.join(items)})"
+
+    @classmethod
+    def _filter_params(cls, filters: Dict = None) -> List[tuple]:
+        """Converte i filtri stile SupabaseManager (col, col__gte, ..., col__in) in parametri PostgREST"""
+        params = []
+        for key, value in (filters or {}).items():
+            column, _, operator = key.rpartition('__')
+            if column and operator == 'in':
+                params.append((column, f"in.{cls._format_list(value)}"))
+            elif column and operator in FILTER_OPERATORS:
+                params.append((column, f"{operator}.{cls._format_value(value)}"))
+            else:
+                operator = 'is' if value is None else 'eq'
+                params.append((key, f"{operator}.{cls._format_value(value)}"))
+        return params
+
+    async def _request(self, method: str, path: str, params: List[tuple] = None, json_data: Any = None,
+                       prefer: str = None) -> Any:
+        if self.client is None:
+            await self.connect()
+        headers = {'Prefer': prefer} if prefer else None
+        response = await self.client.request(method, path, params=params, json=json_data, headers=headers)
+        self.requests_count += 1
+        response.raise_for_status()
+        if not response.content:
+            return None
+        return response.json()
+
+    # ==================== METODI CRUD GENERICI ====================
+
+    async def select(self, table: str, columns: str = "*", filters: Dict = None, limit: int = None,
+                     order_by: str = None, offset: int = None) -> List[Dict]:
+        """Seleziona dati da una tabella"""
+        try:
+            params = [('select', columns)] + self._filter_params(filters)
+            if order_by:
+                params.append(('order', order_by))
+            if limit:
+                params.append(('limit', str(limit)))
+            if offset:
+                params.append(('offset', str(offset)))
+            return await self._request('GET', f"/{table}", params=params) or []
+        except Exception as e:
+            logger.error(f"❌ Errore selezione da {table}: {e}")
+            return []
+
+    async def insert(self, table: str, data: Dict) -> Optional[Dict]:
+        """Inserisce un record in una tabella"""
+        try:
+            result = await self._request('POST', f"/{table}", json_data=data, prefer='return=representation')
+            return result[0] if result else None
+        except Exception as e:
+            logger.error(f"❌ Errore inserimento in {table}: {e}")
+            return None
+
+    async def update(self, table: str, data: Dict, filters: Dict) -> bool:
+        """Aggiorna record in una tabella"""
+        try:
+            await self._request('PATCH', f"/{table}", params=self._filter_params(filters), json_data=data)
+            return True
+        except Exception as e:
+            logger.error(f"❌ Errore aggiornamento in {table}: {e}")
+            return False
+
+    async def delete(self, table: str, filters: Dict) -> bool:
+        """Elimina record da una tabella"""
+        try:
+            await self._request('DELETE', f"/{table}", params=self._filter_params(filters))
+            return True
+        except Exception as e:
+            logger.error(f"❌ Errore eliminazione da {table}: {e}")
+            return False
+
+    async def rpc(self, function_name: str, params: Dict[str, Any]) -> Any:
+        """Chiama una funzione RPC su Supabase"""
+        try:
+            return await self._request('POST', f"/rpc/{function_name}", json_data=params or {})
+        except Exception as e:
+            logger.error(f"❌ Errore chiamata RPC '{function_name}': {e}")
+            return None
+
+    # ==================== CONTABILITÀ GIORNALIERA ====================
+
+    async def add_daily_income(self, amount: float, category: str, description: str = "", payment_method: str = "Efectivo", date: str = None) -> Optional[Dict]:
+        """Aggiunge un'entrata giornaliera"""
+        income_data = {
+            'date': date or datetime.now().date().isoformat(),
+            'amount': amount,
+            'category': category,
+            'description': description,
+            'payment_method': payment_method
+        }
+        return await self.insert('daily_income', income_data)
+
+    async def add_daily_expense(self, amount: float, category: str, description: str = "", supplier: str = "", payment_method: str = "Efectivo", date: str = None) -> Optional[Dict]:
+        """Aggiunge un'uscita giornaliera"""
+        expense_data = {
+            'date': date or datetime.now().date().isoformat(),
+            'amount': amount,
+            'category': category,
+            'description': description,
+            'supplier': supplier,
+            'payment_method': payment_method
+        }
+        return await self.insert('daily_expenses', expense_data)
+
+    async def delete_daily_entry(self, entry_type: str, entry_id: str) -> bool:
+        """Elimina un'entrata o uscita giornaliera"""
+        table = 'daily_income' if entry_type == 'income' else 'daily_expenses'
+        return await self.delete(table, {'id': entry_id})
+
+    async def get_daily_entries(self, date: str = None) -> Dict:
+        """Ottiene tutte le entrate e uscite di un giorno (le due tabelle in parallelo)"""
+        if not date:
+            date = datetime.now().date().isoformat()
+
+        income_data, expense_data = await asyncio.gather(
+            self.select('daily_income', filters={'date': date}),
+            self.select('daily_expenses', filters={'date': date})
+        )
+
+        return {
+            'date': date,
+            'income': income_data,
+            'expenses': expense_data,
+            'total_income': sum([i['amount'] for i in income_data]),
+            'total_expenses': sum([e['amount'] for e in expense_data])
+        }
+
+    async def get_daily_report(self, date: str = None) -> Dict:
+        """Ottiene il report giornaliero calcolato"""
+        if not date:
+            date = datetime.now().date().isoformat()
+
+        report_data = await self.select('daily_reports', filters={'date': date})
+        if report_data:
+            return report_data[0]
+
+        # Se non esiste, calcola manualmente
+        daily_entries = await self.get_daily_entries(date)
+        total_income = daily_entries['total_income']
+        total_expenses = daily_entries['total_expenses']
+        net_profit = total_income - total_expenses
+        profit_margin = (net_profit / total_income * 100) if total_income > 0 else 0
+
+        return {
+            'date': date,
+            'total_income': total_income,
+            'total_expenses': total_expenses,
+            'net_profit': net_profit,
+            'profit_margin': profit_margin,
+            'transactions_count': len(daily_entries['income']) + len(daily_entries['expenses'])
+        }
+
+    async def get_accounting_categories(self, category_type: str = None) -> List[Dict]:
+        """Ottiene le categorie di contabilità"""
+        filters = {'is_active': True}
+        if category_type:
+            filters['type'] = category_type
+        return await self.select('accounting_categories', filters=filters)
+
+    async def get_monthly_reports(self, year: int, month: int = None) -> List[Dict]:
+        """Ottiene i report mensili di un anno (o di un solo mese)"""
+        filters = {'year': year}
+        if month:
+            filters['month'] = month
+        return await self.select('monthly_reports', filters=filters, order_by='month')
+
+    async def get_yearly_report(self, year: int) -> Dict:
+        """Ottiene il report annuale"""
+        reports = await self.select('yearly_reports', filters={'year': year})
+        return reports[0] if reports else {}
+
+    # ==================== TRANSAZIONI PER PERIODO ====================
+
+    async def _fetch_date_range(self, table: str, start_date: str, end_date: str, page_size: int = 1000) -> List[Dict[str, Any]]:
+        """Scarica le righe di una tabella con data in [start_date, end_date), pagina per pagina"""
+        rows = []
+        offset = 0
+
+        while True:
+            params = [
+                ('select', '*'),
+                ('date', f"gte.{start_date}"),
+                ('date', f"lt.{end_date}"),
+                ('order', 'date.asc,id.asc'),
+                ('limit', str(page_size)),
+                ('offset', str(offset))
+            ]
+            page = await self._request('GET', f"/{table}", params=params) or []
+
+            # Ultima pagina: solo una pagina vuota (il max-rows del server può essere inferiore a page_size)
+            if not page:
+                break
+            rows.extend(page)
+            offset += len(page)
+
+        return rows
+
+    async def get_transactions_range(self, start_date: str, end_date: str) -> Dict[str, List[Dict[str, Any]]]:
+        """Ottiene tutte le transazioni con data in [start_date, end_date) (entrate e uscite in parallelo)"""
+        income, expenses = await asyncio.gather(
+            self._fetch_date_range('daily_income', start_date, end_date),
+            self._fetch_date_range('daily_expenses', start_date, end_date),
+            return_exceptions=True
+        )
+
+        if isinstance(income, Exception):
+            logger.error(f"❌ Errore ottenendo entrate {start_date} - {end_date}: {income}")
+            income = []
+        if isinstance(expenses, Exception):
+            logger.error(f"❌ Errore ottenendo uscite {start_date} - {end_date}: {expenses}")
+            expenses = []
+
+        return {'income': income, 'expenses': expenses}
+
+    async def get_monthly_transactions(self, year: int, month: int) -> Dict[str, List[Dict[str, Any]]]:
+        """Ottiene tutte le transazioni di un mese specifico"""
+        start_date = f"{year}-{month:02d}-01"
+        if month == 12:
+            end_date = f"{year + 1}-01-01"
+        else:
+            end_date = f"{year}-{month + 1:02d}-01"
+
+        return await self.get_transactions_range(start_date, end_date)
+
+    async def get_annual_transactions(self, year: int) -> Dict[str, List[Dict[str, Any]]]:
+        """Ottiene tutte le transazioni di un anno specifico"""
+        return await self.get_transactions_range(f"{year}-01-01", f"{year + 1}-01-01")
+
+    def get_connection_info(self) -> Dict[str, Any]:
+        """Ottiene informazioni sulla connessione"""
+        return {
+            'base_url': self.base_url,
+            'max_connections': self.max_connections,
+            'is_connected': self.is_connected(),
+            'requests_count': self.requests_count
+        }
@@ -0,0 +1,15 @@
+-- Chiavi di idempotenza per gli inserimenti massivi (add_daily_incomes_bulk / add_daily_expenses_bulk / upsert_suppliers_bulk)
+-- Un blocco ritentato o un'importazione ripetuta non crea righe duplicate
+-- Da eseguire dopo daily_accounting_schema.sql
+-- Creato da Ezio Camporeale
+
+ALTER TABLE daily_income ADD COLUMN IF NOT EXISTS import_key TEXT;
+ALTER TABLE daily_expenses ADD COLUMN IF NOT EXISTS import_key TEXT;
+
+-- Indici unici usati da ON CONFLICT (import_key); le righe inserite a mano restano con import_key NULL
+CREATE UNIQUE INDEX IF NOT EXISTS idx_daily_income_import_key ON daily_income(import_key);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_daily_expenses_import_key ON daily_expenses(import_key);
+
+-- Chiave naturale dei fornitori usata da ON CONFLICT (name) nell'importazione Excel
+-- (eventuali nomi duplicati già presenti vanno uniti prima di creare l'indice)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_suppliers_name ON suppliers(name);
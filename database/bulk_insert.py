@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Bulk Insert per Dashboard Gestión Carnicería
+Funzioni comuni per gli inserimenti massivi in daily_income / daily_expenses:
+normalizzazione righe, chiavi di idempotenza, chunk con retry e throughput
+Creato da Ezio Camporeale
+"""
+
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_MAX_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 0.5
+
+# Colonne scritte per tipo di transazione
+TRANSACTION_COLUMNS = {
+    'income': ('date', 'amount', 'category', 'description', 'payment_method', 'import_key'),
+    'expenses': ('date', 'amount', 'category', 'description', 'supplier', 'payment_method', 'import_key')
+}
+
+# Colonne scritte dall'upsert dei fornitori (chiave naturale: name)
+SUPPLIER_COLUMNS = ('name', 'total_amount', 'transactions_count')
+
+
+def prepare_transaction_rows(rows: List[Dict[str, Any]], kind: str, batch_id: str = None) -> List[Dict[str, Any]]:
+    """Normalizza le righe (stessi default di add_daily_income/add_daily_expense) e assegna import_key.
+
+    Una riga che ha già 'import_key' la mantiene; le altre ricevono "<batch_id>:<posizione>",
+    così ripetere lo stesso batch (o un suo chunk) non crea duplicati.
+    """
+    batch_id = batch_id or uuid.uuid4().hex
+    today = datetime.now().date().isoformat()
+    prepared = []
+
+    for index, row in enumerate(rows):
+        record = {
+            'date': str(row.get('date') or today)[:10],
+            'amount': float(row['amount']),
+            'category': row['category'],
+            'description': row.get('description', ''),
+            'payment_method': row.get('payment_method', 'Efectivo'),
+            'import_key': row.get('import_key') or f"{batch_id}:{index}"
+        }
+        if kind == 'expenses':
+            record['supplier'] = row.get('supplier', '')
+        prepared.append(record)
+
+    return prepared
+
+
+def merge_supplier_totals(suppliers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Una riga per fornitore (SUPPLIER_COLUMNS): i totali di un nome ripetuto vengono sommati,
+    così un nome diviso tra più blocchi non sostituisce i propri totali"""
+    merged = {}
+    for supplier in suppliers:
+        name = supplier['name']
+        if name not in merged:
+            merged[name] = {'name': name, 'total_amount': 0, 'transactions_count': 0}
+        merged[name]['total_amount'] += supplier.get('total_amount', 0)
+        merged[name]['transactions_count'] += supplier.get('transactions_count', 0)
+    return list(merged.values())
+
+
+def chunked(rows: List[Any], chunk_size: int) -> Iterator[List[Any]]:
+    """Divide una lista in blocchi di chunk_size elementi"""
+    for start in range(0, len(rows), chunk_size):
+        yield rows[start:start + chunk_size]
+
+
+def run_chunks(rows: List[Dict[str, Any]], insert_chunk: Callable[[List[Dict[str, Any]]], int],
+               chunk_size: int = DEFAULT_CHUNK_SIZE, max_retries: int = DEFAULT_MAX_RETRIES,
+               label: str = 'righe', progress_callback: Callable[[int, int], None] = None) -> Dict[str, Any]:
+    """Esegue insert_chunk (che restituisce le righe effettivamente inserite) blocco per blocco.
+
+    Un blocco fallito viene ritentato fino a max_retries volte con backoff esponenziale:
+    grazie a import_key il retry non duplica le righe già scritte.
+    """
+    started = time.perf_counter()
+    stats = {'total': len(rows), 'inserted': 0, 'skipped': 0, 'failed': 0, 'chunks': 0, 'retries': 0}
+
+    for chunk in chunked(rows, chunk_size):
+        for attempt in range(max_retries + 1):
+            try:
+                inserted = insert_chunk(chunk)
+                stats['inserted'] += inserted
+                stats['skipped'] += len(chunk) - inserted
+                break
+            except Exception as e:
+                if attempt == max_retries:
+                    logger.error(f"❌ Blocco di {len(chunk)} {label} non inserito dopo {max_retries + 1} tentativi: {e}")
+                    stats['failed'] += len(chunk)
+                    break
+                stats['retries'] += 1
+                logger.warning(f"⚠️ Errore inserendo blocco di {label} (tentativo {attempt + 1}): {e}")
+                time.sleep(RETRY_BACKOFF_SECONDS * (2 ** attempt))
+
+        stats['chunks'] += 1
+        if progress_callback:
+            progress_callback(min(stats['chunks'] * chunk_size, len(rows)), len(rows))
+
+    elapsed = time.perf_counter() - started
+    stats['elapsed_seconds'] = round(elapsed, 3)
+    stats['rows_per_second'] = round(len(rows) / elapsed, 1) if elapsed > 0 else float(len(rows))
+
+    logger.info(
+        f"✅ Inserimento massivo {label}: {stats['inserted']} inserite, {stats['skipped']} già presenti, "
+        f"{stats['failed']} fallite in {stats['elapsed_seconds']}s ({stats['rows_per_second']} righe/s)"
+    )
+    return stats
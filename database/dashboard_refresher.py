@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Dashboard Refresher per Dashboard Gestión Carnicería
+Ricalcola in background i dati della dashboard (stale-while-revalidate):
+la pagina mostra subito l'ultimo snapshot valido con la sua età
+Creato da Ezio Camporeale
+"""
+
+import copy
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REFRESH_INTERVAL = 60
+
+
+def has_data(value: Any) -> bool:
+    """True se il valore contiene almeno un dato: dizionari e liste vuoti (o fatti solo di
+    valori vuoti) e None sono quello che i metodi del manager restituiscono in caso di errore"""
+    if value is None:
+        return False
+    if isinstance(value, dict):
+        return any(has_data(item) for item in value.values())
+    if isinstance(value, (list, tuple, set)):
+        return bool(value)
+    return True
+
+
+class DashboardRefresher:
+    """Thread per processo che ricalcola il payload della dashboard a intervalli e dopo le scritture"""
+
+    def __init__(self, builder: Callable[[], Dict[str, Any]], interval: int = DEFAULT_REFRESH_INTERVAL,
+                 tables: Iterable[str] = ()):
+        self._builder = builder
+        self.interval = interval
+        self.tables = set(tables)
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._refreshed_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.refresh_count = 0
+        self.last_error: Optional[str] = None
+
+    def start(self):
+        """Avvia il thread di refresh (una sola volta per processo)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='dashboard-refresher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Ferma il thread di refresh"""
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self):
+        # Snapshot già calcolato da get_snapshot: il primo ricalcolo avviene dopo un intervallo
+        if self._snapshot is not None:
+            self._wake.wait(self.interval)
+        while not self._stop.is_set():
+            self._wake.clear()
+            self.refresh()
+            self._wake.wait(self.interval)
+
+    def refresh(self) -> bool:
+        """Ricalcola il payload; in caso di errore resta valido l'ultimo snapshot.
+        
+        Il builder usa metodi che in caso di errore restituiscono {} / []: un payload senza
+        alcun dato non sostituisce uno snapshot che ne aveva.
+        """
+        with self._refresh_lock:
+            try:
+                payload = self._builder()
+                if not has_data(payload) and has_data(self._snapshot):
+                    raise ValueError("payload senza dati (database non raggiungibile?)")
+                with self._lock:
+                    self._snapshot = payload
+                    self._refreshed_at = time.time()
+                    self.refresh_count += 1
+                    self.last_error = None
+                return True
+            except Exception as e:
+                with self._lock:
+                    self.last_error = str(e)
+                logger.error(f"❌ Errore aggiornando snapshot dashboard: {e}")
+                return False
+
+    def request_refresh(self):
+        """Chiede un ricalcolo immediato (non bloccante)"""
+        self._wake.set()
+
+    def invalidate(self, tables: Iterable[str]) -> int:
+        """Chiamato dopo le scritture: ricalcola se sono cambiate tabelle usate dalla dashboard"""
+        if self.tables.intersection(tables):
+            self.request_refresh()
+            return 1
+        return 0
+
+    def get_snapshot(self) -> Dict[str, Any]:
+        """Restituisce l'ultimo snapshot con la sua età; solo il primo accesso attende il calcolo"""
+        if self._snapshot is None:
+            self.refresh()
+        self.start()
+
+        with self._lock:
+            if self._snapshot is None:
+                return {'data': {}, 'refreshed_at': None, 'age_seconds': None, 'error': self.last_error}
+            return {
+                'data': copy.deepcopy(self._snapshot),
+                'refreshed_at': datetime.fromtimestamp(self._refreshed_at).isoformat(),
+                'age_seconds': round(time.time() - self._refreshed_at, 1),
+                'error': self.last_error
+            }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistiche del refresher"""
+        with self._lock:
+            return {
+                'running': bool(self._thread and self._thread.is_alive()),
+                'interval': self.interval,
+                'refresh_count': self.refresh_count,
+                'age_seconds': round(time.time() - self._refreshed_at, 1) if self._refreshed_at else None,
+                'last_error': self.last_error
+            }
@@ -0,0 +1,27 @@
+-- Funzione RPC per le statistiche della dashboard
+-- Restituisce tutti i KPI in una sola riga (una sola chiamata da Python)
+-- Da eseguire dopo daily_accounting_schema.sql
+-- Creato da Ezio Camporeale
+
+CREATE OR REPLACE FUNCTION get_dashboard_stats(p_date DATE DEFAULT CURRENT_DATE)
+RETURNS TABLE (
+    sales_today_count BIGINT,
+    sales_today_total NUMERIC,
+    orders_today_count BIGINT,
+    orders_today_total NUMERIC,
+    total_sales NUMERIC,
+    income_categories_count BIGINT,
+    customers_count BIGINT
+) AS $$
+    SELECT
+        (SELECT COUNT(*) FROM daily_income WHERE date = p_date),
+        (SELECT COALESCE(SUM(amount), 0) FROM daily_income WHERE date = p_date),
+        (SELECT COUNT(*) FROM daily_expenses WHERE date = p_date),
+        (SELECT COALESCE(SUM(amount), 0) FROM daily_expenses WHERE date = p_date),
+        (SELECT COALESCE(SUM(amount), 0) FROM daily_income),
+        (SELECT COUNT(*) FROM accounting_categories WHERE is_active = TRUE AND type = 'income'),
+        (SELECT COUNT(*) FROM customers);
+$$ LANGUAGE sql STABLE;
+
+-- Permessi per le chiamate RPC via PostgREST
+GRANT EXECUTE ON FUNCTION get_dashboard_stats(DATE) TO anon, authenticated;
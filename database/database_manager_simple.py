@@ -6,12 +6,20 @@ Creado por Ezio Camporeale
 """
 
 import sqlite3
+import hashlib
+import json
 import logging
+from collections import defaultdict
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, date
 import bcrypt
 
+from database.bulk_insert import (
+    DEFAULT_CHUNK_SIZE, SUPPLIER_COLUMNS, TRANSACTION_COLUMNS, merge_supplier_totals, prepare_transaction_rows,
+    run_chunks
+)
+
 # Configurar logging
 logger = logging.getLogger(__name__)
 
@@ -120,6 +128,15 @@ class SimpleDatabaseManager:
                 )
             """)
             
+            # Huellas (hash del contenido) de cada mes/hoja importado: las hojas sin cambios no se reescriben
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS excel_sheet_fingerprints (
+                    month TEXT PRIMARY KEY,
+                    fingerprint TEXT NOT NULL,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
             # Tabla para proveedores
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS suppliers (
@@ -133,6 +150,91 @@ class SimpleDatabaseManager:
                 )
             """)
             
+            # Tablas de contabilidad diaria (mismo esquema que Supabase)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS daily_income (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    date TEXT NOT NULL DEFAULT CURRENT_DATE,
+                    amount REAL NOT NULL,
+                    category TEXT NOT NULL,
+                    description TEXT,
+                    payment_method TEXT DEFAULT 'Efectivo',
+                    import_key TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS daily_expenses (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    date TEXT NOT NULL DEFAULT CURRENT_DATE,
+                    amount REAL NOT NULL,
+                    category TEXT NOT NULL,
+                    description TEXT,
+                    supplier TEXT,
+                    payment_method TEXT DEFAULT 'Efectivo',
+                    import_key TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS accounting_categories (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT UNIQUE NOT NULL,
+                    type TEXT NOT NULL CHECK (type IN ('income', 'expense')),
+                    color TEXT DEFAULT '#636EFA',
+                    icon TEXT DEFAULT '💰',
+                    is_active BOOLEAN DEFAULT 1,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # Tablas de reportes mensuales y anuales (mantenidas por refresh_period_reports)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS monthly_reports (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    year INTEGER NOT NULL,
+                    month INTEGER NOT NULL,
+                    total_income REAL DEFAULT 0,
+                    total_expenses REAL DEFAULT 0,
+                    net_profit REAL DEFAULT 0,
+                    profit_margin REAL DEFAULT 0,
+                    transactions_count INTEGER DEFAULT 0,
+                    days_with_data INTEGER DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE (year, month)
+                )
+            """)
+            
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS yearly_reports (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    year INTEGER UNIQUE NOT NULL,
+                    total_income REAL DEFAULT 0,
+                    total_expenses REAL DEFAULT 0,
+                    net_profit REAL DEFAULT 0,
+                    profit_margin REAL DEFAULT 0,
+                    transactions_count INTEGER DEFAULT 0,
+                    days_with_data INTEGER DEFAULT 0,
+                    months_with_data INTEGER DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_daily_income_date ON daily_income(date)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_daily_expenses_date ON daily_expenses(date)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_excel_data_month ON excel_data(month, transaction_type)")
+            
+            # Clave de idempotencia para las inserciones masivas (también en bases de datos existentes)
+            for table in ('daily_income', 'daily_expenses'):
+                cursor.execute(f"PRAGMA table_info({table})")
+                if 'import_key' not in [column[1] for column in cursor.fetchall()]:
+                    cursor.execute(f"ALTER TABLE {table} ADD COLUMN import_key TEXT")
+                cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_import_key ON {table}(import_key)")
+            
             # Insertar datos iniciales básicos
             self._insert_basic_data(cursor)
             
@@ -198,11 +300,23 @@ class SimpleDatabaseManager:
         try:
             stats = {}
             
-            # Estadísticas básicas sin errores
-            stats['sales_today'] = {'count': 0, 'total': 0}
-            stats['orders_today'] = {'count': 0, 'total': 0}
+            # Todos los KPI en una sola consulta (equivalente a la función RPC de Supabase)
+            kpis = self.execute_query("""
+                SELECT
+                    (SELECT COUNT(*) FROM daily_income WHERE date = ?) AS sales_today_count,
+                    (SELECT COALESCE(SUM(amount), 0) FROM daily_income WHERE date = ?) AS sales_today_total,
+                    (SELECT COUNT(*) FROM daily_expenses WHERE date = ?) AS orders_today_count,
+                    (SELECT COALESCE(SUM(amount), 0) FROM daily_expenses WHERE date = ?) AS orders_today_total,
+                    (SELECT COALESCE(SUM(amount), 0) FROM daily_income) AS total_sales,
+                    (SELECT COUNT(*) FROM accounting_categories WHERE is_active = 1 AND type = 'income') AS income_categories_count
+            """, (date.today().isoformat(),) * 4, "one") or {}
+            
+            stats['sales_today'] = {'count': kpis.get('sales_today_count', 0), 'total': kpis.get('sales_today_total', 0)}
+            stats['orders_today'] = {'count': kpis.get('orders_today_count', 0), 'total': kpis.get('orders_today_total', 0)}
             stats['total_customers'] = 0
-            stats['total_products'] = 0
+            stats['total_products'] = kpis.get('income_categories_count', 0)
+            stats['total_sales'] = kpis.get('total_sales', 0)
+            stats['products_count'] = stats['total_products']
             
             # Contar usuarios
             try:
@@ -235,6 +349,13 @@ class SimpleDatabaseManager:
             logger.error(f"❌ Error obteniendo productos próximos a vencer: {e}")
             return []
     
+    def get_inventory_alerts(self, days: int = 7) -> Dict[str, List[Dict[str, Any]]]:
+        """Obtiene alertas de stock bajo y vencimientos en una sola llamada (versión simplificada)"""
+        return {
+            'low_stock': self.get_products_low_stock(),
+            'expiring_soon': self.get_products_expiring_soon()
+        }
+    
     def get_product_categories(self) -> List[Dict[str, Any]]:
         """Obtiene categorías de productos (versión simplificada)"""
         try:
@@ -459,69 +580,498 @@ class SimpleDatabaseManager:
             return []
     
     def save_excel_data(self, excel_data: Dict[str, Any]) -> bool:
-        """Guarda los datos del Excel en la base de datos"""
+        """Guarda los datos del Excel en la base de datos, reescribiendo solo los meses que cambiaron.
+        
+        Cada mes (hoja) se identifica por la huella de sus valores (ventas diarias, pagos a
+        proveedores y resumen); los meses con la misma huella guardada no se tocan, los nuevos o
+        modificados se reemplazan y los que ya no están en el Excel se eliminan, todo en una
+        sola transacción. Las filas se insertan con executemany y los totales de los proveedores
+        afectados se recalculan con un único INSERT ... SELECT ... GROUP BY.
+        """
+        try:
+            months = self._group_excel_data_by_month(excel_data)
+            fingerprints = {
+                month: hashlib.sha256(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+                for month, data in months.items()
+            }
+            
+            conn = sqlite3.connect(self.db_path)
+            try:
+                with conn:
+                    cursor = conn.cursor()
+                    # Lectura de las huellas y reemplazo en la misma transacción
+                    cursor.execute("BEGIN IMMEDIATE")
+                    
+                    cursor.execute("SELECT month, fingerprint FROM excel_sheet_fingerprints")
+                    stored = dict(cursor.fetchall())
+                    cursor.execute("SELECT DISTINCT month FROM excel_data UNION SELECT month FROM monthly_summary")
+                    saved_months = {row[0] for row in cursor.fetchall()} | set(stored)
+                    
+                    changed = [month for month in months if stored.get(month) != fingerprints[month]]
+                    removed = sorted(saved_months - set(months))
+                    
+                    # Proveedores con pagos en los meses a reemplazar, antes y después del cambio
+                    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS affected_suppliers (name TEXT PRIMARY KEY)")
+                    cursor.execute("DELETE FROM affected_suppliers")
+                    self._mark_affected_suppliers(cursor, changed + removed)
+                    
+                    for month in changed + removed:
+                        self._delete_excel_month(cursor, month)
+                    for month in changed:
+                        self._insert_excel_month(cursor, month, months[month])
+                        cursor.execute("""
+                            INSERT OR REPLACE INTO excel_sheet_fingerprints (month, fingerprint, updated_at)
+                            VALUES (?, ?, CURRENT_TIMESTAMP)
+                        """, (month, fingerprints[month]))
+                    
+                    self._mark_affected_suppliers(cursor, changed)
+                    self._rebuild_supplier_totals(cursor)
+            finally:
+                conn.close()
+            
+            logger.info(
+                f"✅ Datos del Excel guardados en la base de datos: {len(changed)} meses actualizados, "
+                f"{len(months) - len(changed)} sin cambios, {len(removed)} eliminados"
+            )
+            return True
+            
+        except Exception as e:
+            logger.error(f"❌ Error guardando datos Excel: {e}")
+            return False
+    
+    def _group_excel_data_by_month(self, excel_data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """Agrupa por mes los valores que save_excel_data escribe (ya normalizados como en la base de datos)"""
+        months = defaultdict(lambda: {'daily_sales': [], 'supplier_payments': [], 'summary': None})
+        
+        for sale in excel_data.get('daily_sales', []):
+            months[str(sale.get('month', ''))]['daily_sales'].append(
+                (str(sale.get('date', '')), float(sale.get('amount', 0)))
+            )
+        
+        for supplier in excel_data.get('suppliers', []):
+            months[str(supplier.get('month', ''))]['supplier_payments'].append((
+                str(supplier.get('date', '')),
+                float(supplier.get('amount', 0)),
+                str(supplier.get('name', '')),
+                str(supplier.get('invoice', ''))
+            ))
+        
+        for month, data in excel_data.get('monthly_breakdown', {}).items():
+            months[str(month)]['summary'] = (
+                float(data.get('sales', 0)),
+                float(data.get('expenses', 0)),
+                float(data.get('profit', 0)),
+                int(data.get('transactions', 0))
+            )
+        
+        return dict(months)
+    
+    def _mark_affected_suppliers(self, cursor, months: List[str]):
+        """Añade a affected_suppliers los proveedores con pagos guardados en esos meses"""
+        cursor.executemany("""
+            INSERT OR IGNORE INTO affected_suppliers (name)
+            SELECT DISTINCT supplier_name FROM excel_data
+            WHERE month = ? AND transaction_type = 'supplier_payment'
+        """, [(month,) for month in months])
+    
+    def _rebuild_supplier_totals(self, cursor):
+        """Recalcula desde excel_data los totales de los proveedores en affected_suppliers.
+        
+        Un solo INSERT ... SELECT ... GROUP BY con upsert por nombre (se conservan id y datos de
+        contacto); los proveedores que se quedan sin pagos se eliminan.
+        """
+        cursor.execute("""
+            INSERT INTO suppliers (name, total_amount, transactions_count)
+            SELECT supplier_name, SUM(expense_amount), COUNT(*)
+            FROM excel_data
+            WHERE transaction_type = 'supplier_payment'
+              AND supplier_name IN (SELECT name FROM affected_suppliers)
+            GROUP BY supplier_name
+            ON CONFLICT(name) DO UPDATE SET
+                total_amount = excluded.total_amount,
+                transactions_count = excluded.transactions_count
+        """)
+        cursor.execute("""
+            DELETE FROM suppliers
+            WHERE name IN (SELECT name FROM affected_suppliers)
+              AND name NOT IN (
+                  SELECT supplier_name FROM excel_data
+                  WHERE transaction_type = 'supplier_payment' AND supplier_name IS NOT NULL
+              )
+        """)
+    
+    def _delete_excel_month(self, cursor, month: str):
+        """Elimina las filas, el resumen y la huella de un mes"""
+        cursor.execute("DELETE FROM excel_data WHERE month = ?", (month,))
+        cursor.execute("DELETE FROM monthly_summary WHERE month = ?", (month,))
+        cursor.execute("DELETE FROM excel_sheet_fingerprints WHERE month = ?", (month,))
+    
+    def _insert_excel_month(self, cursor, month: str, data: Dict[str, Any]):
+        """Guarda las ventas diarias, los pagos a proveedores y el resumen de un mes (executemany por tipo)"""
+        # Guardar datos de ventas diarias
+        cursor.executemany("""
+            INSERT INTO excel_data (month, date, sales_amount, transaction_type)
+            VALUES (?, ?, ?, 'daily_sale')
+        """, [(month, sale_date, amount) for sale_date, amount in data['daily_sales']])
+        
+        # Guardar datos de proveedores (los totales se recalculan después con _rebuild_supplier_totals)
+        cursor.executemany("""
+            INSERT INTO excel_data (month, date, expense_amount, supplier_name, invoice_number, transaction_type)
+            VALUES (?, ?, ?, ?, ?, 'supplier_payment')
+        """, [(month,) + payment for payment in data['supplier_payments']])
+        
+        # Guardar resumen mensual
+        if data['summary'] is not None:
+            cursor.execute("""
+                INSERT OR REPLACE INTO monthly_summary (month, total_sales, total_expenses, total_profit, transactions_count)
+                VALUES (?, ?, ?, ?, ?)
+            """, (month,) + data['summary'])
+    
+    def get_transactions_range(self, start_date: str, end_date: str) -> Dict[str, List[Dict[str, Any]]]:
+        """Obtiene ingresos y gastos con fecha en [start_date, end_date)"""
+        try:
+            income = self.execute_query("""
+                SELECT * FROM daily_income
+                WHERE date >= ? AND date < ?
+                ORDER BY date, id
+            """, (start_date, end_date))
+            
+            expenses = self.execute_query("""
+                SELECT * FROM daily_expenses
+                WHERE date >= ? AND date < ?
+                ORDER BY date, id
+            """, (start_date, end_date))
+            
+            return {'income': income or [], 'expenses': expenses or []}
+            
+        except Exception as e:
+            logger.error(f"❌ Error obteniendo transacciones {start_date} - {end_date}: {e}")
+            return {'income': [], 'expenses': []}
+    
+    def get_category_totals(self, kind: str, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        """Total y número de ingresos ('income') o gastos ('expenses') por categoría en [start_date, end_date)"""
+        table = 'daily_income' if kind == 'income' else 'daily_expenses'
         try:
+            return self.execute_query(f"""
+                SELECT category, SUM(amount) AS total, COUNT(*) AS count
+                FROM {table}
+                WHERE date >= ? AND date < ?
+                GROUP BY category
+                ORDER BY total DESC
+            """, (start_date, end_date)) or []
+            
+        except Exception as e:
+            logger.error(f"❌ Error obteniendo totales por categoría {start_date} - {end_date}: {e}")
+            return []
+    
+    def get_transactions_page(self, kind: str, start_date: str, end_date: str, category: str = None,
+                              search: str = None, sort: str = 'date', descending: bool = False,
+                              after_value=None, after_id=None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Obtiene una página de transacciones (keyset sobre columna de orden + id) con total acumulado"""
+        try:
+            table = 'daily_expenses' if kind == 'expenses' else 'daily_income'
+            supplier = 'supplier' if kind == 'expenses' else 'NULL'
+            sort_column = 'amount' if sort == 'amount' else 'date'
+            direction = 'DESC' if descending else 'ASC'
+            comparison = '<' if descending else '>'
+            
+            # Il totale acumulado de la página parte de la suma de las filas anteriores al cursor
+            query = f"""
+                WITH filtered AS (
+                    SELECT id, date, amount, category, description, {supplier} AS supplier, payment_method
+                    FROM {table}
+                    WHERE date >= ? AND date < ?
+                      AND (? IS NULL OR category = ?)
+                      AND (? IS NULL OR description LIKE '%' || ? || '%')
+                ),
+                page AS (
+                    SELECT * FROM filtered
+                    WHERE ? IS NULL OR ({sort_column}, id) {comparison} (?, ?)
+                    ORDER BY {sort_column} {direction}, id {direction}
+                    LIMIT ?
+                )
+                SELECT page.*,
+                       (SELECT COALESCE(SUM(amount), 0) FROM filtered
+                        WHERE ? IS NOT NULL AND NOT (({sort_column}, id) {comparison} (?, ?)))
+                       + SUM(amount) OVER (ORDER BY {sort_column} {direction}, id {direction}) AS running_total,
+                       (SELECT COUNT(*) FROM filtered) AS total_count
+                FROM page
+                ORDER BY {sort_column} {direction}, id {direction}
+            """
+            params = (start_date, end_date, category, category, search, search,
+                      after_value, after_value, after_id, limit,
+                      after_value, after_value, after_id)
+            
+            return self.execute_query(query, params) or []
+        
+        except Exception as e:
+            logger.error(f"❌ Error obteniendo página de transacciones: {e}")
+            return []
+    
+    # ==================== CONTABILIDAD DIARIA ====================
+    
+    # Totales por día calculados desde las transacciones (SQLite no tiene daily_reports)
+    _DAILY_TOTALS_SQL = """
+        SELECT date,
+               SUM(income) AS total_income,
+               SUM(expenses) AS total_expenses,
+               COUNT(*) AS transactions_count
+        FROM (
+            SELECT date, amount AS income, 0 AS expenses FROM daily_income WHERE date >= ? AND date < ?
+            UNION ALL
+            SELECT date, 0 AS income, amount AS expenses FROM daily_expenses WHERE date >= ? AND date < ?
+        )
+        GROUP BY date
+    """
+    
+    def add_daily_income(self, amount: float, category: str, description: str = "", payment_method: str = "Efectivo", date: str = None) -> Optional[Dict[str, Any]]:
+        """Añade un ingreso diario"""
+        try:
+            if not date:
+                date = datetime.now().date().isoformat()
+            
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO daily_income (date, amount, category, description, payment_method)
+                VALUES (?, ?, ?, ?, ?)
+            """, (str(date), float(amount), category, description, payment_method))
+            income_id = cursor.lastrowid
             
-            # Limpiar datos anteriores
-            cursor.execute("DELETE FROM excel_data")
-            cursor.execute("DELETE FROM monthly_summary")
-            cursor.execute("DELETE FROM suppliers")
+            self._refresh_period_reports(cursor, str(date))
+            conn.commit()
+            conn.close()
             
-            # Guardar datos de ventas diarias
-            daily_sales = excel_data.get('daily_sales', [])
-            for sale in daily_sales:
-                cursor.execute("""
-                    INSERT INTO excel_data (month, date, sales_amount, transaction_type)
-                    VALUES (?, ?, ?, 'daily_sale')
-                """, (str(sale.get('month', '')), str(sale.get('date', '')), float(sale.get('amount', 0))))
+            logger.info(f"✅ Ingreso añadido: ${amount} - {category}")
+            return {'id': income_id, 'date': str(date), 'amount': float(amount), 'category': category,
+                    'description': description, 'payment_method': payment_method}
+        except Exception as e:
+            logger.error(f"❌ Error añadiendo ingreso: {e}")
+            return None
+    
+    def add_daily_expense(self, amount: float, category: str, description: str = "", supplier: str = "", payment_method: str = "Efectivo", date: str = None) -> Optional[Dict[str, Any]]:
+        """Añade un gasto diario"""
+        try:
+            if not date:
+                date = datetime.now().date().isoformat()
             
-            # Guardar datos de proveedores
-            suppliers_data = excel_data.get('suppliers', [])
-            for supplier in suppliers_data:
-                cursor.execute("""
-                    INSERT INTO excel_data (month, date, expense_amount, supplier_name, invoice_number, transaction_type)
-                    VALUES (?, ?, ?, ?, ?, 'supplier_payment')
-                """, (
-                    str(supplier.get('month', '')),
-                    str(supplier.get('date', '')),
-                    float(supplier.get('amount', 0)),
-                    str(supplier.get('name', '')),
-                    str(supplier.get('invoice', ''))
-                ))
-                
-                # Actualizar tabla de proveedores
-                cursor.execute("""
-                    INSERT OR REPLACE INTO suppliers (name, total_amount, transactions_count)
-                    VALUES (?, COALESCE((SELECT total_amount FROM suppliers WHERE name = ?), 0) + ?, 
-                            COALESCE((SELECT transactions_count FROM suppliers WHERE name = ?), 0) + 1)
-                """, (str(supplier.get('name', '')), str(supplier.get('name', '')), float(supplier.get('amount', 0)), str(supplier.get('name', ''))))
-            
-            # Guardar resumen mensual
-            monthly_breakdown = excel_data.get('monthly_breakdown', {})
-            for month, data in monthly_breakdown.items():
-                cursor.execute("""
-                    INSERT OR REPLACE INTO monthly_summary (month, total_sales, total_expenses, total_profit, transactions_count)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (
-                    str(month),
-                    float(data.get('sales', 0)),
-                    float(data.get('expenses', 0)),
-                    float(data.get('profit', 0)),
-                    int(data.get('transactions', 0))
-                ))
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO daily_expenses (date, amount, category, description, supplier, payment_method)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (str(date), float(amount), category, description, supplier, payment_method))
+            expense_id = cursor.lastrowid
             
+            self._refresh_period_reports(cursor, str(date))
             conn.commit()
             conn.close()
             
-            logger.info("✅ Datos del Excel guardados en la base de datos")
-            return True
+            logger.info(f"✅ Gasto añadido: ${amount} - {category}")
+            return {'id': expense_id, 'date': str(date), 'amount': float(amount), 'category': category,
+                    'description': description, 'supplier': supplier, 'payment_method': payment_method}
+        except Exception as e:
+            logger.error(f"❌ Error añadiendo gasto: {e}")
+            return None
+    
+    def delete_daily_entry(self, entry_type: str, entry_id: str) -> bool:
+        """Elimina un ingreso o gasto diario"""
+        try:
+            table = 'daily_income' if entry_type == 'income' else 'daily_expenses'
+            
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            row = cursor.execute(f"SELECT date FROM {table} WHERE id = ?", (entry_id,)).fetchone()
+            if not row:
+                conn.close()
+                return False
+            
+            cursor.execute(f"DELETE FROM {table} WHERE id = ?", (entry_id,))
+            self._refresh_period_reports(cursor, row[0])
+            conn.commit()
+            conn.close()
             
+            logger.info(f"✅ {entry_type} eliminado: {entry_id}")
+            return True
         except Exception as e:
-            logger.error(f"❌ Error guardando datos Excel: {e}")
+            logger.error(f"❌ Error eliminando {entry_type}: {e}")
             return False
     
+    def add_daily_incomes_bulk(self, rows: List[Dict[str, Any]], batch_id: str = None,
+                               chunk_size: int = DEFAULT_CHUNK_SIZE, progress_callback=None) -> Dict[str, Any]:
+        """Añade muchos ingresos con inserciones por bloques (idempotentes por import_key)"""
+        return self._bulk_insert_transactions('daily_income', 'income', rows, batch_id, chunk_size, progress_callback)
+    
+    def add_daily_expenses_bulk(self, rows: List[Dict[str, Any]], batch_id: str = None,
+                                chunk_size: int = DEFAULT_CHUNK_SIZE, progress_callback=None) -> Dict[str, Any]:
+        """Añade muchos gastos con inserciones por bloques (idempotentes por import_key)"""
+        return self._bulk_insert_transactions('daily_expenses', 'expenses', rows, batch_id, chunk_size, progress_callback)
+    
+    def _bulk_insert_transactions(self, table: str, kind: str, rows: List[Dict[str, Any]], batch_id: str,
+                                  chunk_size: int, progress_callback) -> Dict[str, Any]:
+        """Inserta las filas por bloques con executemany + INSERT OR IGNORE y recalcula los reportes una vez por mes"""
+        prepared = prepare_transaction_rows(rows, kind, batch_id)
+        columns = TRANSACTION_COLUMNS[kind]
+        insert_sql = f"""
+            INSERT OR IGNORE INTO {table} ({', '.join(columns)})
+            VALUES ({', '.join('?' for _ in columns)})
+        """
+        
+        conn = sqlite3.connect(self.db_path)
+        try:
+            def insert_chunk(chunk):
+                changes_before = conn.total_changes
+                with conn:
+                    conn.executemany(insert_sql, [tuple(row[column] for column in columns) for row in chunk])
+                return conn.total_changes - changes_before
+            
+            stats = run_chunks(prepared, insert_chunk, chunk_size, label=table, progress_callback=progress_callback)
+            
+            cursor = conn.cursor()
+            for month in sorted({row['date'][:7] for row in prepared}):
+                self._refresh_period_reports(cursor, f"{month}-01")
+            conn.commit()
+            return stats
+        except Exception as e:
+            logger.error(f"❌ Error en la inserción masiva en {table}: {e}")
+            return {'total': len(rows), 'inserted': 0, 'skipped': 0, 'failed': len(rows), 'chunks': 0,
+                    'retries': 0, 'elapsed_seconds': 0, 'rows_per_second': 0}
+        finally:
+            conn.close()
+    
+    def upsert_suppliers_bulk(self, suppliers: List[Dict[str, Any]], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                              progress_callback=None) -> Dict[str, Any]:
+        """Crea o actualiza proveedores por nombre; devuelve 'inserted' (nuevos) y 'updated' (ya existentes).
+        
+        Los totales son los completos de cada proveedor en todo el libro y reemplazan a los guardados
+        (repetir la importación es idempotente): no usar con los datos de solo una parte del libro.
+        Los nombres repetidos en la lista se suman antes de escribir.
+        """
+        suppliers = merge_supplier_totals(suppliers)
+        columns = SUPPLIER_COLUMNS
+        upsert_sql = f"""
+            INSERT INTO suppliers ({', '.join(columns)})
+            VALUES ({', '.join('?' for _ in columns)})
+            ON CONFLICT(name) DO UPDATE SET
+                total_amount = excluded.total_amount,
+                transactions_count = excluded.transactions_count
+        """
+        
+        conn = sqlite3.connect(self.db_path)
+        try:
+            def upsert_chunk(chunk):
+                count_before = conn.execute("SELECT COUNT(*) FROM suppliers").fetchone()[0]
+                with conn:
+                    conn.executemany(upsert_sql, [tuple(supplier.get(column, 0) for column in columns) for supplier in chunk])
+                return conn.execute("SELECT COUNT(*) FROM suppliers").fetchone()[0] - count_before
+            
+            stats = run_chunks(suppliers, upsert_chunk, chunk_size, label='suppliers', progress_callback=progress_callback)
+            # Cada fila del upsert se inserta o actualiza: las no insertadas son actualizaciones
+            stats['updated'], stats['skipped'] = stats['skipped'], 0
+            return stats
+        except Exception as e:
+            logger.error(f"❌ Error en la inserción masiva de proveedores: {e}")
+            return {'total': len(suppliers), 'inserted': 0, 'updated': 0, 'skipped': 0, 'failed': len(suppliers),
+                    'chunks': 0, 'retries': 0, 'elapsed_seconds': 0, 'rows_per_second': 0}
+        finally:
+            conn.close()
+    
+    def _refresh_period_reports(self, cursor, entry_date: str):
+        """Recalcula el reporte mensual del mes de entry_date y el anual correspondiente"""
+        year, month = int(entry_date[:4]), int(entry_date[5:7])
+        start_date = f"{year}-{month:02d}-01"
+        end_date = f"{year + 1}-01-01" if month == 12 else f"{year}-{month + 1:02d}-01"
+        
+        cursor.execute("DELETE FROM monthly_reports WHERE year = ? AND month = ?", (year, month))
+        cursor.execute(f"""
+            INSERT INTO monthly_reports (year, month, total_income, total_expenses, net_profit, profit_margin, transactions_count, days_with_data)
+            SELECT ?, ?,
+                   SUM(total_income),
+                   SUM(total_expenses),
+                   SUM(total_income) - SUM(total_expenses),
+                   CASE WHEN SUM(total_income) > 0
+                        THEN (SUM(total_income) - SUM(total_expenses)) / SUM(total_income) * 100
+                        ELSE 0 END,
+                   SUM(transactions_count),
+                   COUNT(*)
+            FROM ({self._DAILY_TOTALS_SQL})
+            HAVING COUNT(*) > 0
+        """, (year, month) + (start_date, end_date) * 2)
+        
+        self._refresh_yearly_report(cursor, year)
+    
+    def _refresh_yearly_report(self, cursor, year: Optional[int] = None):
+        """Recalcula el reporte anual desde los (máximo 12) reportes mensuales"""
+        if year is None:
+            cursor.execute("DELETE FROM yearly_reports")
+        else:
+            cursor.execute("DELETE FROM yearly_reports WHERE year = ?", (year,))
+        
+        cursor.execute(f"""
+            INSERT INTO yearly_reports (year, total_income, total_expenses, net_profit, profit_margin, transactions_count, days_with_data, months_with_data)
+            SELECT year,
+                   SUM(total_income),
+                   SUM(total_expenses),
+                   SUM(total_income) - SUM(total_expenses),
+                   CASE WHEN SUM(total_income) > 0
+                        THEN (SUM(total_income) - SUM(total_expenses)) / SUM(total_income) * 100
+                        ELSE 0 END,
+                   SUM(transactions_count),
+                   SUM(days_with_data),
+                   COUNT(*)
+            FROM monthly_reports
+            {'' if year is None else 'WHERE year = ?'}
+            GROUP BY year
+        """, () if year is None else (year,))
+    
+    def rebuild_period_reports(self) -> int:
+        """Reconstruye todos los reportes mensuales y anuales (backfill)"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute("DELETE FROM monthly_reports")
+            cursor.execute(f"""
+                INSERT INTO monthly_reports (year, month, total_income, total_expenses, net_profit, profit_margin, transactions_count, days_with_data)
+                SELECT CAST(substr(date, 1, 4) AS INTEGER),
+                       CAST(substr(date, 6, 2) AS INTEGER),
+                       SUM(total_income),
+                       SUM(total_expenses),
+                       SUM(total_income) - SUM(total_expenses),
+                       CASE WHEN SUM(total_income) > 0
+                            THEN (SUM(total_income) - SUM(total_expenses)) / SUM(total_income) * 100
+                            ELSE 0 END,
+                       SUM(transactions_count),
+                       COUNT(*)
+                FROM ({self._DAILY_TOTALS_SQL})
+                GROUP BY 1, 2
+            """, ('0000-01-01', '9999-12-31') * 2)
+            months_count = cursor.rowcount
+            
+            self._refresh_yearly_report(cursor)
+            conn.commit()
+            conn.close()
+            
+            logger.info(f"✅ Reportes mensuales reconstruidos: {months_count} meses")
+            return months_count
+        except Exception as e:
+            logger.error(f"❌ Error reconstruyendo reportes: {e}")
+            return 0
+    
+    def get_monthly_reports(self, year: int, month: int = None) -> List[Dict[str, Any]]:
+        """Obtiene los reportes mensuales de un año (o de un mes)"""
+        if month is None:
+            return self.execute_query(
+                "SELECT * FROM monthly_reports WHERE year = ? ORDER BY month", (year,)
+            ) or []
+        return self.execute_query(
+            "SELECT * FROM monthly_reports WHERE year = ? AND month = ?", (year, month)
+        ) or []
+    
+    def get_yearly_report(self, year: int) -> Dict[str, Any]:
+        """Obtiene el reporte anual"""
+        return self.execute_query("SELECT * FROM yearly_reports WHERE year = ?", (year,), "one") or {}
+    
     def get_excel_data_summary(self) -> Dict[str, Any]:
         """Obtiene resumen de datos Excel guardados"""
         try:
@@ -6,12 +6,16 @@ Creato da Ezio Camporeale
 """
 
 import logging
-from typing import List, Dict, Optional, Any
-from datetime import datetime
+from typing import List, Dict, Optional, Any, Callable, Union
+from datetime import datetime, timedelta
+import pandas as pd
 import sys
 from pathlib import Path
 import atexit
 import weakref
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
 # Aggiungi il percorso della directory corrente al path di Python
 current_dir = Path(__file__).parent.parent
@@ -34,10 +38,35 @@ except ImportError as e:
     SQLITE_AVAILABLE = False
     SimpleDatabaseManager = None
 
+try:
+    from database.async_supabase_manager import AsyncSupabaseManager, HTTPX_AVAILABLE
+    ASYNC_SUPABASE_AVAILABLE = HTTPX_AVAILABLE
+except ImportError as e:
+    print(f"⚠️ AsyncSupabaseManager non disponibile: {e}")
+    ASYNC_SUPABASE_AVAILABLE = False
+    AsyncSupabaseManager = None
+
+from database.bulk_insert import DEFAULT_CHUNK_SIZE
+from database.dashboard_refresher import DashboardRefresher
+from database.query_cache import (QueryCache, ReferenceDataCache, _cache_key, cached_query, invalidates,
+                                  is_empty_result, reference_data)
+
 # Configurazione logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Numero massimo di letture concorrenti per fetch_many
+FETCH_MANY_MAX_WORKERS = 8
+
+# Metodi CRUD generici: nel fallback sincrono vengono eseguiti dal manager attivo
+GENERIC_CRUD_METHODS = ('select', 'insert', 'update', 'delete', 'rpc')
+# Tabelle modificate dai metodi di scrittura dell'API asincrona (per l'invalidazione cache)
+ASYNC_WRITE_TABLES = {
+    'add_daily_income': ('daily_income',),
+    'add_daily_expense': ('daily_expenses',),
+    'delete_daily_entry': ('daily_income', 'daily_expenses')
+}
+
 class HybridDatabaseManager:
     """Gestore database ibrido: Supabase principale, SQLite fallback"""
     
@@ -61,6 +90,18 @@ class HybridDatabaseManager:
         else:
             self.supabase_manager = None
             self.use_supabase = False
+        
+        # Cache delle letture, invalidata dai metodi di scrittura
+        self._query_cache = QueryCache()
+        # Dati di riferimento condivisi da tutte le sessioni del processo
+        self._reference_cache = ReferenceDataCache()
+        # Pool limitato per le letture indipendenti in parallelo (fetch_many)
+        self._fetch_executor = ThreadPoolExecutor(max_workers=FETCH_MANY_MAX_WORKERS, thread_name_prefix='fetch-many')
+        # Snapshot della dashboard ricalcolato in background (avviato al primo accesso)
+        self._dashboard_refresher = DashboardRefresher(
+            self.build_dashboard_payload,
+            tables=('daily_income', 'daily_expenses', 'accounting_categories', 'customers', 'sales', 'orders', 'products')
+        )
             
         # Registra cleanup automatico
         atexit.register(self.cleanup)
@@ -94,18 +135,171 @@ class HybridDatabaseManager:
     def switch_to_sqlite(self):
         """Forza l'uso di SQLite"""
         self.use_supabase = False
+        self._query_cache.clear()
+        self._reference_cache.clear()
+        self._dashboard_refresher.request_refresh()
         logger.info("🔄 Switched to SQLite fallback")
     
     def switch_to_supabase(self):
         """Forza l'uso di Supabase"""
         if self.supabase_manager.is_connected():
             self.use_supabase = True
+            self._query_cache.clear()
+            self._reference_cache.clear()
+            self._dashboard_refresher.request_refresh()
             logger.info("🔄 Switched to Supabase")
         else:
             logger.warning("⚠️ Supabase non disponibile, rimanendo su SQLite")
     
+    def fetch_many(self, calls: Dict[str, Union[Callable, tuple]], defaults: Dict[str, Any] = None,
+                   timeout: float = None) -> Dict[str, Any]:
+        """Esegue in parallelo letture indipendenti e restituisce i risultati per chiave.
+
+        Ogni valore di ``calls`` è un callable oppure una tupla (callable, *args).
+        Un errore (o un timeout) in una chiamata non blocca le altre: la chiave
+        riceve il valore di ``defaults`` (None se non indicato).
+        """
+        defaults = defaults or {}
+        futures = {}
+        for key, call in calls.items():
+            func, args = (call[0], call[1:]) if isinstance(call, tuple) else (call, ())
+            futures[key] = self._fetch_executor.submit(func, *args)
+        
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        results = {}
+        for key, future in futures.items():
+            try:
+                remaining = max(0, deadline - time.monotonic()) if deadline is not None else None
+                results[key] = future.result(timeout=remaining)
+            except Exception as e:
+                logger.error(f"❌ Errore nella lettura parallela '{key}': {e or type(e).__name__}")
+                results[key] = defaults.get(key)
+        return results
+    
+    def _run_coroutine(self, coroutine):
+        """Esegue una coroutine fino al termine anche se il thread corrente ha già un event loop"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+        return self._fetch_executor.submit(asyncio.run, coroutine).result()
+    
+    @staticmethod
+    def _invoke(target, method_name: str, *args):
+        return getattr(target, method_name)(*args)
+    
+    def run_async_batch(self, calls: Dict[str, tuple], defaults: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Esegue in parallelo più chiamate all'API di AsyncSupabaseManager e restituisce i risultati per chiave.
+
+        Ogni valore di ``calls`` è una tupla (nome_metodo, *args), ad esempio
+        ``{'gen': ('get_monthly_transactions', 2024, 1)}``. Con SQLite (o senza httpx)
+        gli stessi metodi sincroni vengono eseguiti con fetch_many. Un errore in una
+        chiamata restituisce il valore di ``defaults`` solo per quella chiave.
+        Le letture che corrispondono a un metodo @cached_query condividono le sue voci
+        in cache: quelle già presenti non vanno in rete, le altre vengono salvate.
+        """
+        defaults = defaults or {}
+        
+        if ASYNC_SUPABASE_AVAILABLE and self.is_supabase_active():
+            results = {}
+            pending = {}
+            cache_entries = {}
+            for key, call in calls.items():
+                tables = getattr(getattr(self, call[0], None), 'cache_tables', None)
+                if tables is not None:
+                    cache_key = _cache_key(call[0], tuple(call[1:]), {})
+                    try:
+                        found, value = self._query_cache.get(cache_key)
+                    except TypeError:
+                        # Argomenti non hashabili: nessuna cache
+                        found = False
+                    else:
+                        cache_entries[key] = (cache_key, tables, self._query_cache.versions_of(tables))
+                    if found:
+                        results[key] = value
+                        continue
+                pending[key] = call
+            
+            async def _call(db, method_name, args):
+                return await getattr(db, method_name)(*args)
+            
+            async def _gather():
+                async with AsyncSupabaseManager() as db:
+                    return await asyncio.gather(
+                        *(_call(db, call[0], call[1:]) for call in pending.values()),
+                        return_exceptions=True
+                    )
+            
+            outcomes = []
+            if pending:
+                try:
+                    outcomes = self._run_coroutine(_gather())
+                except Exception as e:
+                    logger.error(f"❌ Errore nel batch asincrono: {e}")
+                    outcomes = [e] * len(pending)
+            
+            for key, outcome in zip(pending, outcomes):
+                if isinstance(outcome, Exception):
+                    logger.error(f"❌ Errore nella chiamata asincrona '{key}': {outcome}")
+                    results[key] = defaults.get(key)
+                else:
+                    results[key] = outcome
+                    if key in cache_entries and not is_empty_result(outcome):
+                        cache_key, tables, versions = cache_entries[key]
+                        self._query_cache.set(cache_key, outcome, tables, versions)
+            results = {key: results[key] for key in calls}
+        else:
+            sync_calls = {}
+            for key, call in calls.items():
+                target = self._get_manager() if call[0] in GENERIC_CRUD_METHODS else self
+                sync_calls[key] = (self._invoke, target, call[0]) + tuple(call[1:])
+            results = self.fetch_many(sync_calls, defaults=defaults)
+        
+        # Invalida la cache per le scritture eseguite nel batch
+        written_tables = set()
+        for call in calls.values():
+            if call[0] in ('insert', 'update', 'delete') and len(call) > 1:
+                written_tables.add(call[1])
+            written_tables.update(ASYNC_WRITE_TABLES.get(call[0], ()))
+        if written_tables:
+            self.invalidate_cache(*written_tables)
+        
+        return results
+    
+    def invalidate_cache(self, *tables: str) -> int:
+        """Invalida la cache per le tabelle indicate (tutta la cache se nessuna)"""
+        if not tables:
+            self._query_cache.clear()
+            self._reference_cache.clear()
+            self._dashboard_refresher.request_refresh()
+            return 0
+        removed = self._query_cache.invalidate(tables) + self._reference_cache.invalidate(tables)
+        self._dashboard_refresher.invalidate(tables)
+        return removed
+    
     # ==================== METODI DASHBOARD ====================
     
+    def build_dashboard_payload(self) -> Dict[str, Any]:
+        """Calcola tutti i dati mostrati dalla dashboard principale"""
+        end_date = datetime.now().date()
+        start_date = end_date - timedelta(days=7)
+        return self.fetch_many({
+            'stats': self.get_dashboard_stats,
+            'inventory_alerts': self.get_inventory_alerts,
+            'sales_last_7_days': (self.get_sales_by_period, start_date, end_date),
+            'top_products': (self.get_top_products, 5)
+        }, defaults={
+            'stats': {},
+            'inventory_alerts': {'low_stock': [], 'expiring_soon': []},
+            'sales_last_7_days': [],
+            'top_products': []
+        })
+    
+    def get_dashboard_snapshot(self) -> Dict[str, Any]:
+        """Ottiene l'ultimo snapshot della dashboard (con età in secondi) senza attendere il database"""
+        return self._dashboard_refresher.get_snapshot()
+    
+    @cached_query('daily_income', 'daily_expenses', 'accounting_categories', 'customers', 'sales', 'orders')
     def get_dashboard_stats(self) -> Dict[str, Any]:
         """Ottiene statistiche dashboard"""
         try:
@@ -115,6 +309,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore ottenendo statistiche dashboard: {e}")
             return {}
     
+    @cached_query('accounting_categories', 'daily_income', 'products')
     def get_products_low_stock(self) -> List[Dict]:
         """Ottiene prodotti con stock basso"""
         try:
@@ -124,6 +319,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore ottenendo prodotti stock basso: {e}")
             return []
     
+    @cached_query('accounting_categories', 'daily_income', 'products')
     def get_products_expiring_soon(self) -> List[Dict]:
         """Ottiene prodotti in scadenza"""
         try:
@@ -133,6 +329,17 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore ottenendo prodotti in scadenza: {e}")
             return []
     
+    @cached_query('accounting_categories', 'daily_income', 'products')
+    def get_inventory_alerts(self) -> Dict[str, List[Dict]]:
+        """Ottiene avvisi stock basso e scadenze con una sola chiamata"""
+        try:
+            manager = self._get_manager()
+            return manager.get_inventory_alerts()
+        except Exception as e:
+            logger.error(f"❌ Errore ottenendo avvisi inventario: {e}")
+            return {'low_stock': [], 'expiring_soon': []}
+    
+    @reference_data('product_categories')
     def get_product_categories(self) -> List[Dict]:
         """Ottiene categorie prodotti"""
         try:
@@ -142,6 +349,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore ottenendo categorie: {e}")
             return []
     
+    @reference_data('units_of_measure')
     def get_units_of_measure(self) -> List[Dict]:
         """Ottiene unità di misura"""
         try:
@@ -170,6 +378,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore ottenendo vendite per periodo: {e}")
             return []
     
+    @cached_query('customers')
     def get_customers(self) -> List[Dict]:
         """Ottiene clienti"""
         try:
@@ -179,6 +388,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore ottenendo clienti: {e}")
             return []
     
+    @cached_query('products')
     def get_products(self) -> List[Dict]:
         """Ottiene prodotti"""
         try:
@@ -233,6 +443,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore ottenendo vendite giornaliere: {e}")
             return []
     
+    @cached_query('suppliers')
     def get_suppliers(self) -> List[Dict]:
         """Ottiene fornitori"""
         try:
@@ -262,6 +473,7 @@ class HybridDatabaseManager:
     
     # ==================== METODI EXCEL ====================
     
+    @invalidates('excel_data', 'suppliers')
     def save_excel_data(self, data: Dict) -> bool:
         """Salva dati Excel"""
         try:
@@ -271,6 +483,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore salvando dati Excel: {e}")
             return False
     
+    @cached_query('excel_data')
     def get_excel_data_summary(self) -> List[Dict]:
         """Ottiene riepilogo dati Excel"""
         try:
@@ -280,6 +493,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore ottenendo riepilogo Excel: {e}")
             return []
     
+    @cached_query('excel_data')
     def get_saved_excel_data(self) -> List[Dict]:
         """Ottiene dati Excel salvati"""
         try:
@@ -347,6 +561,7 @@ class HybridDatabaseManager:
     
     # ==================== METODI PRODOTTI ====================
     
+    @cached_query('accounting_categories', 'daily_income', 'products')
     def get_all_products(self) -> List[Dict]:
         """Ottiene tutti i prodotti"""
         try:
@@ -356,6 +571,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore ottenendo tutti i prodotti: {e}")
             return []
     
+    @cached_query('accounting_categories', 'daily_expenses', 'suppliers')
     def get_all_suppliers(self) -> List[Dict]:
         """Ottiene tutti i fornitori"""
         try:
@@ -365,6 +581,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore ottenendo tutti i fornitori: {e}")
             return []
     
+    @cached_query('customers')
     def get_all_customers(self) -> List[Dict]:
         """Ottiene tutti i clienti"""
         try:
@@ -374,6 +591,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore ottenendo tutti i clienti: {e}")
             return []
     
+    @invalidates('customers')
     def create_customer(self, customer_data: Dict[str, Any]) -> bool:
         """Crea un nuevo cliente"""
         try:
@@ -389,6 +607,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore creando cliente: {e}")
             return False
     
+    @invalidates('customers')
     def update_customer(self, customer_id: int, customer_data: Dict[str, Any]) -> bool:
         """Actualiza un cliente existente"""
         try:
@@ -398,6 +617,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore actualizando cliente {customer_id}: {e}")
             return False
     
+    @invalidates('customers')
     def delete_customer(self, customer_id: int) -> bool:
         """Elimina un cliente"""
         try:
@@ -465,6 +685,7 @@ class HybridDatabaseManager:
     
     # ==================== METODOS PROVEEDORES CRUD ====================
     
+    @invalidates('suppliers')
     def create_supplier(self, supplier_data: Dict[str, Any]) -> bool:
         """Crea un nuevo proveedor"""
         try:
@@ -480,6 +701,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore creando proveedor: {e}")
             return False
     
+    @invalidates('suppliers')
     def update_supplier(self, supplier_id: int, supplier_data: Dict[str, Any]) -> bool:
         """Actualiza un proveedor existente"""
         try:
@@ -489,6 +711,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore actualizando proveedor {supplier_id}: {e}")
             return False
     
+    @invalidates('suppliers')
     def delete_supplier(self, supplier_id: int) -> bool:
         """Elimina un proveedor"""
         try:
@@ -500,6 +723,7 @@ class HybridDatabaseManager:
     
     # ==================== METODOS ORDERS CRUD ====================
     
+    @invalidates('orders')
     def create_order(self, order_data: Dict[str, Any]) -> bool:
         """Crea un nuevo pedido"""
         try:
@@ -509,6 +733,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore creando pedido: {e}")
             return False
     
+    @invalidates('orders')
     def update_order(self, order_id: int, order_data: Dict[str, Any]) -> bool:
         """Actualiza un pedido existente"""
         try:
@@ -518,6 +743,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore actualizando pedido {order_id}: {e}")
             return False
     
+    @invalidates('orders')
     def delete_order(self, order_id: int) -> bool:
         """Elimina un pedido"""
         try:
@@ -538,6 +764,7 @@ class HybridDatabaseManager:
     
     # ==================== METODOS INVENTARIO CRUD ====================
     
+    @invalidates('products')
     def create_product(self, product_data: Dict[str, Any]) -> bool:
         """Crea un nuevo producto"""
         try:
@@ -547,6 +774,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore creando producto: {e}")
             return False
     
+    @invalidates('products')
     def update_product(self, product_id: int, product_data: Dict[str, Any]) -> bool:
         """Actualiza un producto existente"""
         try:
@@ -556,6 +784,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore actualizando producto {product_id}: {e}")
             return False
     
+    @invalidates('products')
     def delete_product(self, product_id: int) -> bool:
         """Elimina un producto"""
         try:
@@ -567,6 +796,7 @@ class HybridDatabaseManager:
     
     # ==================== METODOS VENTAS CRUD ====================
     
+    @invalidates('sales')
     def create_sale(self, sale_data: Dict[str, Any]) -> bool:
         """Crea una nueva venta"""
         try:
@@ -576,6 +806,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore creando venta: {e}")
             return False
     
+    @invalidates('sales')
     def update_sale(self, sale_id: int, sale_data: Dict[str, Any]) -> bool:
         """Actualiza una venta existente"""
         try:
@@ -585,6 +816,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore actualizando venta {sale_id}: {e}")
             return False
     
+    @invalidates('sales')
     def delete_sale(self, sale_id: int) -> bool:
         """Elimina una venta"""
         try:
@@ -594,6 +826,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore eliminando venta {sale_id}: {e}")
             return False
     
+    @cached_query('sales', 'customers')
     def get_all_sales(self) -> List[Dict]:
         """Obtiene todas las ventas individuales"""
         try:
@@ -605,6 +838,7 @@ class HybridDatabaseManager:
     
     # ==================== CRUD USUARIOS ====================
     
+    @cached_query('users', 'roles')
     def get_all_users(self) -> List[Dict]:
         """Ottiene tutti gli utenti"""
         try:
@@ -614,6 +848,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore ottenendo utenti: {e}")
             return []
     
+    @invalidates('users')
     def create_user(self, user_data: Dict) -> Optional[Dict]:
         """Crea un nuovo utente"""
         try:
@@ -623,6 +858,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore creando utente: {e}")
             return None
     
+    @invalidates('users')
     def update_user(self, user_id: str, user_data: Dict) -> bool:
         """Aggiorna un utente esistente"""
         try:
@@ -632,6 +868,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore aggiornando utente: {e}")
             return False
     
+    @invalidates('users')
     def delete_user(self, user_id: str) -> bool:
         """Elimina un utente (soft delete)"""
         try:
@@ -641,6 +878,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore eliminando utente: {e}")
             return False
     
+    @cached_query('users', 'roles')
     def get_user_by_id(self, user_id: str) -> Optional[Dict]:
         """Ottiene un utente per ID"""
         try:
@@ -650,6 +888,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore ottenendo utente {user_id}: {e}")
             return None
     
+    @reference_data('roles')
     def get_all_roles(self) -> List[Dict]:
         """Ottiene tutti i ruoli"""
         try:
@@ -661,6 +900,7 @@ class HybridDatabaseManager:
     
     # ==================== GESTORE CONTABILITÀ GIORNALIERA ====================
     
+    @invalidates('daily_income')
     def add_daily_income(self, amount: float, category: str, description: str = "", payment_method: str = "Efectivo", date: str = None) -> Optional[Dict]:
         """Aggiunge un'entrata giornaliera"""
         try:
@@ -670,6 +910,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore aggiungendo entrata: {e}")
             return None
     
+    @invalidates('daily_expenses')
     def add_daily_expense(self, amount: float, category: str, description: str = "", supplier: str = "", payment_method: str = "Efectivo", date: str = None) -> Optional[Dict]:
         """Aggiunge un'uscita giornaliera"""
         try:
@@ -679,6 +920,44 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore aggiungendo uscita: {e}")
             return None
     
+    @invalidates('daily_income')
+    def add_daily_incomes_bulk(self, rows: List[Dict[str, Any]], batch_id: str = None,
+                               chunk_size: int = DEFAULT_CHUNK_SIZE, progress_callback=None) -> Dict[str, Any]:
+        """Aggiunge molte entrate a blocchi; restituisce conteggi e throughput (righe/s)"""
+        try:
+            manager = self._get_manager()
+            return manager.add_daily_incomes_bulk(rows, batch_id, chunk_size, progress_callback)
+        except Exception as e:
+            logger.error(f"❌ Errore nell'inserimento massivo di entrate: {e}")
+            return {'total': len(rows), 'inserted': 0, 'skipped': 0, 'failed': len(rows), 'chunks': 0,
+                    'retries': 0, 'elapsed_seconds': 0, 'rows_per_second': 0}
+    
+    @invalidates('daily_expenses')
+    def add_daily_expenses_bulk(self, rows: List[Dict[str, Any]], batch_id: str = None,
+                                chunk_size: int = DEFAULT_CHUNK_SIZE, progress_callback=None) -> Dict[str, Any]:
+        """Aggiunge molte uscite a blocchi; restituisce conteggi e throughput (righe/s)"""
+        try:
+            manager = self._get_manager()
+            return manager.add_daily_expenses_bulk(rows, batch_id, chunk_size, progress_callback)
+        except Exception as e:
+            logger.error(f"❌ Errore nell'inserimento massivo di uscite: {e}")
+            return {'total': len(rows), 'inserted': 0, 'skipped': 0, 'failed': len(rows), 'chunks': 0,
+                    'retries': 0, 'elapsed_seconds': 0, 'rows_per_second': 0}
+    
+    @invalidates('suppliers')
+    def upsert_suppliers_bulk(self, suppliers: List[Dict[str, Any]], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                              progress_callback=None) -> Dict[str, Any]:
+        """Crea o aggiorna i fornitori per nome a blocchi (totali completi dell'intero libro, che sostituiscono
+        quelli salvati); restituisce conteggi (inseriti, aggiornati) e throughput (righe/s)"""
+        try:
+            manager = self._get_manager()
+            return manager.upsert_suppliers_bulk(suppliers, chunk_size, progress_callback)
+        except Exception as e:
+            logger.error(f"❌ Errore nell'aggiornamento massivo dei fornitori: {e}")
+            return {'total': len(suppliers), 'inserted': 0, 'updated': 0, 'skipped': 0, 'failed': len(suppliers),
+                    'chunks': 0, 'retries': 0, 'elapsed_seconds': 0, 'rows_per_second': 0}
+    
+    @cached_query('daily_income', 'daily_expenses')
     def get_daily_entries(self, date: str = None) -> Dict:
         """Ottiene tutte le entrate e uscite di un giorno"""
         try:
@@ -688,6 +967,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore ottenendo entrate giornaliere: {e}")
             return {'date': date, 'income': [], 'expenses': [], 'total_income': 0, 'total_expenses': 0}
     
+    @cached_query('daily_income', 'daily_expenses', 'daily_reports')
     def get_daily_report(self, date: str = None) -> Dict:
         """Ottiene il report giornaliero calcolato"""
         try:
@@ -697,6 +977,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore ottenendo report giornaliero: {e}")
             return {}
     
+    @reference_data('accounting_categories')
     def get_accounting_categories(self, category_type: str = None) -> List[Dict]:
         """Ottiene le categorie di contabilità"""
         try:
@@ -706,6 +987,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore ottenendo categorie: {e}")
             return []
     
+    @invalidates('accounting_categories')
     def add_accounting_category(self, name: str, category_type: str, color: str = "#636EFA", icon: str = "💰") -> Optional[Dict]:
         """Aggiunge una nuova categoria"""
         try:
@@ -727,12 +1009,71 @@ class HybridDatabaseManager:
     def get_monthly_summary(self, year: int = None, month: int = None) -> Dict:
         """Ottiene riepilogo mensile"""
         try:
-            manager = self._get_manager()
-            return manager.get_monthly_summary(year, month)
+            if not year:
+                year = datetime.now().year
+            if not month:
+                month = datetime.now().month
+            
+            # Calcola inizio e fine mese
+            start_date = f"{year}-{month:02d}-01"
+            if month == 12:
+                end_date = f"{year + 1}-01-01"
+            else:
+                end_date = f"{year}-{month + 1:02d}-01"
+            
+            # Rollup mensile già calcolato, se disponibile
+            monthly_reports = self.get_monthly_reports(year, month)
+            if monthly_reports:
+                report = monthly_reports[0]
+                return {
+                    'year': year,
+                    'month': month,
+                    'total_income': float(report['total_income']),
+                    'total_expenses': float(report['total_expenses']),
+                    'total_profit': float(report['net_profit']),
+                    'profit_margin': float(report['profit_margin']),
+                    'total_transactions': int(report['transactions_count']),
+                    'days_with_data': int(report['days_with_data'])
+                }
+            
+            summary = {'year': year, 'month': month}
+            summary.update(self.get_period_totals(start_date, end_date))
+            return summary
         except Exception as e:
             logger.error(f"❌ Errore ottenendo riepilogo mensile: {e}")
             return {}
     
+    @cached_query('daily_income', 'daily_expenses', 'monthly_reports')
+    def get_monthly_reports(self, year: int, month: int = None) -> List[Dict]:
+        """Ottiene i report mensili di un anno (o di un solo mese)"""
+        try:
+            manager = self._get_manager()
+            return manager.get_monthly_reports(year, month)
+        except Exception as e:
+            logger.error(f"❌ Errore ottenendo report mensili: {e}")
+            return []
+    
+    @cached_query('daily_income', 'daily_expenses', 'monthly_reports', 'yearly_reports')
+    def get_yearly_report(self, year: int) -> Dict:
+        """Ottiene il report annuale"""
+        try:
+            manager = self._get_manager()
+            return manager.get_yearly_report(year)
+        except Exception as e:
+            logger.error(f"❌ Errore ottenendo report annuale: {e}")
+            return {}
+    
+    @invalidates('daily_reports', 'monthly_reports', 'yearly_reports')
+    def rebuild_period_reports(self) -> int:
+        """Ricostruisce tutti i report mensili e annuali (backfill)"""
+        try:
+            manager = self._get_manager()
+            return manager.rebuild_period_reports()
+        except Exception as e:
+            logger.error(f"❌ Errore ricostruendo report mensili: {e}")
+            return 0
+    
+    @invalidates('daily_income', 'daily_expenses')
     def delete_daily_entry(self, entry_type: str, entry_id: str) -> bool:
         """Elimina un'entrata o uscita giornaliera"""
         try:
@@ -881,6 +1222,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore durante log attività: {e}")
             return None
 
+    @invalidates('employees')
     def add_employee(self, employee_data: Dict[str, Any]) -> bool:
         """Aggiunge un nuovo impiegato"""
         try:
@@ -942,6 +1284,7 @@ class HybridDatabaseManager:
     
     # ==================== METODOS EMPLEADOS CRUD ====================
     
+    @invalidates('employees')
     def add_employee(self, employee_data: Dict[str, Any]) -> bool:
         """Aggiunge un nuovo impiegato"""
         try:
@@ -958,6 +1301,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore aggiungendo impiegato: {e}")
             return False
     
+    @invalidates('employees')
     def update_employee(self, employee_id: str, employee_data: Dict[str, Any]) -> bool:
         """Aggiorna un impiegato esistente"""
         try:
@@ -974,6 +1318,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore aggiornando impiegato: {e}")
             return False
     
+    @invalidates('employees')
     def delete_employee(self, employee_id: str) -> bool:
         """Elimina un impiegato"""
         try:
@@ -990,6 +1335,7 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore eliminando impiegato: {e}")
             return False
     
+    @cached_query('employees')
     def get_employee(self, employee_id: str) -> Dict[str, Any]:
         """Ottiene un impiegato specifico"""
         try:
@@ -1006,51 +1352,278 @@ class HybridDatabaseManager:
             logger.error(f"❌ Errore ottenendo impiegato: {e}")
             return {}
 
-    def get_monthly_transactions(self, year: int, month: int) -> Dict[str, List[Dict[str, Any]]]:
-        """Ottiene tutte le transazioni di un mese specifico"""
-        try:
-            # Formatta le date per il mese
-            start_date = f"{year}-{month:02d}-01"
-            if month == 12:
-                end_date = f"{year + 1}-01-01"
-            else:
-                end_date = f"{year}-{month + 1:02d}-01"
-            
-            monthly_income = []
-            monthly_expenses = []
+    def _fetch_date_range(self, table: str, start_date: str, end_date: str, columns: str = '*', page_size: int = 1000) -> List[Dict[str, Any]]:
+        """Scarica da Supabase le righe di una tabella con data in [start_date, end_date), pagina per pagina (keyset su date, id)"""
+        rows = []
+        for batch in self.supabase_manager.select_iter(
+            table,
+            columns,
+            filters={'date__gte': start_date, 'date__lt': end_date},
+            batch_size=page_size,
+            keyset=('date', 'id')
+        ):
+            rows.extend(batch)
+        return rows
+    
+    @cached_query('daily_income', 'daily_expenses')
+    def get_transactions_range(self, start_date: str, end_date: str, columns: str = '*') -> Dict[str, List[Dict[str, Any]]]:
+        """Ottiene tutte le transazioni con data in [start_date, end_date), opzionalmente solo alcune colonne"""
+        try:
+            income = []
+            expenses = []
             
             if self.use_supabase and self.supabase_manager and self.supabase_manager.is_connected():
-                # Query Supabase per entrate del mese
+                # Una query paginata per tabella
                 try:
-                    income_response = self.supabase_manager.client.table('daily_income').select('*').gte('date', start_date).lt('date', end_date).execute()
-                    monthly_income = income_response.data or []
+                    income = self._fetch_date_range('daily_income', start_date, end_date, columns)
                 except Exception as e:
-                    logger.error(f"❌ Errore ottenendo entrate mensili: {e}")
+                    logger.error(f"❌ Errore ottenendo entrate {start_date} - {end_date}: {e}")
                 
-                # Query Supabase per uscite del mese
                 try:
-                    expense_response = self.supabase_manager.client.table('daily_expenses').select('*').gte('date', start_date).lt('date', end_date).execute()
-                    monthly_expenses = expense_response.data or []
+                    expenses = self._fetch_date_range('daily_expenses', start_date, end_date, columns)
                 except Exception as e:
-                    logger.error(f"❌ Errore ottenendo uscite mensili: {e}")
+                    logger.error(f"❌ Errore ottenendo uscite {start_date} - {end_date}: {e}")
             else:
                 # Fallback SQLite
-                if hasattr(self.sqlite_manager, 'get_monthly_transactions'):
-                    result = self.sqlite_manager.get_monthly_transactions(year, month)
-                    monthly_income = result.get('income', [])
-                    monthly_expenses = result.get('expenses', [])
+                if hasattr(self.sqlite_manager, 'get_transactions_range'):
+                    result = self.sqlite_manager.get_transactions_range(start_date, end_date)
+                    income = result.get('income', [])
+                    expenses = result.get('expenses', [])
                 else:
-                    logger.error("❌ Metodo get_monthly_transactions non disponibile per SQLite")
+                    logger.error("❌ Metodo get_transactions_range non disponibile per SQLite")
             
             return {
-                'income': monthly_income,
-                'expenses': monthly_expenses
+                'income': income,
+                'expenses': expenses
             }
             
         except Exception as e:
-            logger.error(f"❌ Errore ottenendo transazioni mensili: {e}")
+            logger.error(f"❌ Errore ottenendo transazioni {start_date} - {end_date}: {e}")
             return {'income': [], 'expenses': []}
-
+    
+    @staticmethod
+    def split_transactions_by_month(transactions: Dict[str, List[Dict[str, Any]]]) -> Dict[tuple, Dict[str, List[Dict[str, Any]]]]:
+        """Divide in memoria le transazioni per (anno, mese)"""
+        by_month = {}
+        
+        for kind in ('income', 'expenses'):
+            for transaction in transactions.get(kind, []):
+                transaction_date = str(transaction.get('date', ''))
+                try:
+                    key = (int(transaction_date[:4]), int(transaction_date[5:7]))
+                except ValueError:
+                    continue
+                by_month.setdefault(key, {'income': [], 'expenses': []})[kind].append(transaction)
+        
+        return by_month
+    
+    def get_monthly_transactions(self, year: int, month: int) -> Dict[str, List[Dict[str, Any]]]:
+        """Ottiene tutte le transazioni di un mese specifico"""
+        # Formatta le date per il mese
+        start_date = f"{year}-{month:02d}-01"
+        if month == 12:
+            end_date = f"{year + 1}-01-01"
+        else:
+            end_date = f"{year}-{month + 1:02d}-01"
+        
+        return self.get_transactions_range(start_date, end_date)
+    
+    @cached_query('daily_income', 'daily_expenses')
+    def get_category_totals(self, kind: str, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        """Totale e numero di entrate ('income') o uscite ('expenses') per categoria in [start_date, end_date),
+        dal totale più alto; su Supabase scarica (paginate) solo le colonne category e amount"""
+        try:
+            if self.use_supabase and self.supabase_manager and self.supabase_manager.is_connected():
+                table = 'daily_income' if kind == 'income' else 'daily_expenses'
+                rows = self._fetch_date_range(table, start_date, end_date, columns='category, amount')
+                if not rows:
+                    return []
+                
+                df = pd.DataFrame(rows, columns=['category', 'amount'])
+                df['amount'] = pd.to_numeric(df['amount'], errors='coerce').fillna(0.0)
+                totals = df.groupby('category', dropna=False)['amount'].agg(total='sum', count='count')
+                return totals.sort_values('total', ascending=False).reset_index().to_dict('records')
+            
+            return self.sqlite_manager.get_category_totals(kind, start_date, end_date)
+            
+        except Exception as e:
+            logger.error(f"❌ Errore ottenendo totali per categoria {start_date} - {end_date}: {e}")
+            return []
+    
+    @cached_query('daily_income', 'daily_expenses')
+    def get_transactions_page(self, kind: str, start_date: str, end_date: str, category: str = None,
+                              search: str = None, sort: str = 'date', descending: bool = False,
+                              cursor: tuple = None, limit: int = 50) -> Dict[str, Any]:
+        """Ottiene una pagina di entrate ('income') o uscite ('expenses') in [start_date, end_date).
+        
+        Paginazione keyset su (sort, id): ``cursor`` è il ``next_cursor`` della pagina precedente.
+        Filtri, ordinamento e totale progressivo (running_total) sono calcolati dal database.
+        """
+        try:
+            after_value, after_id = cursor if cursor else (None, None)
+            manager = self._get_manager()
+            rows = manager.get_transactions_page(
+                kind, start_date, end_date, category, search, sort, descending, after_value, after_id, limit
+            )
+            
+            sort_column = 'amount' if sort == 'amount' else 'date'
+            next_cursor = None
+            if len(rows) == limit:
+                last_row = rows[-1]
+                next_cursor = (last_row[sort_column], last_row['id'])
+            
+            return {
+                'rows': rows,
+                'total_count': int(rows[0]['total_count']) if rows else 0,
+                'next_cursor': next_cursor
+            }
+        except Exception as e:
+            logger.error(f"❌ Errore ottenendo pagina transazioni: {e}")
+            return {'rows': [], 'total_count': 0, 'next_cursor': None}
+    
+    def prefetch_transactions_page(self, **page_args):
+        """Scarica in background una pagina (di solito la successiva): la lettura reale la troverà in cache"""
+        self._fetch_executor.submit(self.get_transactions_page, **page_args)
+    
+    @staticmethod
+    def _daily_totals(transactions: List[Dict[str, Any]], days: List[str] = None) -> pd.DataFrame:
+        """Somma importi e conta transazioni per giorno (vettoriale); con days restituisce una riga per ogni giorno richiesto"""
+        df = pd.DataFrame(transactions, columns=['date', 'amount'])
+        df['date'] = df['date'].astype(str).str[:10]
+        df['amount'] = pd.to_numeric(df['amount'], errors='coerce').fillna(0.0)
+        
+        totals = df.groupby('date')['amount'].agg(['sum', 'count'])
+        return totals.reindex(days, fill_value=0) if days is not None else totals
+    
+    @staticmethod
+    def _build_daily_summary(days: List[str], income: pd.DataFrame, expenses: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Costruisce le righe giornaliere (formato daily_reports) dai totali di entrate e uscite"""
+        summary = pd.DataFrame({
+            'date': days,
+            'total_income': income['sum'].reindex(days, fill_value=0).astype(float).values,
+            'total_expenses': expenses['sum'].reindex(days, fill_value=0).astype(float).values,
+            'transactions_count': (
+                income['count'].reindex(days, fill_value=0) + expenses['count'].reindex(days, fill_value=0)
+            ).astype(int).values
+        })
+        summary['net_profit'] = summary['total_income'] - summary['total_expenses']
+        summary['profit_margin'] = (
+            (summary['net_profit'] / summary['total_income'].where(summary['total_income'] > 0) * 100)
+            .fillna(0.0)
+        )
+        
+        return summary[['date', 'total_income', 'total_expenses', 'net_profit', 'profit_margin', 'transactions_count']].to_dict('records')
+    
+    @cached_query('daily_income', 'daily_expenses', 'daily_reports')
+    def get_daily_reports_range(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        """Legge i rollup giornalieri di daily_reports con data in [start_date, end_date)"""
+        try:
+            if self.use_supabase and self.supabase_manager and self.supabase_manager.is_connected():
+                return self._fetch_date_range('daily_reports', start_date, end_date)
+            
+            # SQLite non mantiene daily_reports
+            return []
+            
+        except Exception as e:
+            logger.error(f"❌ Errore ottenendo daily_reports {start_date} - {end_date}: {e}")
+            return []
+    
+    @staticmethod
+    def _uncovered_days(start_date: str, end_date: str, covered_days: set) -> List[str]:
+        """Giorni (ISO) di [start_date, end_date) assenti da covered_days"""
+        days = []
+        day = datetime.fromisoformat(start_date[:10]).date()
+        end = datetime.fromisoformat(end_date[:10]).date()
+        while day < end:
+            if day.isoformat() not in covered_days:
+                days.append(day.isoformat())
+            day += timedelta(days=1)
+        return days
+    
+    def get_daily_rollups(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        """Totali per giorno in [start_date, end_date): da daily_reports e, per i giorni senza riga
+        in daily_reports, dalle transazioni grezze (una sola lettura per l'intervallo scoperto)"""
+        rollups = {}
+        for report in self.get_daily_reports_range(start_date, end_date):
+            day = str(report.get('date', ''))[:10]
+            rollups[day] = {
+                'date': day,
+                'total_income': float(report.get('total_income') or 0),
+                'total_expenses': float(report.get('total_expenses') or 0),
+                'net_profit': float(report.get('net_profit') or 0),
+                'profit_margin': float(report.get('profit_margin') or 0),
+                'transactions_count': int(report.get('transactions_count') or 0)
+            }
+        
+        # Giorni scoperti (rollup mancanti o giorni senza movimenti): una sola lettura dal primo
+        # all'ultimo giorno scoperto, solo con le colonne necessarie, filtrata in memoria
+        uncovered = self._uncovered_days(start_date, end_date, set(rollups))
+        if uncovered:
+            last_day = (datetime.fromisoformat(uncovered[-1]).date() + timedelta(days=1)).isoformat()
+            transactions = self.get_transactions_range(uncovered[0], last_day, columns='date, amount')
+            income = self._daily_totals(transactions.get('income', []))
+            expenses = self._daily_totals(transactions.get('expenses', []))
+            days = sorted((set(income.index) | set(expenses.index)) & set(uncovered))
+            for rollup in self._build_daily_summary(days, income, expenses):
+                rollups[rollup['date']] = rollup
+        
+        return [rollups[day] for day in sorted(rollups)]
+    
+    def get_period_totals(self, start_date: str, end_date: str) -> Dict[str, Any]:
+        """Totali di un periodo [start_date, end_date) calcolati dai rollup giornalieri"""
+        rollups = self.get_daily_rollups(start_date, end_date)
+        
+        total_income = sum([r['total_income'] for r in rollups])
+        total_expenses = sum([r['total_expenses'] for r in rollups])
+        total_profit = total_income - total_expenses
+        
+        return {
+            'total_income': total_income,
+            'total_expenses': total_expenses,
+            'total_profit': total_profit,
+            'profit_margin': (total_profit / total_income * 100) if total_income > 0 else 0,
+            'total_transactions': sum([r['transactions_count'] for r in rollups]),
+            'days_with_data': len(rollups)
+        }
+    
+    def get_annual_monthly_totals(self, year: int) -> List[Dict[str, Any]]:
+        """Totali mensili (1-12) di un anno: 12 righe da monthly_reports, altrimenti dai rollup giornalieri"""
+        monthly_reports = {int(r['month']): r for r in self.get_monthly_reports(year)}
+        if monthly_reports:
+            return [
+                {
+                    'month': month,
+                    'income': float(monthly_reports[month]['total_income']) if month in monthly_reports else 0.0,
+                    'expenses': float(monthly_reports[month]['total_expenses']) if month in monthly_reports else 0.0,
+                    'profit': float(monthly_reports[month]['net_profit']) if month in monthly_reports else 0.0,
+                    'transactions': int(monthly_reports[month]['transactions_count']) if month in monthly_reports else 0
+                }
+                for month in range(1, 13)
+            ]
+        
+        rollups = pd.DataFrame(
+            self.get_daily_rollups(f"{year}-01-01", f"{year + 1}-01-01"),
+            columns=['date', 'total_income', 'total_expenses', 'transactions_count']
+        )
+        rollups['month'] = pd.to_numeric(rollups['date'].astype(str).str[5:7], errors='coerce')
+        
+        monthly = (
+            rollups.groupby('month')[['total_income', 'total_expenses', 'transactions_count']]
+            .sum()
+            .reindex(range(1, 13), fill_value=0)
+        )
+        
+        return [
+            {
+                'month': month,
+                'income': float(row['total_income']),
+                'expenses': float(row['total_expenses']),
+                'profit': float(row['total_income'] - row['total_expenses']),
+                'transactions': int(row['transactions_count'])
+            }
+            for month, row in monthly.iterrows()
+        ]
+    
     def get_weekly_summary(self, week_start_date: str) -> List[Dict[str, Any]]:
         """Ottiene il riepilogo settimanale per una settimana specifica"""
         try:
@@ -1058,55 +1631,25 @@ class HybridDatabaseManager:
             
             # Converte la data di inizio settimana
             start_date = datetime.fromisoformat(week_start_date).date()
-            end_date = start_date + timedelta(days=6)
+            end_date = start_date + timedelta(days=7)
+            days = [(start_date + timedelta(days=i)).isoformat() for i in range(7)]
             
-            weekly_data = []
+            # Rollup giornalieri della settimana (anche a cavallo di due mesi)
+            rollups = self.get_daily_rollups(start_date.isoformat(), end_date.isoformat())
+            rollups_by_day = {r['date']: r for r in rollups}
             
-            # Itera attraverso ogni giorno della settimana
-            for i in range(7):
-                current_date = start_date + timedelta(days=i)
-                date_str = current_date.isoformat()
-                
-                # Ottieni le transazioni del giorno
-                if hasattr(self, 'get_monthly_transactions'):
-                    monthly_data = self.get_monthly_transactions(current_date.year, current_date.month)
-                    
-                    # Filtra per il giorno specifico
-                    day_income = [t for t in monthly_data.get('income', []) if t.get('date', '').startswith(date_str)]
-                    day_expenses = [t for t in monthly_data.get('expenses', []) if t.get('date', '').startswith(date_str)]
-                    
-                    # Calcola totali del giorno
-                    total_income = sum([float(t.get('amount', 0)) for t in day_income])
-                    total_expenses = sum([float(t.get('amount', 0)) for t in day_expenses])
-                    net_profit = total_income - total_expenses
-                    transactions_count = len(day_income) + len(day_expenses)
-                    
-                    # Calcola margine di profitto
-                    profit_margin = (net_profit / total_income * 100) if total_income > 0 else 0
-                    
-                    daily_summary = {
-                        'date': date_str,
-                        'total_income': total_income,
-                        'total_expenses': total_expenses,
-                        'net_profit': net_profit,
-                        'profit_margin': profit_margin,
-                        'transactions_count': transactions_count
-                    }
-                    
-                    weekly_data.append(daily_summary)
-                else:
-                    # Fallback se il metodo non esiste
-                    daily_summary = {
-                        'date': date_str,
-                        'total_income': 0,
-                        'total_expenses': 0,
-                        'net_profit': 0,
-                        'profit_margin': 0,
-                        'transactions_count': 0
-                    }
-                    weekly_data.append(daily_summary)
-            
-            return weekly_data
+            # Giorni senza dati: riga a zero
+            return [
+                rollups_by_day.get(day, {
+                    'date': day,
+                    'total_income': 0.0,
+                    'total_expenses': 0.0,
+                    'net_profit': 0.0,
+                    'profit_margin': 0.0,
+                    'transactions_count': 0
+                })
+                for day in days
+            ]
             
         except Exception as e:
             logger.error(f"❌ Errore ottenendo riepilogo settimanale: {e}")
@@ -1115,6 +1658,13 @@ class HybridDatabaseManager:
     def cleanup(self):
         """Pulizia risorse e chiusura connessioni"""
         try:
+            if hasattr(self, '_reference_cache'):
+                self._reference_cache.shutdown()
+            if hasattr(self, '_dashboard_refresher'):
+                self._dashboard_refresher.stop()
+            if hasattr(self, '_fetch_executor'):
+                self._fetch_executor.shutdown(wait=False)
+            
             # Cleanup Supabase
             if hasattr(self, 'supabase_manager') and self.supabase_manager:
                 if hasattr(self.supabase_manager, 'cleanup'):
@@ -1135,7 +1685,10 @@ class HybridDatabaseManager:
         info = {
             'use_supabase': self.use_supabase,
             'supabase_available': SUPABASE_AVAILABLE,
-            'sqlite_available': SQLITE_AVAILABLE
+            'sqlite_available': SQLITE_AVAILABLE,
+            'query_cache': self._query_cache.get_stats(),
+            'reference_cache': self._reference_cache.get_stats(),
+            'dashboard_refresher': self._dashboard_refresher.get_stats()
         }
         
         if self.supabase_manager and hasattr(self.supabase_manager, 'get_connection_info'):
@@ -1145,30 +1698,17 @@ class HybridDatabaseManager:
 
     def get_annual_transactions(self, year: int) -> Dict[str, List[Dict[str, Any]]]:
         """Ottiene tutte le transazioni di un anno specifico"""
-        try:
-            annual_data = {'income': [], 'expenses': []}
-            
-            # Raccoglie dati di tutti i mesi dell'anno
-            for month in range(1, 13):
-                try:
-                    monthly_data = self.get_monthly_transactions(year, month)
-                    annual_data['income'].extend(monthly_data.get('income', []))
-                    annual_data['expenses'].extend(monthly_data.get('expenses', []))
-                    
-                    # Piccolo delay per evitare sovraccarico Supabase
-                    import time
-                    time.sleep(0.1)
-                    
-                except Exception as e:
-                    logger.error(f"❌ Errore ottenendo dati per {month}/{year}: {e}")
-                    continue
-            
-            logger.info(f"✅ Dati annuali ottenuti per {year}: {len(annual_data['income'])} entrate, {len(annual_data['expenses'])} uscite")
-            return annual_data
-            
-        except Exception as e:
-            logger.error(f"❌ Errore ottenendo transazioni annuali per {year}: {e}")
-            return {'income': [], 'expenses': []}
+        annual_data = self.get_transactions_range(f"{year}-01-01", f"{year + 1}-01-01")
+        logger.info(f"✅ Dati annuali ottenuti per {year}: {len(annual_data['income'])} entrate, {len(annual_data['expenses'])} uscite")
+        return annual_data
+    
+    def get_annual_transactions_by_month(self, year: int) -> Dict[int, Dict[str, List[Dict[str, Any]]]]:
+        """Ottiene le transazioni di un anno divise per mese (1-12), con un solo scaricamento"""
+        by_month = self.split_transactions_by_month(self.get_annual_transactions(year))
+        return {
+            month: by_month.get((year, month), {'income': [], 'expenses': []})
+            for month in range(1, 13)
+        }
 
 # Istanza globale
 
@@ -0,0 +1,173 @@
+-- Schema per i report mensili e annuali (rollup di daily_reports)
+-- Mantenuti in modo incrementale da trigger su daily_reports
+-- Da eseguire dopo daily_accounting_schema.sql
+-- Creato da Ezio Camporeale
+
+-- Tabella per i report mensili
+CREATE TABLE IF NOT EXISTS monthly_reports (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL CHECK (month BETWEEN 1 AND 12),
+    total_income DECIMAL(12,2) DEFAULT 0,
+    total_expenses DECIMAL(12,2) DEFAULT 0,
+    net_profit DECIMAL(12,2) DEFAULT 0,
+    profit_margin DECIMAL(7,2) DEFAULT 0,
+    transactions_count INTEGER DEFAULT 0,
+    days_with_data INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (year, month)
+);
+
+-- Tabella per i report annuali
+CREATE TABLE IF NOT EXISTS yearly_reports (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    year INTEGER NOT NULL UNIQUE,
+    total_income DECIMAL(14,2) DEFAULT 0,
+    total_expenses DECIMAL(14,2) DEFAULT 0,
+    net_profit DECIMAL(14,2) DEFAULT 0,
+    profit_margin DECIMAL(7,2) DEFAULT 0,
+    transactions_count INTEGER DEFAULT 0,
+    days_with_data INTEGER DEFAULT 0,
+    months_with_data INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Indici per performance
+CREATE INDEX IF NOT EXISTS idx_monthly_reports_year ON monthly_reports(year);
+
+-- Ricalcola il report annuale dai (massimo 12) report mensili
+CREATE OR REPLACE FUNCTION refresh_yearly_report(p_year INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    DELETE FROM yearly_reports WHERE year = p_year;
+
+    INSERT INTO yearly_reports (year, total_income, total_expenses, net_profit, profit_margin, transactions_count, days_with_data, months_with_data)
+    SELECT
+        p_year,
+        SUM(total_income),
+        SUM(total_expenses),
+        SUM(total_income) - SUM(total_expenses),
+        CASE
+            WHEN SUM(total_income) > 0
+            THEN ((SUM(total_income) - SUM(total_expenses)) / SUM(total_income) * 100)
+            ELSE 0
+        END,
+        SUM(transactions_count),
+        SUM(days_with_data),
+        COUNT(*)
+    FROM monthly_reports
+    WHERE year = p_year
+    HAVING COUNT(*) > 0;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Ricalcola il report mensile dai (massimo 31) report giornalieri, poi l'annuale
+CREATE OR REPLACE FUNCTION refresh_monthly_report(p_year INTEGER, p_month INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    DELETE FROM monthly_reports WHERE year = p_year AND month = p_month;
+
+    INSERT INTO monthly_reports (year, month, total_income, total_expenses, net_profit, profit_margin, transactions_count, days_with_data)
+    SELECT
+        p_year,
+        p_month,
+        SUM(total_income),
+        SUM(total_expenses),
+        SUM(total_income) - SUM(total_expenses),
+        CASE
+            WHEN SUM(total_income) > 0
+            THEN ((SUM(total_income) - SUM(total_expenses)) / SUM(total_income) * 100)
+            ELSE 0
+        END,
+        SUM(transactions_count),
+        COUNT(*)
+    FROM daily_reports
+    WHERE date >= make_date(p_year, p_month, 1)
+      AND date < make_date(p_year, p_month, 1) + INTERVAL '1 month'
+    HAVING COUNT(*) > 0;
+
+    PERFORM refresh_yearly_report(p_year);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Trigger per aggiornare i report mensili e annuali
+CREATE OR REPLACE FUNCTION update_period_reports()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM refresh_monthly_report(EXTRACT(YEAR FROM NEW.date)::INTEGER, EXTRACT(MONTH FROM NEW.date)::INTEGER);
+    END IF;
+
+    -- Se la data cambia mese (o la riga viene eliminata) aggiorna anche il mese precedente
+    IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND date_trunc('month', OLD.date) <> date_trunc('month', NEW.date)) THEN
+        PERFORM refresh_monthly_report(EXTRACT(YEAR FROM OLD.date)::INTEGER, EXTRACT(MONTH FROM OLD.date)::INTEGER);
+    END IF;
+
+    RETURN COALESCE(NEW, OLD);
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_update_period_reports ON daily_reports;
+CREATE TRIGGER trigger_update_period_reports
+    AFTER INSERT OR UPDATE OR DELETE ON daily_reports
+    FOR EACH ROW EXECUTE FUNCTION update_period_reports();
+
+-- Ricostruzione completa (backfill): da chiamare dopo importazioni massive
+CREATE OR REPLACE FUNCTION rebuild_period_reports()
+RETURNS INTEGER AS $$
+DECLARE
+    months_count INTEGER;
+BEGIN
+    -- WHERE true: con pg_safeupdate (attivo su Supabase) un DELETE senza WHERE viene rifiutato
+    DELETE FROM monthly_reports WHERE true;
+    DELETE FROM yearly_reports WHERE true;
+
+    INSERT INTO monthly_reports (year, month, total_income, total_expenses, net_profit, profit_margin, transactions_count, days_with_data)
+    SELECT
+        EXTRACT(YEAR FROM date)::INTEGER,
+        EXTRACT(MONTH FROM date)::INTEGER,
+        SUM(total_income),
+        SUM(total_expenses),
+        SUM(total_income) - SUM(total_expenses),
+        CASE
+            WHEN SUM(total_income) > 0
+            THEN ((SUM(total_income) - SUM(total_expenses)) / SUM(total_income) * 100)
+            ELSE 0
+        END,
+        SUM(transactions_count),
+        COUNT(*)
+    FROM daily_reports
+    GROUP BY 1, 2;
+
+    GET DIAGNOSTICS months_count = ROW_COUNT;
+
+    INSERT INTO yearly_reports (year, total_income, total_expenses, net_profit, profit_margin, transactions_count, days_with_data, months_with_data)
+    SELECT
+        year,
+        SUM(total_income),
+        SUM(total_expenses),
+        SUM(total_income) - SUM(total_expenses),
+        CASE
+            WHEN SUM(total_income) > 0
+            THEN ((SUM(total_income) - SUM(total_expenses)) / SUM(total_income) * 100)
+            ELSE 0
+        END,
+        SUM(transactions_count),
+        SUM(days_with_data),
+        COUNT(*)
+    FROM monthly_reports
+    GROUP BY year;
+
+    RETURN months_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Permessi per le chiamate RPC via PostgREST: la ricostruzione cancella e riscrive tutti i
+-- report, quindi solo service_role (mai anon o authenticated) può eseguirla
+REVOKE EXECUTE ON FUNCTION rebuild_period_reports() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION rebuild_period_reports() TO service_role;
+
+-- Popola le tabelle con i dati già presenti
+SELECT rebuild_period_reports();
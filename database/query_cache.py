@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Query Cache per Dashboard Gestión Carnicería
+Cache read-through con TTL per tabella, limite LRU e invalidazione sulle scritture
+Creato da Ezio Camporeale
+"""
+
+import copy
+import functools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# TTL (secondi) per tabella: i dati di riferimento cambiano raramente,
+# le transazioni vengono comunque invalidate ad ogni scrittura
+DEFAULT_TABLE_TTL = {
+    'accounting_categories': 600,
+    'roles': 600,
+    'product_categories': 600,
+    'units_of_measure': 600,
+    'users': 300,
+    'customers': 300,
+    'suppliers': 300,
+    'products': 300,
+    'orders': 120,
+    'sales': 120,
+    'daily_income': 60,
+    'daily_expenses': 60,
+    'daily_reports': 60,
+    'monthly_reports': 60,
+    'yearly_reports': 60,
+    'excel_data': 300,
+}
+DEFAULT_TTL = 60
+DEFAULT_MAX_ENTRIES = 256
+
+# Attributi del manager che ricevono invalidate(tables) dopo ogni scrittura (in quest'ordine)
+INVALIDATION_TARGETS = ('_query_cache', '_reference_cache', '_dashboard_refresher')
+
+
+def is_empty_result(value: Any) -> bool:
+    """Risultato vuoto (None, lista o dizionario vuoti): i metodi del manager ibrido restituiscono
+    così anche gli errori, quindi questi valori non vengono mai messi in cache"""
+    return value is None or (isinstance(value, (list, tuple, dict, set)) and not value)
+
+
+class QueryCache:
+    """Cache LRU con scadenza per voce e indice tabella -> chiavi"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, table_ttl: Dict[str, int] = None,
+                 default_ttl: int = DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.table_ttl = dict(DEFAULT_TABLE_TTL if table_ttl is None else table_ttl)
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[Tuple, Tuple[Any, float, Tuple[str, ...]]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def ttl_for(self, tables: Iterable[str]) -> int:
+        """TTL di una voce: il più breve tra quelli delle tabelle lette"""
+        ttls = [self.table_ttl.get(table, self.default_ttl) for table in tables]
+        return min(ttls) if ttls else self.default_ttl
+
+    def versions_of(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        """Version stamp delle tabelle: cambia ad ogni invalidate"""
+        with self._lock:
+            return tuple(self._versions.get(table, 0) for table in tables)
+
+    def get(self, key: Tuple) -> Tuple[bool, Any]:
+        """Restituisce (trovato, valore); le voci scadute vengono rimosse"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+
+            value, expires_at, _ = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, copy.deepcopy(value)
+
+    def set(self, key: Tuple, value: Any, tables: Tuple[str, ...], versions: Optional[Tuple[int, ...]] = None):
+        """Salva una voce, eliminando le meno usate oltre il limite.
+        Con versions (letto prima della query) la voce viene scartata se nel frattempo
+        una scrittura ha invalidato una delle tabelle."""
+        with self._lock:
+            if versions is not None and self.versions_of(tables) != versions:
+                return
+            expires_at = time.monotonic() + self.ttl_for(tables)
+            self._entries[key] = (copy.deepcopy(value), expires_at, tables)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, tables: Iterable[str]) -> int:
+        """Incrementa la versione delle tabelle ed elimina tutte le voci che ne dipendono"""
+        tables = set(tables)
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+            stale_keys = [key for key, (_, _, entry_tables) in self._entries.items()
+                          if tables.intersection(entry_tables)]
+            for key in stale_keys:
+                del self._entries[key]
+            self.invalidations += len(stale_keys)
+            return len(stale_keys)
+
+    def clear(self):
+        """Svuota la cache (le versioni restano valide)"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistiche della cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups * 100, 1) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+
+class ReferenceDataCache:
+    """Cache condivisa (per processo) dei dati di riferimento, con version stamp per tabella.
+
+    Alla scadenza restituisce subito l'ultima copia e la ricarica in background;
+    una scrittura incrementa la versione delle tabelle e scarta le copie esistenti.
+    """
+
+    def __init__(self, table_ttl: Dict[str, int] = None, default_ttl: int = DEFAULT_TTL, max_workers: int = 2):
+        self.table_ttl = dict(DEFAULT_TABLE_TTL if table_ttl is None else table_ttl)
+        self.default_ttl = default_ttl
+        self._entries: Dict[Tuple, Dict[str, Any]] = {}
+        self._versions: Dict[str, int] = {}
+        self._refreshing = set()
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='reference-refresh')
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    def _versions_of(self, tables: Tuple[str, ...]) -> Tuple[int, ...]:
+        return tuple(self._versions.get(table, 0) for table in tables)
+
+    def _ttl_for(self, tables: Tuple[str, ...]) -> int:
+        ttls = [self.table_ttl.get(table, self.default_ttl) for table in tables]
+        return min(ttls) if ttls else self.default_ttl
+
+    def _store(self, key: Tuple, tables: Tuple[str, ...], versions: Tuple[int, ...], value: Any):
+        """Salva il valore solo se nessuna scrittura è avvenuta durante il caricamento"""
+        with self._lock:
+            if self._versions_of(tables) != versions:
+                return
+            self._entries[key] = {
+                'value': copy.deepcopy(value),
+                'loaded_at': time.monotonic(),
+                'versions': versions,
+                'tables': tables
+            }
+
+    def _refresh(self, key: Tuple, tables: Tuple[str, ...], versions: Tuple[int, ...], loader: Callable[[], Any]):
+        try:
+            value = loader()
+            # Un caricamento fallito (lista vuota) non sostituisce l'ultima copia valida
+            if is_empty_result(value):
+                with self._lock:
+                    self.refresh_errors += 1
+                return
+            self._store(key, tables, versions, value)
+            with self._lock:
+                self.refreshes += 1
+        except Exception as e:
+            with self._lock:
+                self.refresh_errors += 1
+            logger.error(f"❌ Errore aggiornando dati di riferimento {key[0]}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get_or_load(self, key: Tuple, tables: Tuple[str, ...], loader: Callable[[], Any]) -> Any:
+        """Restituisce il valore in cache, caricandolo (o ricaricandolo in background) se necessario"""
+        with self._lock:
+            versions = self._versions_of(tables)
+            entry = self._entries.get(key)
+            if entry and entry['versions'] == versions:
+                age = time.monotonic() - entry['loaded_at']
+                if age < self._ttl_for(tables):
+                    self.hits += 1
+                else:
+                    self.stale_hits += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        self._executor.submit(self._refresh, key, tables, versions, loader)
+                return copy.deepcopy(entry['value'])
+            self.misses += 1
+
+        value = loader()
+        # Anche al primo caricamento un risultato vuoto (forse un errore) non viene salvato
+        if not is_empty_result(value):
+            self._store(key, tables, versions, value)
+        return copy.deepcopy(value)
+
+    def invalidate(self, tables: Iterable[str]) -> int:
+        """Incrementa la versione delle tabelle ed elimina le copie che ne dipendono"""
+        tables = set(tables)
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+            stale_keys = [key for key, entry in self._entries.items() if tables.intersection(entry['tables'])]
+            for key in stale_keys:
+                del self._entries[key]
+            return len(stale_keys)
+
+    def clear(self):
+        """Svuota la cache (le versioni restano valide)"""
+        with self._lock:
+            self._entries.clear()
+
+    def shutdown(self):
+        """Ferma il pool dei refresh in background"""
+        self._executor.shutdown(wait=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistiche della cache"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'refreshes': self.refreshes,
+                'refresh_errors': self.refresh_errors,
+                'versions': dict(self._versions)
+            }
+
+
+def _cache_key(method_name: str, args: tuple, kwargs: dict) -> Tuple:
+    return (method_name, args, tuple(sorted(kwargs.items())))
+
+
+def cached_query(*tables: str) -> Callable:
+    """Decoratore read-through: il risultato del metodo viene salvato in self._query_cache
+    e dipende dalle tabelle indicate"""
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            cache: Optional[QueryCache] = getattr(self, '_query_cache', None)
+            if cache is None:
+                return method(self, *args, **kwargs)
+
+            try:
+                key = _cache_key(method.__name__, args, kwargs)
+                hash(key)
+            except TypeError:
+                # Argomenti non hashabili: nessuna cache
+                return method(self, *args, **kwargs)
+
+            found, value = cache.get(key)
+            if found:
+                return value
+
+            # Versioni lette prima della query: una scrittura concorrente impedisce di salvare dati vecchi
+            versions = cache.versions_of(tables)
+            value = method(self, *args, **kwargs)
+            # Un risultato vuoto può essere un errore nascosto dal metodo: non resta in cache per tutto il TTL
+            if not is_empty_result(value):
+                cache.set(key, value, tables, versions)
+            return copy.deepcopy(value)
+        # Tabelle lette dal metodo: usate da run_async_batch per condividere le stesse voci
+        wrapper.cache_tables = tables
+        return wrapper
+    return decorator
+
+
+def reference_data(*tables: str) -> Callable:
+    """Decoratore per i dati di riferimento: il risultato è condiviso tra tutte le sessioni
+    tramite self._reference_cache e ricaricato in background alla scadenza"""
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            cache: Optional[ReferenceDataCache] = getattr(self, '_reference_cache', None)
+            if cache is None:
+                return method(self, *args, **kwargs)
+
+            try:
+                key = _cache_key(method.__name__, args, kwargs)
+                hash(key)
+            except TypeError:
+                return method(self, *args, **kwargs)
+
+            return cache.get_or_load(key, tables, lambda: method(self, *args, **kwargs))
+        return wrapper
+    return decorator
+
+
+def invalidates(*tables: str) -> Callable:
+    """Decoratore per i metodi di scrittura: invalida le voci che dipendono dalle tabelle"""
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                for cache_attr in INVALIDATION_TARGETS:
+                    cache = getattr(self, cache_attr, None)
+                    if cache is not None:
+                        removed = cache.invalidate(tables)
+                        if removed:
+                            logger.debug(f"🧹 Cache: {removed} voci invalidate da {method.__name__}")
+        return wrapper
+    return decorator
@@ -6,7 +6,7 @@ Creato da Ezio Camporeale
 """
 
 import logging
-from typing import List, Dict, Optional, Any, Union
+from typing import List, Dict, Optional, Any, Union, Iterator, Tuple
 from datetime import datetime, timedelta
 import json
 import sys
@@ -19,6 +19,7 @@ current_dir = Path(__file__).parent.parent
 sys.path.append(str(current_dir))
 
 from config.supabase_config import SupabaseConfig
+from database.bulk_insert import DEFAULT_CHUNK_SIZE, merge_supplier_totals, prepare_transaction_rows, run_chunks
 
 # Configurazione logging
 logging.basicConfig(level=logging.INFO)
@@ -111,25 +112,7 @@ class SupabaseManager:
         
         try:
             query = self.client.table(table).select(columns)
-            
-            if filters:
-                for key, value in filters.items():
-                    # Gestisce filtri di range per le date
-                    if key.endswith('__gte'):
-                        column_name = key.replace('__gte', '')
-                        query = query.gte(column_name, value)
-                    elif key.endswith('__lte'):
-                        column_name = key.replace('__lte', '')
-                        query = query.lte(column_name, value)
-                    elif key.endswith('__lt'):
-                        column_name = key.replace('__lt', '')
-                        query = query.lt(column_name, value)
-                    elif key.endswith('__gt'):
-                        column_name = key.replace('__gt', '')
-                        query = query.gt(column_name, value)
-                    else:
-                        # Filtro normale con eq
-                        query = query.eq(key, value)
+            query = self._apply_filters(query, filters)
             
             if order_by:
                 query = query.order(order_by)
@@ -139,11 +122,100 @@ class SupabaseManager:
             
             result = query.execute()
             return result.data if result.data else []
-            
+        
         except Exception as e:
             logger.error(f"❌ Errore selezione da {table}: {e}")
             return []
     
+    def _apply_filters(self, query, filters: Dict = None):
+        """Applica i filtri (col, col__gte, col__lte, col__lt, col__gt, col__in) a una query"""
+        if filters:
+            for key, value in filters.items():
+                # Gestisce filtri di range per le date
+                if key.endswith('__gte'):
+                    column_name = key.replace('__gte', '')
+                    query = query.gte(column_name, value)
+                elif key.endswith('__lte'):
+                    column_name = key.replace('__lte', '')
+                    query = query.lte(column_name, value)
+                elif key.endswith('__lt'):
+                    column_name = key.replace('__lt', '')
+                    query = query.lt(column_name, value)
+                elif key.endswith('__gt'):
+                    column_name = key.replace('__gt', '')
+                    query = query.gt(column_name, value)
+                elif key.endswith('__in'):
+                    column_name = key.replace('__in', '')
+                    query = query.in_(column_name, list(value))
+                else:
+                    # Filtro normale con eq
+                    query = query.eq(key, value)
+        return query
+    
+    def select_iter(self, table: str, columns: str = "*", filters: Dict = None, batch_size: int = 1000,
+                    keyset: Union[str, Tuple[str, str], None] = 'id', order_by: str = None) -> Iterator[List[Dict]]:
+        """Legge una tabella a blocchi di batch_size righe, oltre il limite max-rows di PostgREST.
+        
+        Con keyset ('id' oppure ('date', 'id')) ogni pagina riparte dall'ultima chiave letta;
+        con keyset=None usa la paginazione per intervallo (range) ordinata per order_by.
+        Le colonne della chiave vengono aggiunte alla proiezione se mancano.
+        """
+        if not self.is_connected():
+            logger.error("❌ Supabase non connesso")
+            return
+        
+        key_columns = (keyset,) if isinstance(keyset, str) else tuple(keyset or ())
+        if columns.strip() != '*':
+            selected = [column.strip() for column in columns.split(',')]
+            columns = ', '.join(selected + [column for column in key_columns if column not in selected])
+        
+        last_key = None
+        offset = 0
+        
+        while True:
+            query = self._apply_filters(self.client.table(table).select(columns), filters)
+            
+            if key_columns:
+                if last_key is not None:
+                    if len(key_columns) == 1:
+                        query = query.gt(key_columns[0], last_key[0])
+                    else:
+                        # (a, b) > (x, y)  ->  a > x OR (a = x AND b > y)
+                        first, second = key_columns
+                        query = query.or_(f"{first}.gt.{last_key[0]},and({first}.eq.{last_key[0]},{second}.gt.{last_key[1]})")
+                for column in key_columns:
+                    query = query.order(column)
+                query = query.limit(batch_size)
+            else:
+                if order_by:
+                    query = query.order(order_by)
+                query = query.range(offset, offset + batch_size - 1)
+            
+            batch = query.execute().data or []
+            
+            # Ultima pagina: solo una pagina vuota. Una pagina corta non basta, perché il
+            # max-rows del server può essere inferiore a batch_size
+            if not batch:
+                break
+            yield batch
+            
+            offset += len(batch)
+            if key_columns:
+                last_key = tuple(batch[-1][column] for column in key_columns)
+    
+    def select_all(self, table: str, columns: str = "*", filters: Dict = None, batch_size: int = 1000,
+                   keyset: Union[str, Tuple[str, str], None] = 'id', order_by: str = None) -> List[Dict]:
+        """Come select_iter, ma restituisce tutte le righe in una lista"""
+        try:
+            return [
+                row
+                for batch in self.select_iter(table, columns, filters, batch_size, keyset, order_by)
+                for row in batch
+            ]
+        except Exception as e:
+            logger.error(f"❌ Errore selezione paginata da {table}: {e}")
+            return []
+    
     def insert(self, table: str, data: Dict) -> Optional[Dict]:
         """Inserisce un record in una tabella"""
         if not self.is_connected():
@@ -204,6 +276,12 @@ class SupabaseManager:
             
             today = datetime.now().date().isoformat()
             
+            # Tutti i KPI in una sola chiamata (vedi database/dashboard_stats_function.sql)
+            kpis = self.rpc('get_dashboard_stats', {'p_date': today})
+            if kpis:
+                return self._build_dashboard_stats(kpis[0])
+            
+            # Fallback se la funzione RPC non è installata: query separate
             # Ottieni entrate di oggi (vendite)
             income_today_result = self.client.table('daily_income').select('*').eq('date', today).execute()
             income_today = income_today_result.data if income_today_result.data else []
@@ -248,6 +326,23 @@ class SupabaseManager:
             logger.error(f"❌ Errore ottenendo statistiche dashboard: {e}")
             return self._get_empty_stats()
     
+    def _build_dashboard_stats(self, kpis: Dict[str, Any]) -> Dict[str, Any]:
+        """Converte la riga della funzione RPC get_dashboard_stats nel formato dashboard"""
+        customers_count = int(kpis.get('customers_count') or 0)
+        income_categories_count = int(kpis.get('income_categories_count') or 0)
+        
+        return {
+            'sales_today': {'count': int(kpis.get('sales_today_count') or 0), 'total': float(kpis.get('sales_today_total') or 0)},
+            'orders_today': {'count': int(kpis.get('orders_today_count') or 0), 'total': float(kpis.get('orders_today_total') or 0)},
+            'total_customers': customers_count,
+            'total_products': income_categories_count,
+            'total_sales': float(kpis.get('total_sales') or 0),
+            'products_count': income_categories_count,
+            'low_stock_products': 0,  # Non più rilevante
+            'customers_count': customers_count,
+            'last_update': datetime.now().isoformat()
+        }
+    
     def _get_empty_stats(self) -> Dict[str, Any]:
         """Ritorna statistiche vuote"""
         return {
@@ -262,60 +357,65 @@ class SupabaseManager:
             'last_update': datetime.now().isoformat()
         }
     
-    def get_products_low_stock(self) -> List[Dict]:
-        """Ottiene prodotti con stock basso (ora usa categorie di entrata)"""
+    def get_inventory_alerts(self, days: int = 7) -> Dict[str, List[Dict]]:
+        """Ottiene in un solo passaggio gli avvisi stock basso e scadenze (ora usa categorie di entrata)"""
+        alerts = {'low_stock': [], 'expiring_soon': []}
         try:
+            if not self.is_connected():
+                logger.error("❌ Supabase non connesso")
+                return alerts
+            
             # Ora usa le categorie di entrata come "prodotti"
             categories_result = self.client.table('accounting_categories').select('*').eq('is_active', True).eq('type', 'income').execute()
             categories = categories_result.data if categories_result.data else []
             
-            # Simula stock basso per categorie senza entrate recenti
-            low_stock = []
+            # Una sola query sulle entrate degli ultimi 7 giorni
+            now = datetime.now()
+            week_ago = (now - timedelta(days=7)).date().isoformat()
+            three_days_ago = (now - timedelta(days=3)).date().isoformat()
+            # Indice categoria -> data ultima vendita (lettura a blocchi, oltre il limite max-rows)
+            last_sale_by_category = {}
+            for batch in self.select_iter('daily_income', 'category, date', filters={'date__gte': week_ago}):
+                for income in batch:
+                    sale_date = str(income.get('date', ''))[:10]
+                    if sale_date > last_sale_by_category.get(income.get('category'), ''):
+                        last_sale_by_category[income.get('category')] = sale_date
+            
+            expiry_date = (now + timedelta(days=days)).date().isoformat()
             for category in categories:
-                # Controlla se ci sono entrate negli ultimi 7 giorni
-                week_ago = (datetime.now() - timedelta(days=7)).date().isoformat()
-                income_result = self.client.table('daily_income').select('amount').eq('category', category['name']).gte('date', week_ago).execute()
+                last_sale = last_sale_by_category.get(category['name'])
                 
-                if not income_result.data:
-                    low_stock.append({
+                # Simula stock basso per categorie senza entrate negli ultimi 7 giorni
+                if last_sale is None:
+                    alerts['low_stock'].append({
                         'name': category['name'],
                         'current_stock': 0,
                         'min_stock_level': 10,
                         'icon': category['icon']
                     })
-            
-            return low_stock
-        except Exception as e:
-            logger.error(f"❌ Errore ottenendo prodotti stock basso: {e}")
-            return []
-    
-    def get_products_expiring_soon(self, days: int = 7) -> List[Dict]:
-        """Ottiene prodotti in scadenza (ora usa categorie di entrata)"""
-        try:
-            # Ora usa le categorie di entrata come "prodotti"
-            categories_result = self.client.table('accounting_categories').select('*').eq('is_active', True).eq('type', 'income').execute()
-            categories = categories_result.data if categories_result.data else []
-            
-            # Simula prodotti in scadenza per categorie senza entrate recenti
-            expiring = []
-            for category in categories:
-                # Controlla se ci sono entrate negli ultimi 3 giorni
-                three_days_ago = (datetime.now() - timedelta(days=3)).date().isoformat()
-                income_result = self.client.table('daily_income').select('amount').eq('category', category['name']).gte('date', three_days_ago).execute()
                 
-                if not income_result.data:
-                    expiring.append({
+                # Simula prodotti in scadenza per categorie senza entrate negli ultimi 3 giorni
+                if last_sale is None or last_sale < three_days_ago:
+                    alerts['expiring_soon'].append({
                         'name': category['name'],
-                        'expiry_date': (datetime.now() + timedelta(days=days)).date().isoformat(),
+                        'expiry_date': expiry_date,
                         'current_stock': 0,
                         'min_stock_level': 10,
                         'icon': category['icon']
                     })
             
-            return expiring
+            return alerts
         except Exception as e:
-            logger.error(f"❌ Errore ottenendo prodotti in scadenza: {e}")
-            return []
+            logger.error(f"❌ Errore ottenendo avvisi inventario: {e}")
+            return alerts
+    
+    def get_products_low_stock(self) -> List[Dict]:
+        """Ottiene prodotti con stock basso (ora usa categorie di entrata)"""
+        return self.get_inventory_alerts()['low_stock']
+    
+    def get_products_expiring_soon(self, days: int = 7) -> List[Dict]:
+        """Ottiene prodotti in scadenza (ora usa categorie di entrata)"""
+        return self.get_inventory_alerts(days)['expiring_soon']
     
     def get_sales_by_period(self, start_date=None, end_date=None, period: str = 'month') -> List[Dict]:
         """Ottiene vendite per periodo - compatibile con entrambe le firme"""
@@ -417,6 +517,18 @@ class SupabaseManager:
             logger.error(f"❌ Errore ottenendo unità di misura: {e}")
             return []
     
+    def _group_rows_by_category(self, table: str, columns: str, category_names: List[str]) -> Dict[str, List[Dict]]:
+        """Scarica le righe delle categorie indicate (paginate, oltre il limite max-rows) e le raggruppa per categoria"""
+        grouped = {name: [] for name in category_names}
+        if not category_names:
+            return grouped
+        
+        for batch in self.select_iter(table, columns, filters={'category__in': category_names}):
+            for row in batch:
+                grouped.setdefault(row.get('category'), []).append(row)
+        
+        return grouped
+    
     def get_all_products(self) -> List[Dict]:
         """Ottiene tutti i prodotti (ora usa categorie di entrata)"""
         try:
@@ -428,12 +540,17 @@ class SupabaseManager:
             categories_result = self.client.table('accounting_categories').select('*').eq('is_active', True).eq('type', 'income').execute()
             categories = categories_result.data if categories_result.data else []
             
+            # Una sola query per tutte le categorie, raggruppata in memoria
+            income_by_category = self._group_rows_by_category(
+                'daily_income', 'category, amount', [c['name'] for c in categories]
+            )
+            
             # Converti le categorie in formato "prodotti"
             all_products = []
             for category in categories:
                 # Ottieni statistiche per questa categoria
-                income_result = self.client.table('daily_income').select('amount').eq('category', category['name']).execute()
-                total_sales = sum([i['amount'] for i in income_result.data]) if income_result.data else 0
+                income_rows = income_by_category.get(category['name'], [])
+                total_sales = sum([i['amount'] for i in income_rows]) if income_rows else 0
                 
                 product_record = {
                     'id': category['id'],
@@ -473,13 +590,18 @@ class SupabaseManager:
             categories_result = self.client.table('accounting_categories').select('*').eq('is_active', True).eq('type', 'expense').execute()
             categories = categories_result.data if categories_result.data else []
             
+            # Una sola query per tutte le categorie, raggruppata in memoria
+            expenses_by_category = self._group_rows_by_category(
+                'daily_expenses', 'category, amount, supplier', [c['name'] for c in categories]
+            )
+            
             # Converti le categorie in formato "fornitori"
             all_suppliers = []
             for category in categories:
                 # Ottieni statistiche per questa categoria
-                expense_result = self.client.table('daily_expenses').select('amount, supplier').eq('category', category['name']).execute()
-                total_amount = sum([e['amount'] for e in expense_result.data]) if expense_result.data else 0
-                suppliers = list(set([e['supplier'] for e in expense_result.data if e['supplier']]))
+                expense_rows = expenses_by_category.get(category['name'], [])
+                total_amount = sum([e['amount'] for e in expense_rows]) if expense_rows else 0
+                suppliers = list(set([e['supplier'] for e in expense_rows if e['supplier']]))
                 
                 supplier_record = {
                     'id': category['id'],
@@ -490,7 +612,7 @@ class SupabaseManager:
                     'address': 'Dirección no especificada',
                     'cuit': '',
                     'total_amount': float(total_amount),
-                    'transactions_count': int(len(expense_result.data)) if expense_result.data else 0,
+                    'transactions_count': int(len(expense_rows)),
                     'is_active': category['is_active'],
                     'created_at': category['created_at'],
                     'icon': category['icon'],
@@ -1293,6 +1415,62 @@ class SupabaseManager:
             logger.error(f"❌ Errore aggiungendo uscita: {e}")
             return None
     
+    def add_daily_incomes_bulk(self, rows: List[Dict[str, Any]], batch_id: str = None,
+                               chunk_size: int = DEFAULT_CHUNK_SIZE, progress_callback=None) -> Dict[str, Any]:
+        """Aggiunge molte entrate con inserimenti multi-riga a blocchi (idempotenti su import_key)"""
+        return self._bulk_insert_transactions('daily_income', 'income', rows, batch_id, chunk_size, progress_callback)
+    
+    def add_daily_expenses_bulk(self, rows: List[Dict[str, Any]], batch_id: str = None,
+                                chunk_size: int = DEFAULT_CHUNK_SIZE, progress_callback=None) -> Dict[str, Any]:
+        """Aggiunge molte uscite con inserimenti multi-riga a blocchi (idempotenti su import_key)"""
+        return self._bulk_insert_transactions('daily_expenses', 'expenses', rows, batch_id, chunk_size, progress_callback)
+    
+    def _bulk_insert_transactions(self, table: str, kind: str, rows: List[Dict[str, Any]], batch_id: str,
+                                  chunk_size: int, progress_callback) -> Dict[str, Any]:
+        """Un upsert per blocco: le righe con import_key già presente vengono ignorate (retry sicuri)"""
+        if not self.is_connected():
+            logger.error("❌ Supabase non connesso")
+            return {'total': len(rows), 'inserted': 0, 'skipped': 0, 'failed': len(rows), 'chunks': 0,
+                    'retries': 0, 'elapsed_seconds': 0, 'rows_per_second': 0}
+        
+        prepared = prepare_transaction_rows(rows, kind, batch_id)
+        
+        def insert_chunk(chunk):
+            result = (
+                self.client.table(table)
+                .upsert(chunk, on_conflict='import_key', ignore_duplicates=True)
+                .execute()
+            )
+            return len(result.data or [])
+        
+        return run_chunks(prepared, insert_chunk, chunk_size, label=table, progress_callback=progress_callback)
+    
+    def upsert_suppliers_bulk(self, suppliers: List[Dict[str, Any]], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                              progress_callback=None) -> Dict[str, Any]:
+        """Crea o aggiorna i fornitori per nome con un upsert per blocco; restituisce 'inserted' (nuovi)
+        e 'updated' (già presenti).
+        
+        I totali sono quelli completi di ogni fornitore nell'intero libro e sostituiscono quelli salvati
+        (ripetere l'importazione è idempotente): da non usare con i dati di una parte del libro.
+        I nomi ripetuti nella lista vengono sommati prima della scrittura.
+        """
+        if not self.is_connected():
+            logger.error("❌ Supabase non connesso")
+            return {'total': len(suppliers), 'inserted': 0, 'updated': 0, 'skipped': 0, 'failed': len(suppliers),
+                    'chunks': 0, 'retries': 0, 'elapsed_seconds': 0, 'rows_per_second': 0}
+        
+        records = merge_supplier_totals(suppliers)
+        
+        def upsert_chunk(chunk):
+            # Nomi già presenti prima dell'upsert: quelle righe sono aggiornamenti, non inserimenti
+            existing = self.client.table('suppliers').select('name').in_('name', [row['name'] for row in chunk]).execute()
+            result = self.client.table('suppliers').upsert(chunk, on_conflict='name').execute()
+            return len(result.data or []) - len(existing.data or [])
+        
+        stats = run_chunks(records, upsert_chunk, chunk_size, label='suppliers', progress_callback=progress_callback)
+        stats['updated'], stats['skipped'] = stats['skipped'], 0
+        return stats
+    
     def get_daily_entries(self, date: str = None) -> Dict:
         """Ottiene tutte le entrate e uscite di un giorno"""
         try:
@@ -1425,6 +1603,21 @@ class SupabaseManager:
             else:
                 end_date = f"{year}-{month + 1:02d}-01"
             
+            # Rollup mensile già calcolato (vedi database/period_reports_schema.sql)
+            monthly_reports = self.get_monthly_reports(year, month)
+            if monthly_reports:
+                report = monthly_reports[0]
+                return {
+                    'year': year,
+                    'month': month,
+                    'total_income': float(report['total_income']),
+                    'total_expenses': float(report['total_expenses']),
+                    'total_profit': float(report['net_profit']),
+                    'profit_margin': float(report['profit_margin']),
+                    'total_transactions': int(report['transactions_count']),
+                    'days_with_data': int(report['days_with_data'])
+                }
+            
             # Ottieni tutti i report del mese
             reports = self.select('daily_reports', filters={'date__gte': start_date, 'date__lt': end_date})
             
@@ -1451,6 +1644,107 @@ class SupabaseManager:
             logger.error(f"❌ Errore ottenendo riepilogo mensile: {e}")
             return {}
     
+    def get_transactions_page(self, kind: str, start_date: str, end_date: str, category: str = None,
+                              search: str = None, sort: str = 'date', descending: bool = False,
+                              after_value=None, after_id=None, limit: int = 50) -> List[Dict]:
+        """Ottiene una pagina di transazioni (keyset) con totale progressivo calcolato dal database"""
+        rows = self.rpc('get_transactions_page', {
+            'p_kind': kind,
+            'p_start': start_date,
+            'p_end': end_date,
+            'p_category': category,
+            'p_search': search,
+            'p_sort': sort,
+            'p_descending': descending,
+            'p_after_value': str(after_value) if after_value is not None else None,
+            'p_after_id': after_id,
+            'p_limit': limit
+        })
+        if rows is not None:
+            return rows
+        
+        # Fallback se la funzione RPC non è installata: stessa pagina calcolata dal client
+        logger.warning("⚠️ Funzione RPC get_transactions_page non disponibile (eseguire "
+                       "database/transactions_page_function.sql): paginazione calcolata dal client")
+        return self._get_transactions_page_fallback(
+            kind, start_date, end_date, category, search, sort, descending, after_value, after_id, limit
+        )
+    
+    def _get_transactions_page_fallback(self, kind: str, start_date: str, end_date: str, category: str,
+                                        search: str, sort: str, descending: bool, after_value, after_id,
+                                        limit: int) -> List[Dict]:
+        """Legge il periodo filtrato a blocchi (keyset su date, id) e ne ricava pagina,
+        totale progressivo e conteggio come la funzione RPC get_transactions_page"""
+        table = 'daily_expenses' if kind == 'expenses' else 'daily_income'
+        columns = 'id, date, amount, category, description, payment_method'
+        if kind == 'expenses':
+            columns += ', supplier'
+        filters = {'date__gte': start_date, 'date__lt': end_date}
+        if category:
+            filters['category'] = category
+        rows = self.select_all(table, columns, filters, keyset=('date', 'id'))
+        if search:
+            needle = search.lower()
+            rows = [row for row in rows if needle in (row.get('description') or '').lower()]
+        
+        def sort_key(row):
+            value = float(row.get('amount') or 0) if sort == 'amount' else str(row.get('date'))[:10]
+            return value, str(row.get('id'))
+        
+        rows.sort(key=sort_key, reverse=descending)
+        
+        # La pagina parte dalla prima riga dopo il cursore (ordine di visualizzazione)
+        page_start = 0
+        if after_value is not None:
+            cursor = (float(after_value) if sort == 'amount' else str(after_value)[:10], str(after_id))
+            page_start = next(
+                (index for index, row in enumerate(rows)
+                 if (sort_key(row) < cursor if descending else sort_key(row) > cursor)),
+                len(rows)
+            )
+        
+        running_total = sum(float(row.get('amount') or 0) for row in rows[:page_start])
+        page = []
+        for row in rows[page_start:page_start + limit]:
+            running_total += float(row.get('amount') or 0)
+            page.append(dict(row, supplier=row.get('supplier'), running_total=running_total, total_count=len(rows)))
+        return page
+    
+    def get_monthly_reports(self, year: int, month: int = None) -> List[Dict]:
+        """Ottiene i report mensili di un anno (o di un solo mese)"""
+        filters = {'year': year}
+        if month:
+            filters['month'] = month
+        return self.select('monthly_reports', filters=filters, order_by='month')
+    
+    def get_yearly_report(self, year: int) -> Dict:
+        """Ottiene il report annuale"""
+        reports = self.select('yearly_reports', filters={'year': year})
+        return reports[0] if reports else {}
+    
+    def rebuild_period_reports(self) -> int:
+        """Ricostruisce tutti i report mensili e annuali da daily_reports (backfill)
+        
+        La funzione SQL è eseguibile solo dal ruolo service_role: la chiamata usa un client
+        dedicato con SUPABASE_SERVICE_ROLE_KEY, mai la chiave anon dell'app.
+        """
+        service_key = self.config.get_service_role_key()
+        if not service_key:
+            logger.error("❌ SUPABASE_SERVICE_ROLE_KEY non configurata: impossibile ricostruire i report "
+                         "(in alternativa eseguire SELECT rebuild_period_reports(); dall'editor SQL)")
+            return 0
+        try:
+            from supabase import create_client
+            service_client = create_client(self.config.SUPABASE_URL, service_key)
+            months_count = service_client.rpc('rebuild_period_reports', {}).execute().data
+        except Exception as e:
+            logger.error(f"❌ Errore chiamata RPC 'rebuild_period_reports': {e}")
+            return 0
+        if months_count is None:
+            return 0
+        logger.info(f"✅ Report mensili ricostruiti: {months_count} mesi")
+        return int(months_count)
+    
     def delete_daily_entry(self, entry_type: str, entry_id: str) -> bool:
         """Elimina un'entrata o uscita giornaliera"""
         try:
@@ -1661,11 +1955,11 @@ class SupabaseManager:
         try:
             backup = {
                 'timestamp': datetime.now().isoformat(),
-                'products': self.select('products'),
-                'customers': self.select('customers'),
-                'sales': self.select('sales'),
-                'suppliers': self.select('suppliers'),
-                'employees': self.select('employees')
+                'products': self.select_all('products'),
+                'customers': self.select_all('customers'),
+                'sales': self.select_all('sales'),
+                'suppliers': self.select_all('suppliers'),
+                'employees': self.select_all('employees')
             }
             return backup
         except Exception as e:
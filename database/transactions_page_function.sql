@@ -0,0 +1,79 @@
+-- Funzione RPC per la navigazione paginata delle transazioni (keyset su colonna di ordinamento + id)
+-- Filtri, ordinamento e totale progressivo calcolati dal database
+-- Da eseguire dopo daily_accounting_schema.sql
+-- Creato da Ezio Camporeale
+
+-- Indici per la paginazione keyset
+CREATE INDEX IF NOT EXISTS idx_daily_income_date_id ON daily_income(date, id);
+CREATE INDEX IF NOT EXISTS idx_daily_expenses_date_id ON daily_expenses(date, id);
+
+CREATE OR REPLACE FUNCTION get_transactions_page(
+    p_kind TEXT,                       -- 'income' oppure 'expenses'
+    p_start DATE,
+    p_end DATE,                        -- esclusa
+    p_category TEXT DEFAULT NULL,
+    p_search TEXT DEFAULT NULL,
+    p_sort TEXT DEFAULT 'date',        -- 'date' oppure 'amount'
+    p_descending BOOLEAN DEFAULT FALSE,
+    p_after_value TEXT DEFAULT NULL,   -- cursore: valore di ordinamento dell'ultima riga letta
+    p_after_id UUID DEFAULT NULL,      -- cursore: id dell'ultima riga letta
+    p_limit INTEGER DEFAULT 50
+)
+RETURNS TABLE (
+    id UUID,
+    date DATE,
+    amount NUMERIC,
+    category TEXT,
+    description TEXT,
+    supplier TEXT,
+    payment_method TEXT,
+    running_total NUMERIC,
+    total_count BIGINT
+) AS $$
+DECLARE
+    v_table TEXT := CASE WHEN p_kind = 'expenses' THEN 'daily_expenses' ELSE 'daily_income' END;
+    v_supplier TEXT := CASE WHEN p_kind = 'expenses' THEN 't.supplier::TEXT' ELSE 'NULL::TEXT' END;
+    v_sort TEXT := CASE WHEN p_sort = 'amount' THEN 'amount' ELSE 'date' END;
+    v_cast TEXT := CASE WHEN p_sort = 'amount' THEN 'NUMERIC' ELSE 'DATE' END;
+    v_direction TEXT := CASE WHEN p_descending THEN 'DESC' ELSE 'ASC' END;
+    v_comparison TEXT := CASE WHEN p_descending THEN '<' ELSE '>' END;
+BEGIN
+    -- Il totale progressivo della pagina parte dalla somma delle righe prima del cursore
+    RETURN QUERY EXECUTE format($query$
+        WITH filtered AS (
+            SELECT
+                t.id,
+                t.date,
+                t.amount::NUMERIC AS amount,
+                t.category::TEXT AS category,
+                t.description::TEXT AS description,
+                %1$s AS supplier,
+                t.payment_method::TEXT AS payment_method
+            FROM %4$I t
+            WHERE t.date >= $1
+              AND t.date < $2
+              AND ($3 IS NULL OR t.category = $3)
+              AND ($4 IS NULL OR t.description ILIKE '%%' || $4 || '%%')
+        ),
+        page AS (
+            SELECT *
+            FROM filtered f
+            WHERE $5 IS NULL OR (f.%2$I, f.id) %5$s ($5::%6$s, $6)
+            ORDER BY f.%2$I %3$s, f.id %3$s
+            LIMIT $7
+        )
+        SELECT
+            p.*,
+            (SELECT COALESCE(SUM(f.amount), 0) FROM filtered f
+             WHERE $5 IS NOT NULL AND NOT ((f.%2$I, f.id) %5$s ($5::%6$s, $6)))
+            + SUM(p.amount) OVER (ORDER BY p.%2$I %3$s, p.id %3$s) AS running_total,
+            (SELECT COUNT(*) FROM filtered) AS total_count
+        FROM page p
+        ORDER BY p.%2$I %3$s, p.id %3$s
+    $query$, v_supplier, v_sort, v_direction, v_table, v_comparison, v_cast)
+    USING p_start, p_end, p_category, p_search, p_after_value, p_after_id, p_limit;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Permessi per le chiamate RPC via PostgREST
+GRANT EXECUTE ON FUNCTION get_transactions_page(TEXT, DATE, DATE, TEXT, TEXT, TEXT, BOOLEAN, TEXT, UUID, INTEGER) TO anon, authenticated;
@@ -7,9 +7,13 @@ al dashboard di gestione macelleria.
 import pandas as pd
 import json
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import logging
 
+from components.excel_sheet_parser import extract_sheet_records
+from components.workbook_loader import map_workbook_sheets
+from components.workbook_cache import get_workbook_cache
+
 # Configurazione logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,8 +21,12 @@ logger = logging.getLogger(__name__)
 class ExcelMigrator:
     """Classe per migrare dati Excel al dashboard"""
     
-    def __init__(self, excel_path: str):
+    def __init__(self, excel_path: str, read_only: bool = False, workers: Optional[int] = None,
+                 use_cache: bool = True):
         self.excel_path = excel_path
+        self.read_only = read_only  # lettura in streaming con openpyxl per file grandi
+        self.workers = workers  # processi per i fogli: None = automatico, 1 = seriale
+        self.use_cache = use_cache  # riusa i risultati di un file già analizzato (components/workbook_cache.py)
         self.months_mapping = {
             'Noviembre 24': '2024-11',
             'Deciembre 24': '2024-12', 
@@ -35,19 +43,29 @@ class ExcelMigrator:
         try:
             logger.info(f"📊 Leggendo file Excel: {self.excel_path}")
             
-            # Leggi tutti i fogli
-            xl_file = pd.ExcelFile(self.excel_path)
+            # Stesso file già analizzato (hash del contenuto): niente parsing
+            cache = get_workbook_cache() if self.use_cache else None
+            # La modalità di lettura fa parte della variante: le due letture non condividono l'entry
+            mode = 'read_only' if self.read_only else 'full'
+            cache_key = cache.make_key(self.excel_path, f"migrator-id-{mode}") if cache else None
+            cached = cache.get(cache_key) if cache else None
+            if cached is not None:
+                logger.info("⚡ Libro Excel già analizzato: dati letti dalla cache")
+                return {sheet_name: self._with_summary(data) for sheet_name, data in cached.items()}
+            
+            # Leggi e processa i fogli (su più processi se ce ne sono abbastanza), risultati in ordine
+            sheets = map_workbook_sheets(
+                self.excel_path, self._process_sheet, header=None, read_only=self.read_only, workers=self.workers
+            )
             all_data = {}
             
-            for sheet_name in xl_file.sheet_names:
-                logger.info(f"📋 Processando foglio: {sheet_name}")
-                
-                # Leggi il foglio
-                df = pd.read_excel(self.excel_path, sheet_name=sheet_name, header=None)
-                
-                # Processa i dati del foglio
-                processed_data = self.process_sheet_data(df, sheet_name)
+            for sheet_name, processed_data in sheets:
+                logger.info(f"📋 Foglio processato: {sheet_name}")
                 all_data[sheet_name] = processed_data
+            
+            # Un foglio fallito ({}) non va in cache: il prossimo caricamento lo rielabora
+            if cache and all_data and all(all_data.values()):
+                cache.put(cache_key, all_data)
                 
             return all_data
             
@@ -55,52 +73,28 @@ class ExcelMigrator:
             logger.error(f"❌ Errore leggendo Excel: {e}")
             return {}
     
+    def _with_summary(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Ricostruisce il risultato di process_sheet_data da un foglio in cache"""
+        if not data:
+            return {}
+        return {
+            'month': data['month'],
+            'transactions': data['transactions'],
+            'daily_totals': data['daily_totals'],
+            'summary': self.calculate_monthly_summary(data['transactions'], data['daily_totals'])
+        }
+    
+    def _process_sheet(self, sheet_name: str, df: pd.DataFrame) -> Dict[str, Any]:
+        """Task per foglio di map_workbook_sheets (eseguibile in un processo worker)"""
+        return self.process_sheet_data(df, sheet_name)
+    
     def process_sheet_data(self, df: pd.DataFrame, sheet_name: str) -> Dict[str, Any]:
         """Processa i dati di un singolo foglio"""
         try:
-            # Identifica le colonne principali
-            columns_mapping = {
-                0: 'movimiento_id',
-                1: 'numero', 
-                2: 'fecha',
-                3: 'base_venta',
-                4: 'igic_venta',
-                5: 'cobro_venta',
-                6: 'base_compra',
-                7: 'igic_compra', 
-                8: 'pagos_compra',
-                9: 'nombre_operacion',
-                10: 'beneficio',
-                11: 'nomina',
-                12: 'seguridad_social',
-                13: 'retencion',
-                14: 'vacaciones',
-                15: 'liquidacion',
-                16: 'gastos',
-                17: 'beneficio_total',
-                18: 'beneficio_neto',
-                19: 'fondo',
-                20: 'stock'
-            }
-            
-            # Estrai i dati delle transazioni
-            transactions = []
-            daily_totals = []
-            
-            for i in range(len(df)):
-                row = df.iloc[i]
-                
-                # Cerca righe con dati di transazione
-                if pd.notna(row.iloc[0]) and isinstance(row.iloc[0], (int, float)):
-                    transaction = self.extract_transaction(row, columns_mapping, sheet_name)
-                    if transaction:
-                        transactions.append(transaction)
-                
-                # Cerca totali giornalieri
-                if pd.notna(row.iloc[9]) and 'TOTAL DEL DIA' in str(row.iloc[9]):
-                    daily_total = self.extract_daily_total(row, columns_mapping, sheet_name)
-                    if daily_total:
-                        daily_totals.append(daily_total)
+            # Estrai transazioni e totali giornalieri con maschere per colonna
+            transactions, daily_totals = extract_sheet_records(
+                df, self.months_mapping.get(sheet_name, sheet_name), include_id=True
+            )
             
             return {
                 'month': self.months_mapping.get(sheet_name, sheet_name),
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Script per ricostruire i report mensili e annuali (monthly_reports, yearly_reports)
+Da eseguire dopo importazioni massive o backfill dei dati di contabilità
+"""
+
+import sys
+from pathlib import Path
+
+# Aggiungi il percorso della directory corrente al path di Python
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from database.hybrid_database_manager import get_hybrid_manager
+
+def rebuild_period_reports():
+    """Ricostruisce i report mensili e annuali dai report giornalieri"""
+    
+    print("🔄 Ricostruendo report mensili e annuali...")
+    
+    db = get_hybrid_manager()
+    database = 'Supabase' if db.is_supabase_active() else 'SQLite'
+    print(f"   🗄️ Database: {database}")
+    
+    months_count = db.rebuild_period_reports()
+    if not months_count:
+        print("⚠️ Nessun mese ricostruito (nessun dato, funzione rebuild_period_reports non installata "
+              "o SUPABASE_SERVICE_ROLE_KEY non configurata)")
+        return
+    
+    print(f"   ✅ Mesi ricostruiti: {months_count}")
+    print("✅ Ricostruzione completata!")
+
+if __name__ == "__main__":
+    rebuild_period_reports()
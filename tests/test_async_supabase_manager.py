@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Test di AsyncSupabaseManager e di HybridDatabaseManager.run_async_batch
+contro uno stub locale compatibile con PostgREST (httpx.MockTransport)
+Esecuzione: python -m pytest -q tests
+"""
+
+import asyncio
+import csv
+import json
+import sys
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from unittest import mock
+
+import httpx
+
+# Aggiungi il percorso della directory corrente al path di Python
+current_dir = Path(__file__).parent.parent
+sys.path.append(str(current_dir))
+
+from database import hybrid_database_manager
+from database.async_supabase_manager import AsyncSupabaseManager
+from database.hybrid_database_manager import HybridDatabaseManager
+from database.query_cache import QueryCache, ReferenceDataCache
+
+BASE_URL = 'http://postgrest.test'
+
+
+class PostgrestStub:
+    """Server PostgREST in memoria: select con filtri eq/gte/lte/gt/lt/in, order, limit/offset
+    (con un limite max-rows come quello di Supabase), insert e delete"""
+
+    def __init__(self, tables, max_rows=1000):
+        self.tables = {name: [dict(row) for row in rows] for name, rows in tables.items()}
+        self.max_rows = max_rows
+        self.requests = []
+        self._next_id = 1 + max((row['id'] for rows in self.tables.values() for row in rows), default=0)
+
+    def transport(self):
+        return httpx.MockTransport(self.handle)
+
+    @staticmethod
+    def _matches(row, column, condition):
+        operator, _, value = condition.partition('.')
+        current = row.get(column)
+        if operator == 'is':
+            return current is None
+        current = str(current)
+        if operator == 'in':
+            return current in next(csv.reader([value[1:-1]], escapechar='\\'))
+        return {
+            'eq': current == value,
+            'gte': current >= value,
+            'lte': current <= value,
+            'gt': current > value,
+            'lt': current < value
+        }[operator]
+
+    def _filtered(self, table, params):
+        rows = self.tables.setdefault(table, [])
+        for column, condition in params:
+            if column not in ('select', 'order', 'limit', 'offset'):
+                rows = [row for row in rows if self._matches(row, column, condition)]
+        return rows
+
+    def handle(self, request):
+        self.requests.append(request)
+        table = request.url.path.strip('/')
+        params = list(request.url.params.multi_items())
+        options = dict(params)
+
+        if request.method == 'GET':
+            rows = self._filtered(table, params)
+            for item in reversed(options.get('order', '').split(',') if options.get('order') else []):
+                column, _, direction = item.partition('.')
+                rows = sorted(rows, key=lambda row: str(row.get(column)), reverse=direction == 'desc')
+            offset = int(options.get('offset', 0))
+            limit = min(int(options.get('limit', self.max_rows)), self.max_rows)
+            rows = rows[offset:offset + limit]
+            columns = options.get('select', '*')
+            if columns != '*':
+                names = [name.strip() for name in columns.split(',')]
+                rows = [{name: row.get(name) for name in names} for row in rows]
+            return httpx.Response(200, json=rows)
+
+        if request.method == 'POST':
+            row = dict(json.loads(request.content), id=self._next_id)
+            self._next_id += 1
+            self.tables.setdefault(table, []).append(row)
+            return httpx.Response(201, json=[row])
+
+        if request.method == 'DELETE':
+            removed = self._filtered(table, params)
+            self.tables[table] = [row for row in self.tables.get(table, []) if row not in removed]
+            return httpx.Response(204)
+
+        return httpx.Response(405)
+
+
+def income(row_id, date, amount, category='Ventas'):
+    return {'id': row_id, 'date': date, 'amount': amount, 'category': category,
+            'description': '', 'payment_method': 'Efectivo'}
+
+
+def expense(row_id, date, amount, category='Proveedores'):
+    return {'id': row_id, 'date': date, 'amount': amount, 'category': category,
+            'description': '', 'supplier': 'Proveedor 1', 'payment_method': 'Efectivo'}
+
+
+class AsyncSupabaseManagerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.stub = PostgrestStub({
+            'daily_income': [income(1, '2024-03-01', 100.0), income(2, '2024-03-01', 50.0, 'Otros'),
+                             income(3, '2024-03-02', 80.0)],
+            'daily_expenses': [expense(4, '2024-03-01', 30.0)],
+            'daily_reports': []
+        }, max_rows=2)
+
+    def run_with_db(self, work):
+        async def _run():
+            async with AsyncSupabaseManager(base_url=BASE_URL, api_key='test', transport=self.stub.transport()) as db:
+                return await work(db)
+        return asyncio.run(_run())
+
+    def test_select_applies_filters_and_projection(self):
+        rows = self.run_with_db(lambda db: db.select('daily_income', 'id, amount', filters={'date': '2024-03-01'}))
+        self.assertEqual(rows, [{'id': 1, 'amount': 100.0}, {'id': 2, 'amount': 50.0}])
+        self.assertEqual(self.stub.requests[0].headers['apikey'], 'test')
+
+    def test_select_in_filter(self):
+        filters = {'category__in': ['Otros', 'Carne, cerdo'], 'date__gte': '2024-03-01'}
+        rows = self.run_with_db(lambda db: db.select('daily_income', 'id', filters=filters))
+        self.assertEqual(rows, [{'id': 2}])
+        self.assertEqual(self.stub.requests[0].url.params['category'], 'in.(Otros,"Carne, cerdo")')
+
+    def test_daily_entries_and_report(self):
+        async def work(db):
+            return await asyncio.gather(db.get_daily_entries('2024-03-01'), db.get_daily_report('2024-03-01'))
+        entries, report = self.run_with_db(work)
+        self.assertEqual(entries['total_income'], 150.0)
+        self.assertEqual(entries['total_expenses'], 30.0)
+        # Nessuna riga in daily_reports: il report viene calcolato dalle transazioni
+        self.assertEqual(report['net_profit'], 120.0)
+        self.assertEqual(report['transactions_count'], 3)
+
+    def test_transactions_range_reads_past_max_rows(self):
+        # max-rows (2) inferiore alla pagina richiesta (1000): ogni pagina è corta
+        data = self.run_with_db(lambda db: db.get_transactions_range('2024-03-01', '2024-04-01'))
+        self.assertEqual([row['id'] for row in data['income']], [1, 2, 3])
+        self.assertEqual([row['id'] for row in data['expenses']], [4])
+
+    def test_writes_round_trip(self):
+        async def work(db):
+            added = await db.add_daily_expense(20.0, 'Servicios', date='2024-03-01')
+            after_add = await db.get_daily_entries('2024-03-01')
+            await db.delete_daily_entry('expense', added['id'])
+            after_delete = await db.get_daily_entries('2024-03-01')
+            return after_add, after_delete
+        after_add, after_delete = self.run_with_db(work)
+        self.assertEqual(after_add['total_expenses'], 50.0)
+        self.assertEqual(after_delete['total_expenses'], 30.0)
+
+
+class RunAsyncBatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.stub = PostgrestStub({
+            'daily_income': [income(1, '2024-03-01', 100.0)],
+            'daily_expenses': [expense(2, '2024-03-01', 40.0)],
+            'daily_reports': []
+        })
+        self.executor = ThreadPoolExecutor(max_workers=2)
+
+        # Manager ibrido con Supabase "attivo", senza passare dal singleton
+        self.db = object.__new__(HybridDatabaseManager)
+        self.db.use_supabase = True
+        self.db.supabase_manager = mock.Mock(is_connected=mock.Mock(return_value=True))
+        self.db._query_cache = QueryCache()
+        self.db._reference_cache = ReferenceDataCache()
+        self.db._fetch_executor = self.executor
+        self.db._dashboard_refresher = mock.Mock()
+
+        factory = partial(AsyncSupabaseManager, base_url=BASE_URL, api_key='test', transport=self.stub.transport())
+        patcher = mock.patch.object(hybrid_database_manager, 'AsyncSupabaseManager', factory)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.executor.shutdown)
+
+    def test_gathers_calls_and_isolates_errors(self):
+        results = self.db.run_async_batch(
+            {
+                'entries': ('get_daily_entries', '2024-03-01'),
+                'report': ('get_daily_report', '2024-03-01'),
+                'broken': ('no_such_method',)
+            },
+            defaults={'broken': {}}
+        )
+        self.assertEqual(results['entries']['total_income'], 100.0)
+        self.assertEqual(results['report']['net_profit'], 60.0)
+        self.assertEqual(results['broken'], {})
+
+    def test_reads_share_cached_query_entries(self):
+        cached_report = {'date': '2024-03-01', 'net_profit': 999.0}
+        self.db._query_cache.set(('get_daily_report', ('2024-03-01',), ()), cached_report, ('daily_reports',))
+        batch = {'entries': ('get_daily_entries', '2024-03-01'), 'report': ('get_daily_report', '2024-03-01')}
+
+        results = self.db.run_async_batch(batch)
+        # Il report arriva dalla cache; le entrate vengono lette e salvate con la chiave di get_daily_entries
+        self.assertEqual(results['report'], cached_report)
+        self.assertEqual(results['entries']['total_income'], 100.0)
+        self.assertNotIn('daily_reports', [request.url.path.strip('/') for request in self.stub.requests])
+
+        requests_count = len(self.stub.requests)
+        self.assertEqual(self.db.run_async_batch(batch), results)
+        self.assertEqual(len(self.stub.requests), requests_count)
+
+    def test_writes_invalidate_cache(self):
+        self.db._query_cache.set(('get_daily_report', '2024-03-01'), {'net_profit': 60.0}, ('daily_income',))
+        results = self.db.run_async_batch({'added': ('add_daily_income', 10.0, 'Ventas', '', 'Efectivo', '2024-03-01')})
+        self.assertEqual(results['added']['amount'], 10.0)
+        self.assertEqual(len(self.stub.tables['daily_income']), 2)
+        self.db._dashboard_refresher.invalidate.assert_called_once()
+        self.assertEqual(self.db._query_cache.get(('get_daily_report', '2024-03-01')), (False, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Test di DashboardRefresher
+Esecuzione: python -m pytest -q tests
+"""
+
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+# Aggiungi il percorso della directory corrente al path di Python
+current_dir = Path(__file__).parent.parent
+sys.path.append(str(current_dir))
+
+from database.dashboard_refresher import DashboardRefresher
+
+
+class DashboardRefresherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.builds = 0
+        self.built = threading.Event()
+        self.refresher = DashboardRefresher(self.build, interval=60, tables=('daily_income',))
+        self.addCleanup(self.refresher.stop)
+
+    def build(self):
+        self.builds += 1
+        self.built.set()
+        return {'stats': {'total_sales': self.builds}}
+
+    def test_first_snapshot_is_built_once(self):
+        snapshot = self.refresher.get_snapshot()
+        self.assertEqual(snapshot['data'], {'stats': {'total_sales': 1}})
+        # Il thread appena avviato attende un intervallo invece di ricalcolare subito
+        self.built.clear()
+        self.assertFalse(self.built.wait(0.2))
+        self.assertEqual(self.builds, 1)
+
+    def test_write_wakes_the_thread(self):
+        self.refresher.get_snapshot()
+        self.built.clear()
+        self.refresher.invalidate(['daily_income'])
+        self.assertTrue(self.built.wait(5))
+        self.assertEqual(self.builds, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test del decoratore cached_query (QueryCache)
+Esecuzione: python -m pytest -q tests
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Aggiungi il percorso della directory corrente al path di Python
+current_dir = Path(__file__).parent.parent
+sys.path.append(str(current_dir))
+
+from database.query_cache import QueryCache, cached_query, invalidates
+
+
+class FakeManager:
+    """Manager minimo: una lettura in cache e una scrittura che la invalida"""
+
+    def __init__(self):
+        self._query_cache = QueryCache()
+        self.rows = [1]
+        self.reads = 0
+        self.write_during_read = False
+
+    @cached_query('daily_income')
+    def get_rows(self):
+        self.reads += 1
+        rows = list(self.rows)
+        if self.write_during_read:
+            # Scrittura concorrente mentre la lettura è ancora in corso
+            self.write_during_read = False
+            self.add_row(2)
+        return rows
+
+    @invalidates('daily_income')
+    def add_row(self, value):
+        self.rows.append(value)
+
+
+class CachedQueryTest(unittest.TestCase):
+
+    def test_hits_until_write(self):
+        db = FakeManager()
+        self.assertEqual(db.get_rows(), [1])
+        self.assertEqual(db.get_rows(), [1])
+        self.assertEqual(db.reads, 1)
+        db.add_row(2)
+        self.assertEqual(db.get_rows(), [1, 2])
+        self.assertEqual(db.reads, 2)
+
+    def test_write_during_read_is_not_cached(self):
+        db = FakeManager()
+        db.write_during_read = True
+        # La lettura restituisce i dati letti prima della scrittura, ma non li salva
+        self.assertEqual(db.get_rows(), [1])
+        self.assertEqual(db.get_rows(), [1, 2])
+        self.assertEqual(db.reads, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()